@@ -0,0 +1,359 @@
+"""
+A local fake of the parts of GitHub's REST and GraphQL APIs the sync uses.
+
+Serves ``repositories`` generated repositories with ``branches`` branches
+each, without storing them: every payload is derived from the repository
+and branch number. Responses carry GitHub's pagination Link headers, ETags
+(``If-None-Match`` gets a 304 that does not count against the rate limit) and
+``X-RateLimit-*`` headers; once ``rate_limit`` calls are used up requests get
+GitHub's 403 until the window resets. ``latency`` seconds are added to every
+response, and the next ``server_errors`` requests get a 502. With
+``max_concurrent`` set, requests beyond that many in flight get a secondary
+rate limit: a 403 with ``Retry-After: secondary_retry_after``.
+
+``GET /_stats`` returns the number of calls per endpoint, ``POST /_reset``
+clears them and restores the rate limit.
+
+Used by benchmarks/sync_throughput.py and repos/tests/test_fake_github.py,
+or on its own::
+
+    python -m benchmarks.fake_github --repositories 1000 --branches 10 --port 8765
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+OWNER = 'bench'
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+RATE_LIMIT_WINDOW = 3600
+
+REPOSITORY = re.compile(rf'^/repos/{OWNER}/repo-(\d+)$')
+BRANCHES = re.compile(rf'^/repos/{OWNER}/repo-(\d+)/branches$')
+COMMIT = re.compile(rf'^/repos/{OWNER}/repo-(\d+)/commits/(\d+)-([0-9a-f]+)$')
+
+
+def branch_name(number):
+    return 'main' if number == 0 else f'branch-{number:05d}'
+
+
+def commit_sha(repository, branch):
+    # Commit SHAs are 40 hex characters; the prefix lets /commits/ find the branch
+    digest = hashlib.sha1(f'{repository}:{branch}'.encode()).hexdigest()
+    return f'{branch}-{digest}'[:40]
+
+
+class FakeGitHub:
+    def __init__(self, repositories=100, branches=5, latency=0.0, rate_limit=1_000_000, clock=time.time,
+                 server_errors=0, max_concurrent=None, secondary_retry_after=60):
+        self.repositories = repositories
+        self.branches = branches
+        self.latency = latency
+        self.server_errors = server_errors
+        self.max_concurrent = max_concurrent
+        self.secondary_retry_after = secondary_retry_after
+        self.in_flight = 0
+        self.rate_limit = rate_limit
+        self.clock = clock
+        self.base_url = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = Counter()
+            self.not_modified = 0
+            self.connections = 0
+            self.remaining = self.rate_limit
+            self.reset_at = int(self.clock()) + RATE_LIMIT_WINDOW
+
+    def stats(self):
+        with self._lock:
+            return {
+                'total': sum(self.calls.values()),
+                'not_modified': self.not_modified,
+                'connections': self.connections,
+                'rate_limit_remaining': self.remaining,
+                'by_endpoint': dict(self.calls),
+            }
+
+    # Payloads
+
+    def repository(self, number):
+        name = f'repo-{number:05d}'
+        return {
+            'id': number + 1,
+            'node_id': f'R_{number}',
+            'name': name,
+            'full_name': f'{OWNER}/{name}',
+            'owner': {'login': OWNER, 'id': 1, 'type': 'User'},
+            'private': number % 4 == 0,
+            'html_url': f'https://github.com/{OWNER}/{name}',
+            'description': f'Benchmark repository {number}',
+            'fork': number % 10 == 0,
+            'url': f'{self.base_url}/repos/{OWNER}/{name}',
+            'created_at': '2020-01-01T00:00:00Z',
+            'updated_at': '2024-01-01T00:00:00Z',
+            'pushed_at': '2024-01-01T00:00:00Z',
+            'size': number * 10 % 50000,
+            'stargazers_count': number % 500,
+            'watchers_count': number % 500,
+            'forks_count': number % 50,
+            'open_issues_count': number % 20,
+            'language': ('Python', 'Go', 'TypeScript', None)[number % 4],
+            'default_branch': 'main',
+        }
+
+    def branch(self, repository, number):
+        sha = commit_sha(repository, number)
+        return {
+            'name': branch_name(number),
+            'commit': {'sha': sha, 'url': f'{self.base_url}/repos/{OWNER}/repo-{repository:05d}/commits/{sha}'},
+            'protected': False,
+        }
+
+    def commit(self, repository, branch, sha):
+        return {
+            'sha': sha,
+            'url': f'{self.base_url}/repos/{OWNER}/repo-{repository:05d}/commits/{sha}',
+            'commit': {'message': f'Commit on {branch_name(branch)}', 'author': {'name': OWNER}},
+        }
+
+    def rate_limit_payload(self):
+        core = {'limit': self.rate_limit, 'remaining': self.remaining, 'reset': self.reset_at, 'used': self.rate_limit - self.remaining}
+        return {'resources': {'core': core, 'search': core, 'graphql': core}, 'rate': core}
+
+    def graphql(self, payload):
+        variables = payload.get('variables') or {}
+        data = {}
+        for alias in re.findall(r'(r\d+): repository\(', payload.get('query', '')):
+            name = variables.get(f'n{alias[1:]}', '')
+            match = re.match(r'^repo-(\d+)$', name)
+            if not match or int(match.group(1)) >= self.repositories:
+                data[alias] = None
+                continue
+            rest = self.repository(int(match.group(1)))
+            data[alias] = {
+                'stargazerCount': rest['stargazers_count'],
+                'forkCount': rest['forks_count'],
+                'issues': {'totalCount': rest['open_issues_count']},
+                'pullRequests': {'totalCount': 0},
+                'watchers': {'totalCount': rest['watchers_count']},
+                'defaultBranchRef': {'name': rest['default_branch']},
+                'primaryLanguage': {'name': rest['language']} if rest['language'] else None,
+                'createdAt': rest['created_at'],
+                'updatedAt': rest['updated_at'],
+                'pushedAt': rest['pushed_at'],
+            }
+        return {'data': data}
+
+    # Routing
+
+    def route(self, method, path, query, body):
+        """Return ``(endpoint, status, payload, page_info)`` for a request"""
+        if method == 'POST' and path == '/graphql':
+            return 'graphql', 200, self.graphql(json.loads(body or b'{}')), None
+        if method != 'GET':
+            return 'unknown', 404, {'message': 'Not Found'}, None
+        if path == '/user':
+            return 'user', 200, {'login': OWNER, 'id': 1, 'type': 'User', 'url': f'{self.base_url}/users/{OWNER}'}, None
+        if path == '/rate_limit':
+            return 'rate_limit', 200, self.rate_limit_payload(), None
+        if path == '/user/repos':
+            return 'user_repos', 200, None, (self.repositories, self.repository)
+        if path == '/user/starred':
+            return 'user_starred', 200, None, (0, self.repository)
+        if match := REPOSITORY.match(path):
+            number = int(match.group(1))
+            if number < self.repositories:
+                return 'repository', 200, self.repository(number), None
+        if match := BRANCHES.match(path):
+            number = int(match.group(1))
+            if number < self.repositories:
+                return 'branches', 200, None, (self.branches, lambda branch: self.branch(number, branch))
+        if match := COMMIT.match(path):
+            number, branch = int(match.group(1)), int(match.group(2))
+            if number < self.repositories and branch < self.branches:
+                return 'commit', 200, self.commit(number, branch, f'{match.group(2)}-{match.group(3)}'), None
+        return 'unknown', 404, {'message': 'Not Found'}, None
+
+    def paginate(self, path, query, page_info):
+        """Slice a generated collection and build its Link header"""
+        count, item = page_info
+        per_page = min(int(query.get('per_page', [DEFAULT_PER_PAGE])[0]), MAX_PER_PAGE)
+        page = max(int(query.get('page', ['1'])[0]), 1)
+        last = max((count + per_page - 1) // per_page, 1)
+        start = (page - 1) * per_page
+        payload = [item(number) for number in range(start, min(start + per_page, count))]
+
+        links = []
+        params = {key: values[0] for key, values in query.items()}
+        for rel, target in (('next', page + 1), ('last', last)):
+            if page < last:
+                links.append(f'<{self.base_url}{path}?{urlencode({**params, "page": target})}>; rel="{rel}"')
+        return payload, ', '.join(links)
+
+    def handle(self, method, url, headers, body):
+        """Return ``(status, headers, body bytes)``"""
+        with self._lock:
+            self.in_flight += 1
+            limited = self.max_concurrent is not None and self.in_flight > self.max_concurrent
+            if limited:
+                self.calls['secondary_rate_limit'] += 1
+        try:
+            if limited:
+                return 403, {
+                    'Content-Type': 'application/json', 'Retry-After': str(self.secondary_retry_after),
+                }, b'{"message": "You have exceeded a secondary rate limit."}'
+            return self._handle(method, url, headers, body)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _handle(self, method, url, headers, body):
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+
+        if parsed.path == '/_stats':
+            return 200, {'Content-Type': 'application/json'}, json.dumps(self.stats()).encode()
+        if parsed.path == '/_reset':
+            self.reset()
+            return 204, {}, b''
+
+        with self._lock:
+            failing = self.server_errors > 0
+            if failing:
+                self.server_errors -= 1
+                self.calls['server_error'] += 1
+        if failing:
+            return 502, {'Content-Type': 'application/json'}, b'{"message": "Server Error"}'
+
+        endpoint, status, payload, page_info = self.route(method, parsed.path.rstrip('/') or '/', query, body)
+        response_headers = {'Content-Type': 'application/json; charset=utf-8'}
+        if page_info is not None:
+            payload, link = self.paginate(parsed.path, query, page_info)
+            if link:
+                response_headers['Link'] = link
+        content = json.dumps(payload).encode()
+        etag = f'W/"{hashlib.md5(content).hexdigest()}"'
+
+        with self._lock:
+            now = self.clock()
+            if now >= self.reset_at:
+                self.remaining = self.rate_limit
+                self.reset_at = int(now) + RATE_LIMIT_WINDOW
+            self.calls[endpoint] += 1
+            # Conditional requests that hit don't count against the limit
+            not_modified = method == 'GET' and headers.get('If-None-Match') == etag
+            if not_modified:
+                self.not_modified += 1
+            elif self.remaining > 0:
+                self.remaining -= 1
+            else:
+                status = 403
+                content = json.dumps({'message': 'API rate limit exceeded for user.'}).encode()
+            response_headers.update({
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Remaining': str(self.remaining),
+                'X-RateLimit-Reset': str(self.reset_at),
+                'X-RateLimit-Used': str(self.rate_limit - self.remaining),
+            })
+
+        if not_modified:
+            return 304, {**response_headers, 'ETag': etag}, b''
+        if status == 200 and method == 'GET':
+            response_headers['ETag'] = etag
+        return status, response_headers, content
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this every keep-alive
+    # response waits out a delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.fake._lock:
+            self.server.fake.connections += 1
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, headers, content = self.server.fake.handle(self.command, self.path, self.headers, body)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that timed out and hung up are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(fake, host='127.0.0.1', port=0):
+    server = _Server((host, port), _Handler)
+    server.daemon_threads = True
+    server.fake = fake
+    fake.base_url = f'http://{host}:{server.server_address[1]}'
+    return server
+
+
+@contextmanager
+def serve(fake, host='127.0.0.1', port=0):
+    """Run ``fake`` on a background thread; yields its base URL"""
+    server = make_server(fake, host, port)
+    thread = threading.Thread(target=server.serve_forever, name='fake-github', daemon=True)
+    thread.start()
+    try:
+        yield fake.base_url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--repositories', type=int, default=100)
+    parser.add_argument('--branches', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--rate-limit', type=int, default=1_000_000, help='calls per hour before 403s')
+    parser.add_argument('--max-concurrent', type=int, help='requests in flight before secondary rate limits')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.repositories, args.branches, args.latency, args.rate_limit, max_concurrent=args.max_concurrent)
+    server = make_server(fake, args.host, args.port)
+    # The first line tells a parent process where to connect
+    print(fake.base_url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
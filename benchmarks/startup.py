@@ -0,0 +1,109 @@
+"""
+Startup cost of short-lived commands, measured with ``python -X importtime``.
+
+Each command is run in a fresh interpreter; the script reports wall time,
+total import time, the slowest top-level imports and whether any module from
+HEAVY_MODULES was imported. ``--check`` exits non-zero if a command exceeds
+its budget or imports a heavy module. repos/tests/test_startup.py only checks
+for heavy imports; timings are too noisy to fail the unit suite on.
+
+Usage::
+
+    python -m benchmarks.startup [--repeat 5] [--check]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    'manage.py check': ['manage.py', 'check'],
+    'manage.py sync_repos --help': ['manage.py', 'sync_repos', '--help'],
+    'src/cli.py --help': ['src/cli.py', '--help'],
+}
+
+# Import time budgets in milliseconds. Before the heavy imports were made
+# lazy these commands took roughly 900, 840 and 160 ms of imports; slower CI
+# machines can scale the budgets with STARTUP_BUDGET_SCALE.
+BUDGET_SCALE = float(os.environ.get('STARTUP_BUDGET_SCALE', 1))
+BUDGETS_MS = {
+    'manage.py check': 800 * BUDGET_SCALE,
+    'manage.py sync_repos --help': 800 * BUDGET_SCALE,
+    'src/cli.py --help': 250 * BUDGET_SCALE,
+}
+
+# Loaded on first use only; none of the commands above should need them
+HEAVY_MODULES = ('github', 'git', 'requests', 'httpx', 'rich', 'numpy', 'yaml', 'prometheus_client')
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us, depth)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return modules
+
+
+def measure(name):
+    """Run one command once and return its startup profile"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *COMMANDS[name]],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'{name} failed:\n{result.stderr[-2000:]}')
+
+    modules = parse_importtime(result.stderr)
+    top_level = {module: cumulative for module, (_, cumulative, depth) in modules.items() if depth == 0}
+    return {
+        'wall_ms': wall_ms,
+        'import_ms': sum(top_level.values()) / 1000,
+        'slowest': sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:8],
+        'heavy': sorted({module.split('.')[0] for module in modules} & set(HEAVY_MODULES)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='Fail when a command is over budget')
+    args = parser.parse_args()
+
+    failures = []
+    for name in COMMANDS:
+        runs = [measure(name) for _ in range(args.repeat)]
+        import_ms = statistics.median(run['import_ms'] for run in runs)
+        wall_ms = statistics.median(run['wall_ms'] for run in runs)
+        heavy = runs[0]['heavy']
+
+        print(f'{name}')
+        print(f'  wall {wall_ms:7.1f} ms   imports {import_ms:7.1f} ms   budget {BUDGETS_MS[name]:.0f} ms')
+        for module, cumulative in runs[0]['slowest']:
+            print(f'    {cumulative / 1000:7.1f} ms  {module}')
+        if heavy:
+            print(f'  heavy modules imported: {", ".join(heavy)}')
+            failures.append(f'{name} imports {", ".join(heavy)}')
+        if import_ms > BUDGETS_MS[name]:
+            failures.append(f'{name} took {import_ms:.0f} ms of imports (budget {BUDGETS_MS[name]:.0f} ms)')
+
+    if args.check and failures:
+        print('\n'.join(['', 'Over budget:', *failures]))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Sync throughput of GitHubService.sync_repositories against a fake GitHub.
+
+Each scenario runs in its own process against a throwaway test database,
+with benchmarks/fake_github.py serving N repositories x M branches from a
+separate process. Reported per scenario: wall time, API calls (by
+endpoint), database queries and peak RSS of the syncing process.
+
+PyGithub normally spaces requests ``GITHUB_MIN_REQUEST_INTERVAL`` seconds
+apart; the benchmark sets it to ``--client-interval`` (0 by default) so the
+numbers show the sync's own cost rather than the client's pacing.
+
+``--save`` appends the results, tagged with the current commit, to
+benchmarks/results/sync_throughput.jsonl, and ``--compare REF`` prints the
+change against the results saved for another commit::
+
+    python -m benchmarks.sync_throughput --scenario 1kx10 --save
+    python -m benchmarks.sync_throughput --scenario all --compare HEAD~1
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.request import urlopen
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_FILE = BASE_DIR / 'benchmarks' / 'results' / 'sync_throughput.jsonl'
+
+# name: (repositories, branches per repository)
+SCENARIOS = {
+    '1kx10': (1000, 10),
+    '10kx5': (10000, 5),
+    '100x5000': (100, 5000),
+}
+COMPARED = ('wall_s', 'api_calls', 'db_queries', 'peak_rss_mb')
+
+
+def git(*args):
+    return subprocess.run(['git', *args], cwd=BASE_DIR, capture_output=True, text=True).stdout.strip()
+
+
+def start_fake_github(repositories, branches, latency, rate_limit):
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'benchmarks.fake_github',
+            '--repositories', str(repositories), '--branches', str(branches),
+            '--latency', str(latency), '--rate-limit', str(rate_limit),
+        ],
+        cwd=BASE_DIR, stdout=subprocess.PIPE, text=True,
+    )
+    return process, process.stdout.readline().strip()
+
+
+def run_scenario(repositories, branches, latency, rate_limit, client_interval):
+    """Run one sync in this process and return its measurements"""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'repomgr.settings')
+    os.environ['GITHUB_ACCESS_TOKEN'] = 'benchmark-token'
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment
+    from repos.models import Branch, Repository
+    from repos.services import GitHubService
+
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    fake, base_url = start_fake_github(repositories, branches, latency, rate_limit)
+    try:
+        with override_settings(GITHUB_API_URL=base_url, GITHUB_MIN_REQUEST_INTERVAL=client_interval), \
+                connection.execute_wrapper(count_queries):
+            started = time.perf_counter()
+            synced = GitHubService().sync_repositories(trigger='benchmark')
+            wall = time.perf_counter() - started
+
+        with urlopen(f'{base_url}/_stats') as response:
+            api = json.load(response)
+        result = {
+            'wall_s': round(wall, 3),
+            'api_calls': api['total'],
+            'api_by_endpoint': api['by_endpoint'],
+            'db_queries': queries,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'synced': len(synced),
+            'branches_stored': Branch.objects.count(),
+            'repositories_stored': Repository.objects.count(),
+            'database': connection.vendor,
+        }
+    finally:
+        fake.terminate()
+        fake.wait()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return result
+
+
+def run_child(name, args):
+    """Run a scenario in a fresh interpreter so peak RSS is its own"""
+    repositories, branches = SCENARIOS[name] if name in SCENARIOS else (args.repositories, args.branches)
+    command = [
+        sys.executable, '-m', 'benchmarks.sync_throughput', '--child',
+        '--repositories', str(repositories), '--branches', str(branches),
+        '--latency', str(args.latency), '--rate-limit', str(args.rate_limit),
+        '--client-interval', str(args.client_interval),
+    ]
+    result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'{name} failed:\n{result.stderr[-3000:]}')
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    return {'scenario': name, 'repositories': repositories, 'branches': branches, 'latency': args.latency, **measured}
+
+
+def load_results(commit):
+    """Latest saved result per scenario for ``commit``"""
+    results = {}
+    if RESULTS_FILE.exists():
+        for line in RESULTS_FILE.read_text().splitlines():
+            record = json.loads(line)
+            if record['commit'] == commit:
+                results[record['scenario']] = record
+    return results
+
+
+def print_result(result, baseline=None):
+    print(
+        f"{result['scenario']:<10} {result['repositories']:>6} x {result['branches']:<5} "
+        f"{result['wall_s']:>9.2f} s  {result['api_calls']:>8} calls  "
+        f"{result['db_queries']:>8} queries  {result['peak_rss_mb']:>7.1f} MB"
+    )
+    calls = ', '.join(f'{endpoint} {count}' for endpoint, count in sorted(result['api_by_endpoint'].items()))
+    print(f"{'':<10} calls: {calls}")
+    if baseline:
+        changes = []
+        for key in COMPARED:
+            before = baseline[key]
+            change = (result[key] - before) / before * 100 if before else 0
+            changes.append(f'{key} {before} -> {result[key]} ({change:+.1f}%)')
+        print(f"{'':<10} vs {baseline['commit']}: {'; '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--scenario', choices=[*SCENARIOS, 'custom', 'all'], default='1kx10')
+    parser.add_argument('--repositories', type=int, default=100, help='for --scenario custom')
+    parser.add_argument('--branches', type=int, default=5, help='for --scenario custom')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds the fake adds to every response')
+    parser.add_argument('--rate-limit', type=int, default=1_000_000)
+    parser.add_argument('--client-interval', type=float, default=0.0, help='GITHUB_MIN_REQUEST_INTERVAL for the run')
+    parser.add_argument('--save', action='store_true', help=f'append results to {RESULTS_FILE.relative_to(BASE_DIR)}')
+    parser.add_argument('--compare', metavar='REF', help='compare with results saved for this commit')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.repositories, args.branches, args.latency, args.rate_limit, args.client_interval)))
+        return
+
+    baseline = load_results(git('rev-parse', '--short', args.compare)) if args.compare else {}
+    commit = git('rev-parse', '--short', 'HEAD')
+    dirty = bool(git('status', '--porcelain', '--untracked-files=no'))
+    names = list(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+
+    for name in names:
+        result = run_child(name, args)
+        result.update(commit=commit, dirty=dirty, recorded_at=datetime.now(timezone.utc).isoformat(timespec='seconds'))
+        print_result(result, baseline.get(name))
+        if args.save:
+            RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with RESULTS_FILE.open('a') as results:
+                results.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Latency and queries per request of the main pages at growing dataset sizes.
+
+For each size the throwaway test database is grown with ``seed_repos`` (20
+branches and 5 sessions per repository by default, the ratio of 100k
+repositories, 2M branches and 500k sessions), then every scenario is driven
+by ``--threads`` concurrent clients for ``--requests`` requests. Reported per
+scenario: throughput, p50/p95/p99 latency and mean/max queries per request.
+
+    python -m benchmarks.web_load --sizes 1000,10000,100000 --requests 200 --threads 8
+"""
+import argparse
+import io
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'repomgr.settings')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from repos.models import Repository  # noqa: E402
+
+SCENARIOS = {
+    'list': lambda pks, rng: reverse('repos:repository_list'),
+    'search': lambda pks, rng: reverse('repos:repository_list') + f"?query={rng.choice(['api', 'worker', 'docs'])}&private=false",
+    'detail': lambda pks, rng: reverse('repos:repository_detail', args=[rng.choice(pks)]),
+    'sessions': lambda pks, rng: reverse('repos:session_list', args=[rng.choice(pks)]),
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted ``values``"""
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def grow(size, branches, sessions):
+    missing = size - Repository.objects.count()
+    if missing > 0:
+        started = time.perf_counter()
+        call_command(
+            'seed_repos', repositories=missing, branches=missing * branches, sessions=missing * sessions,
+            seed=size, stdout=io.StringIO(),
+        )
+        print(f"seeded {missing} repositories in {time.perf_counter() - started:.1f} s")
+    return list(Repository.objects.values_list('pk', flat=True))
+
+
+def run(user, scenario, pks, total, threads):
+    # One client per thread: the list view writes to the session, and two
+    # requests sharing a session would interrupt each other
+    local = threading.local()
+
+    def worker(index):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+            client.force_login(user)
+        url = SCENARIOS[scenario](pks, random.Random(index))
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        # Connections are per thread, so this only counts this request
+        with connections['default'].execute_wrapper(count):
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        assert response.status_code == 200, (url, response.status_code)
+        return elapsed, queries
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(worker, range(total)))
+    return results, time.perf_counter() - started
+
+
+def summarize(size, scenario, results, elapsed):
+    latencies = sorted(latency for latency, _ in results)
+    queries = [count for _, count in results]
+    print(
+        f"{size:>8} {scenario:<9} {len(results) / elapsed:>8.1f} req/s  "
+        f"p50 {percentile(latencies, 0.50) * 1000:>8.1f} ms  "
+        f"p95 {percentile(latencies, 0.95) * 1000:>8.1f} ms  "
+        f"p99 {percentile(latencies, 0.99) * 1000:>8.1f} ms  "
+        f"queries {sum(queries) / len(queries):>5.1f} avg {max(queries):>4} max"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma-separated repository counts')
+    parser.add_argument('--branches', type=int, default=20, help='branches per repository')
+    parser.add_argument('--sessions', type=int, default=5, help='sessions per repository')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--scenario', choices=[*SCENARIOS, 'all'], default='all')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    scenarios = list(SCENARIOS) if args.scenario == 'all' else [args.scenario]
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create_user(username='bench', password='bench-password')
+        for size in sizes:
+            pks = grow(size, args.branches, args.sessions)
+            for scenario in scenarios:
+                summarize(size, scenario, *run(user, scenario, pks, args.requests, args.threads))
+                connections.close_all()
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Compare WSGI and ASGI throughput for the repository views.
+
+The WSGI side drives the synchronous views from a fixed pool of worker
+threads, the way a threaded WSGI server would. The ASGI side drives the async
+views from a single event loop with many requests in flight. GitHub is
+replaced by a fake that waits ``--latency`` seconds per call, so the
+``create`` scenario shows what happens while GitHub calls are outstanding and
+the ``detail`` scenario shows the database-only overhead.
+
+Runs against a throwaway test database:
+
+    python -m benchmarks.wsgi_vs_asgi --requests 400 --threads 8 --concurrency 200
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'repomgr.settings')
+os.environ.setdefault('GITHUB_ACCESS_TOKEN', 'benchmark-token')
+django.setup()
+
+import httpx  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from repos.async_services import AsyncGitHubService  # noqa: E402
+from repos.models import Repository, Branch  # noqa: E402
+
+_github_ids = itertools.count(1_000_000)
+
+
+def seed(repositories):
+    Repository.objects.bulk_create(
+        Repository(
+            github_id=i,
+            name=f'bench-repo-{i}',
+            full_name=f'bench/bench-repo-{i}',
+            url=f'https://github.com/bench/bench-repo-{i}',
+        )
+        for i in range(repositories)
+    )
+    Branch.objects.bulk_create(
+        Branch(repository=repo, name=name, is_default=name == 'main', last_commit_sha='0' * 40)
+        for repo in Repository.objects.all()
+        for name in ('main', 'develop')
+    )
+    return User.objects.create_user(username='bench', password='bench-password')
+
+
+class SlowGitHubService:
+    """Synchronous stand-in for GitHubService that blocks for ``latency``"""
+
+    latency = 0.0
+
+    def create_repository(self, name, description=None, private=False, auto_init=True):
+        time.sleep(self.latency)
+        github_id = next(_github_ids)
+        return Repository.objects.create(
+            github_id=github_id,
+            name=f'{name}-{github_id}',
+            full_name=f'bench/{name}-{github_id}',
+            url=f'https://github.com/bench/{name}-{github_id}',
+        )
+
+
+def slow_async_service(latency):
+    async def handler(request):
+        await asyncio.sleep(latency)
+        if request.method == 'POST':
+            github_id = next(_github_ids)
+            name = f'created-{github_id}'
+            return httpx.Response(201, json={
+                'id': github_id,
+                'name': name,
+                'full_name': f'bench/{name}',
+                'description': '',
+                'html_url': f'https://github.com/bench/{name}',
+                'private': False,
+                'default_branch': 'main',
+            })
+        return httpx.Response(200, json=[])
+
+    return lambda: AsyncGitHubService(transport=httpx.MockTransport(handler))
+
+
+def summarize(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<14} {len(latencies):>6} req  {elapsed:>7.2f} s  "
+        f"{len(latencies) / elapsed:>8.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:>7.1f} ms  p95 {p95 * 1000:>7.1f} ms"
+    )
+
+
+def run_wsgi(user, scenario, total, threads):
+    clients = []
+    for _ in range(threads):
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+
+    def worker(index):
+        client = clients[index % threads]
+        started = time.perf_counter()
+        if scenario == 'create':
+            response = client.post(reverse('repos:repository_create'), {'name': 'bench'})
+        else:
+            response = client.get(reverse('repos:repository_detail', args=[index % 100 + 1]))
+        assert response.status_code in (200, 302), response.status_code
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(worker, range(total)))
+    return latencies, time.perf_counter() - started
+
+
+async def run_asgi(user, scenario, total, concurrency):
+    clients = []
+    for _ in range(concurrency):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        clients.append(client)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with semaphore:
+            client = clients[index % concurrency]
+            started = time.perf_counter()
+            if scenario == 'create':
+                response = await client.post(reverse('repos:repository_create'), {'name': 'bench'})
+            else:
+                response = await client.get(reverse('repos:repository_detail', args=[index % 100 + 1]))
+            assert response.status_code in (200, 302), response.status_code
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument('--concurrency', type=int, default=200, help='in-flight requests on the ASGI event loop')
+    parser.add_argument('--latency', type=float, default=0.2, help='simulated GitHub latency in seconds')
+    parser.add_argument('--scenario', choices=['create', 'detail', 'all'], default='all')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = seed(100)
+        SlowGitHubService.latency = args.latency
+        scenarios = ['create', 'detail'] if args.scenario == 'all' else [args.scenario]
+        for scenario in scenarios:
+            print(f"\nscenario: {scenario}")
+            with patch('repos.views.GitHubService', SlowGitHubService):
+                summarize('wsgi (sync)', *run_wsgi(user, scenario, args.requests, args.threads))
+            connections.close_all()
+            with override_settings(ROOT_URLCONF='repomgr.urls_async'), \
+                    patch('repos.async_views.AsyncGitHubService', slow_async_service(args.latency)):
+                summarize('asgi (async)', *asyncio.run(run_asgi(user, scenario, args.requests, args.concurrency)))
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Database connection statistics for monitoring.
+
+With ``DB_POOL=true`` the numbers come from the psycopg 3 pool of each
+configured database; otherwise connections are persistent per thread and only
+their settings and state are reported.
+"""
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+
+
+def pool_stats(alias='default'):
+    """Return connection statistics for the database ``alias`` as a dict"""
+    connection = connections[alias]
+    stats = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'role': settings.REPOMGR_PROCESS_ROLE,
+    }
+
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        stats.update({
+            'mode': 'persistent',
+            'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+            'connected': connection.connection is not None,
+        })
+        return stats
+
+    # psycopg_pool only reports counters that have moved away from zero
+    raw = pool.get_stats()
+    size = raw.get('pool_size', 0)
+    available = raw.get('pool_available', 0)
+    stats.update({
+        'mode': 'pool',
+        'min_size': raw.get('pool_min', 0),
+        'max_size': raw.get('pool_max', 0),
+        'size': size,
+        'available': available,
+        'in_use': size - available,
+        'waiting': raw.get('requests_waiting', 0),
+        'requests': raw.get('requests_num', 0),
+        'waits': raw.get('requests_queued', 0),
+        'wait_ms': raw.get('requests_wait_ms', 0),
+        'timeouts': raw.get('requests_errors', 0),
+        'connections_opened': raw.get('connections_num', 0),
+        'connect_ms': raw.get('connections_ms', 0),
+        'connections_lost': raw.get('connections_lost', 0),
+    })
+    return stats
+
+
+@staff_member_required
+def pool_stats_view(request):
+    return JsonResponse({'databases': [pool_stats(alias) for alias in connections]})
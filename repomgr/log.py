@@ -0,0 +1,117 @@
+"""
+Logging that keeps file and console writes off the threads doing the work.
+
+``QueuedHandler`` formats a record on the calling thread and hands it to a
+queue; one background thread per handler and process writes it to the
+target handlers. The thread starts with the first record, so processes
+forked after logging was configured (gunicorn ``--preload``,
+multiprocessing) start their own. When the queue is full (the disk can't
+keep up) records are dropped and counted instead of blocking the sync, and
+a warning with the count is logged once there is room again.
+``DebugSampler`` passes one in every
+``every`` DEBUG records per message template, so debug logging of a 10k
+repository sync stays readable; it keys on the unformatted message, so
+repetitive debug calls should use %-style arguments rather than f-strings.
+"""
+import atexit
+import logging
+import os
+import queue
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+
+from django.utils.module_loading import import_string
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room; the queue may be full of records not written yet
+        self.queue.put(self._sentinel)
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Writes records to ``handlers`` from a background thread. Each handler is
+    given as a dict of its ``class`` and keyword arguments.
+    """
+
+    def __init__(self, handlers, max_size=10000):
+        super().__init__(queue.Queue(max_size))
+        self.max_size = max_size
+        self.targets = []
+        for spec in handlers:
+            options = dict(spec)
+            self.targets.append(import_string(options.pop('class'))(**options))
+        self.dropped = 0
+        self._unreported = 0
+        # The process the listener thread runs in, None until it starts
+        self._pid = None
+        self.listener = _Listener(self.queue, *self.targets, respect_handler_level=True)
+        atexit.register(self._stop)
+
+    def _start(self):
+        if self._pid is not None:
+            # Forked: the queue came along, the thread emptying it didn't
+            self.queue = queue.Queue(self.max_size)
+            self.listener = _Listener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def enqueue(self, record):
+        # Called with the handler's lock held
+        if self._pid != os.getpid():
+            self._start()
+        if self._unreported:
+            self._report_dropped(block=False)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+    def _report_dropped(self, block):
+        report = self.prepare(logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            '%d log records dropped, the log queue was full', (self._unreported,), None,
+        ))
+        try:
+            self.queue.put(report, block=block)
+        except queue.Full:
+            return
+        self._unreported = 0
+
+    def _stop(self):
+        # Writes out what is still queued
+        if self._pid == os.getpid() and self.listener._thread is not None:
+            if self._unreported:
+                self._report_dropped(block=True)
+            self.listener.stop()
+
+    def close(self):
+        # dictConfig closes the old handlers when logging is configured again
+        self._stop()
+        atexit.unregister(self._stop)
+        for handler in self.targets:
+            handler.close()
+        super().close()
+
+
+class DebugSampler(logging.Filter):
+    """Passes the first and then every ``every``-th DEBUG record of each message"""
+    # Messages tracked at most; f-string messages would otherwise pile up
+    MAX_MESSAGES = 10000
+
+    def __init__(self, every=100):
+        super().__init__()
+        self.every = every
+        self.seen = Counter()
+
+    def filter(self, record):
+        if record.levelno != logging.DEBUG or self.every <= 1:
+            return True
+        key = (record.name, record.msg)
+        if key not in self.seen and len(self.seen) >= self.MAX_MESSAGES:
+            self.seen.clear()
+        count = self.seen[key]
+        self.seen[key] = count + 1
+        return count % self.every == 0
@@ -0,0 +1,148 @@
+"""
+Prometheus metrics, served at ``/metrics``.
+
+- ``repomgr_http_request_duration_seconds``: response time per view, method
+  and status, from ``repomgr.middleware.MetricsMiddleware``
+- ``repomgr_db_query_duration_seconds``: every query per database alias,
+  timed by a wrapper installed on each new connection
+- ``repomgr_github_request_duration_seconds``: GitHub API calls per endpoint
+  and status, ``repomgr_github_rate_limit_remaining`` per token
+  fingerprint and rate limit resource, and
+  ``repomgr_github_concurrency_limit``, the adaptive limit on requests in
+  flight per token fingerprint (see ``repos.transport``)
+- ``repomgr_cache_requests_total``: hits and misses per cache
+- ``repomgr_sync_jobs_running``: syncs in progress, counted when scraped;
+  runs older than ``SYNC_RUN_TIMEOUT`` are taken to have died
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set, every process (web workers and
+``sync_repos`` runs alike) writes its samples there and ``/metrics`` merges
+them; see the README for the deployment side. Recording a sample costs a
+label lookup and a lock, a microsecond or two; everything else happens when
+Prometheus scrapes.
+
+This module imports ``prometheus_client``; the modules recording samples
+import it with ``repos.lazy.lazy_import`` so that commands which never
+record one don't pay for it.
+"""
+import hashlib
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+REQUEST_SECONDS = Histogram(
+    'repomgr_http_request_duration_seconds', 'Time to produce a response, by view',
+    ['view', 'method', 'status'],
+)
+DB_QUERY_SECONDS = Histogram(
+    'repomgr_db_query_duration_seconds', 'Database query execution time',
+    ['alias'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, float('inf')),
+)
+GITHUB_REQUEST_SECONDS = Histogram(
+    'repomgr_github_request_duration_seconds', 'GitHub API response time, by endpoint',
+    ['endpoint', 'status'],
+    buckets=(.05, .1, .25, .5, 1, 2.5, 5, 10, 30, float('inf')),
+)
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    'repomgr_github_rate_limit_remaining', 'GitHub API calls left in the current rate limit window',
+    ['token', 'resource'],
+    multiprocess_mode='mostrecent',
+)
+GITHUB_CONCURRENCY_LIMIT = Gauge(
+    'repomgr_github_concurrency_limit', 'GitHub API requests a token may have in flight',
+    ['token'],
+    multiprocess_mode='mostrecent',
+)
+CACHE_REQUESTS = Counter(
+    'repomgr_cache_requests_total', 'Cache lookups, by cache and result (hit, stale or miss)',
+    ['cache', 'result'],
+)
+
+
+def token_fingerprint(authorization):
+    """A short, non-reversible label for the token in an Authorization header"""
+    if not authorization:
+        return 'anonymous'
+    return hashlib.sha256(authorization.split()[-1].encode()).hexdigest()[:8]
+
+
+def observe_github_response(endpoint, status, seconds, headers, authorization):
+    GITHUB_REQUEST_SECONDS.labels(endpoint, status).observe(seconds)
+    remaining = headers.get('X-RateLimit-Remaining')
+    if remaining is not None:
+        GITHUB_RATE_LIMIT_REMAINING.labels(
+            token_fingerprint(authorization), headers.get('X-RateLimit-Resource', 'core')
+        ).set(int(remaining))
+
+
+def set_github_concurrency(authorization, limit):
+    GITHUB_CONCURRENCY_LIMIT.labels(token_fingerprint(authorization)).set(limit)
+
+
+def count_cache(cache, result):
+    CACHE_REQUESTS.labels(cache, result).inc()
+
+
+def time_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        DB_QUERY_SECONDS.labels(context['connection'].alias).observe(time.perf_counter() - started)
+
+
+def instrument_connection(connection):
+    """Time every query ``connection`` runs, once per connection object"""
+    if time_query not in connection.execute_wrappers:
+        # First, so temporary execute_wrapper() blocks still pop their own
+        connection.execute_wrappers.insert(0, time_query)
+
+
+class SyncJobsCollector:
+    """
+    Running syncs, read from the database when Prometheus scrapes; left out
+    if the database can't be reached, so the other metrics still are served
+    """
+
+    def collect(self):
+        from repos.models import SyncRun
+
+        try:
+            running = SyncRun.objects.filter(
+                status=SyncRun.RUNNING,
+                started_at__gte=timezone.now() - timedelta(seconds=settings.SYNC_RUN_TIMEOUT),
+            ).count()
+        except DatabaseError:
+            return
+        gauge = GaugeMetricFamily('repomgr_sync_jobs_running', 'Syncs started and not yet finished')
+        gauge.add_metric([], running)
+        yield gauge
+
+
+def scrape_registry():
+    """The metrics of this process, or of all processes in multiprocess mode"""
+    registry = CollectorRegistry(auto_describe=True)
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(REGISTRY)
+    registry.register(SyncJobsCollector())
+    return registry
+
+
+def metrics_view(request):
+    # Rate limits per token and endpoint names are not for anyone to read
+    if not settings.METRICS_TOKEN or not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(scrape_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,53 @@
+"""
+Request timing for the Prometheus metrics in ``repomgr.metrics``.
+
+Apart from that module because the auth system checks import every
+middleware class, and ``manage.py check`` shouldn't load prometheus_client.
+"""
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from repos.lazy import lazy_import
+
+metrics = lazy_import('repomgr.metrics')
+
+# Anything else is reported as "other", like unmatched paths, so that
+# scanners can't blow up the number of label combinations
+HTTP_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class MetricsMiddleware:
+    """Records the response time of every request under its URL name"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    @staticmethod
+    def _observe(request, response, started):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        metrics.REQUEST_SECONDS.labels(view, method, response.status_code).observe(time.perf_counter() - started)
@@ -0,0 +1,229 @@
+"""
+Profiles of slow requests and of sampled syncs, kept as ``repos.models.Profile``
+and downloadable from the admin.
+
+``ProfilingMiddleware`` hands every request to a watchdog thread. Requests
+still running after ``PROFILE_SLOW_REQUEST_SECONDS`` have their thread's
+stack sampled every ``PROFILE_SAMPLE_INTERVAL`` seconds until they finish,
+and are saved with their URL, status, query count and time spent in the
+database and on the CPU. A fast request costs a set insert and delete and a
+counter update per query; the watchdog sleeps until the oldest running
+request turns slow. Like ``QueryBudgetMiddleware`` the middleware is
+synchronous, so under ASGI only the synchronous parts of async views (their
+queries included) show up in the samples.
+
+``profile_sync`` runs a ``PROFILE_SYNC_SAMPLE_RATE`` fraction of syncs under
+cProfile and saves the stats with the ``SyncRun``.
+"""
+import io
+import logging
+import marshal
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+
+from repos.lazy import lazy_import
+from repos.models import Profile
+
+cProfile = lazy_import('cProfile')
+pstats = lazy_import('pstats')
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTimer:
+    """Counts and times queries on every connection while active"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+class SampledRequest:
+    def __init__(self, thread_id, root, deadline):
+        self.thread_id = thread_id
+        # Frames above this one (the server's) are left out of the stacks
+        self.root = root
+        self.deadline = deadline
+        self.stacks = Counter()
+
+
+def collapse(frame, root=None):
+    """``"module:function;module:function"`` from the outermost frame to ``frame``"""
+    names = []
+    while frame is not None and frame is not root:
+        names.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Watchdog:
+    """Samples the stacks of requests running past their deadline"""
+
+    def __init__(self):
+        self._running = set()
+        self._condition = threading.Condition()
+        self._wake_at = float('inf')
+        self._thread = None
+
+    def watch(self, root, seconds):
+        request = SampledRequest(threading.get_ident(), root, time.monotonic() + seconds)
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiling-watchdog', daemon=True)
+                self._thread.start()
+            self._running.add(request)
+            if request.deadline < self._wake_at:
+                self._condition.notify()
+        return request
+
+    def forget(self, request):
+        with self._condition:
+            self._running.discard(request)
+
+    def _run(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                due = [request for request in self._running if request.deadline <= now]
+                if not due:
+                    self._wake_at = min((request.deadline for request in self._running), default=float('inf'))
+                    self._condition.wait(self._wake_at - now if self._running else None)
+                    continue
+                # Sampled under the lock, so a forgotten request's stacks
+                # don't change any more
+                frames = sys._current_frames()
+                for request in due:
+                    frame = frames.get(request.thread_id)
+                    if frame is not None:
+                        request.stacks[collapse(frame, request.root)] += 1
+                del frames
+                self._wake_at = now + settings.PROFILE_SAMPLE_INTERVAL
+                self._condition.wait(settings.PROFILE_SAMPLE_INTERVAL)
+
+
+watchdog = Watchdog()
+
+
+def save_profile(**fields):
+    """Save a ``Profile``, dropping all but the latest ``PROFILE_KEEP``"""
+    try:
+        profile = Profile.objects.create(**fields)
+        cutoff = Profile.objects.values_list('created_at', flat=True)[settings.PROFILE_KEEP:][:1].first()
+        if cutoff is not None:
+            Profile.objects.filter(created_at__lte=cutoff).delete()
+    except DatabaseError:
+        # Losing a profile must not fail the request or sync it describes
+        logger.exception("Could not save profile")
+        return None
+    return profile
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILE_SLOW_REQUEST_SECONDS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.PROFILE_SLOW_REQUEST_SECONDS
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        sampled = watchdog.watch(sys._getframe(), threshold)
+        try:
+            with QueryTimer() as queries:
+                response = self.get_response(request)
+        finally:
+            watchdog.forget(sampled)
+
+        duration = time.perf_counter() - started
+        if duration >= threshold:
+            match = request.resolver_match
+            save_profile(
+                kind=Profile.REQUEST, method=request.method, path=request.get_full_path(),
+                view_name=match.view_name if match else '', status_code=response.status_code,
+                duration=duration, cpu_seconds=time.thread_time() - cpu_started,
+                query_count=queries.count, query_seconds=queries.seconds,
+                samples=sum(sampled.stacks.values()),
+                data=''.join(f'{stack} {count}\n' for stack, count in sampled.stacks.most_common()).encode(),
+            )
+        return response
+
+
+@contextmanager
+def profile_sync(run):
+    """Run the block under cProfile for a ``PROFILE_SYNC_SAMPLE_RATE`` fraction of syncs"""
+    if random.random() >= settings.PROFILE_SYNC_SAMPLE_RATE:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    queries = QueryTimer()
+    try:
+        with queries:
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+    finally:
+        profiler.create_stats()
+        save_profile(
+            kind=Profile.SYNC, sync_run=run,
+            duration=time.perf_counter() - started, cpu_seconds=time.thread_time() - cpu_started,
+            query_count=queries.count, query_seconds=queries.seconds,
+            data=marshal.dumps(profiler.stats),
+        )
+
+
+class _LoadedStats:
+    # pstats.Stats takes anything with these besides file names
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def summarize(profile, limit=25):
+    """The hottest frames of a request profile, or the top of a sync's pstats report"""
+    data = bytes(profile.data)
+    if profile.kind == Profile.SYNC:
+        stream = io.StringIO()
+        stats = pstats.Stats(_LoadedStats(marshal.loads(data)), stream=stream)
+        stats.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    leaves = Counter()
+    for line in data.decode().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        leaves[stack.rsplit(';', 1)[-1]] += int(count)
+    total = sum(leaves.values()) or 1
+    return '\n'.join(
+        f'{count:6d} {count / total:6.1%}  {frame}' for frame, count in leaves.most_common(limit)
+    )
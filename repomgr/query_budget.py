@@ -0,0 +1,125 @@
+"""
+Per-view query budgets and an N+1 detector.
+
+Views declare how many queries a request may take with ``query_budget``;
+the budget covers everything the request runs, including session and auth
+lookups, and must not depend on how much data there is. While
+``QUERY_BUDGET_ACTION`` is set, ``QueryBudgetMiddleware`` counts the
+queries of each request and reports when
+
+- a view runs more queries than its budget (``QUERY_BUDGET_DEFAULT`` for
+  views that declare none), or
+- the same query shape (SQL with its parameters stripped) runs more than
+  ``QUERY_BUDGET_MAX_REPEATS`` times, the signature of an N+1 loop.
+
+``log`` writes a warning, ``raise`` raises ``QueryBudgetExceeded``. Tests
+run with ``raise``; staging can opt in to ``log``.
+
+Queries are counted on the thread handling the request; for streaming
+responses counting continues until the content has been consumed.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+# "IN (%s, %s, %s)" has the same shape whatever the number of values
+_PARAM_LIST = re.compile(r'\((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries, max_repeats=None):
+    """
+    Declare the most queries a view may run per request, and optionally how
+    often one query shape may repeat (default ``QUERY_BUDGET_MAX_REPEATS``).
+    """
+    def decorator(func):
+        func.query_budget = (max_queries, max_repeats)
+        return func
+    return decorator
+
+
+def query_shape(sql):
+    return _PARAM_LIST.sub('(...)', sql)
+
+
+class QueryCounter:
+    """Counts queries and their shapes on every connection while active"""
+
+    def __init__(self):
+        self.count = 0
+        self.shapes = Counter()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        self.shapes[query_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def problems(self, max_queries, max_repeats):
+        found = []
+        if self.count > max_queries:
+            found.append(f'{self.count} queries, budget is {max_queries}')
+        for shape, repeats in self.shapes.most_common():
+            if repeats <= max_repeats:
+                break
+            found.append(f'{repeats}x {shape}')
+        return found
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ACTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._query_counter = counter = QueryCounter()
+        with counter:
+            response = self.get_response(request)
+
+        if isinstance(response, StreamingHttpResponse) and not response.is_async:
+            response.streaming_content = self._counted(request, counter, response.streaming_content)
+        else:
+            self._check(request, counter)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = getattr(view_func, 'query_budget', None)
+
+    def _counted(self, request, counter, content):
+        with counter:
+            yield from content
+        self._check(request, counter)
+
+    def _check(self, request, counter):
+        max_queries, max_repeats = getattr(request, '_query_budget', None) or (None, None)
+        problems = counter.problems(
+            settings.QUERY_BUDGET_DEFAULT if max_queries is None else max_queries,
+            settings.QUERY_BUDGET_MAX_REPEATS if max_repeats is None else max_repeats,
+        )
+        if not problems:
+            return
+        message = f"Query budget exceeded by {request.method} {request.path}: {'; '.join(problems)}"
+        if settings.QUERY_BUDGET_ACTION == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
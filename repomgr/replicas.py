@@ -0,0 +1,214 @@
+"""
+Read replica routing.
+
+Views decorated with ``use_replica`` read the repos app's tables from one of
+``settings.DATABASE_REPLICAS``; everything else, including every write, goes
+to the primary. A user who just made a change is pinned to the primary for
+``REPLICA_STICKY_SECONDS`` so they always see their own writes, and replicas
+lagging more than ``REPLICA_MAX_LAG`` seconds are skipped. So is a replica
+that hasn't yet replayed the primary's WAL up to the current data version:
+conditional GET validators come from that version, and a page rendered
+without the change would be cached under it.
+"""
+import contextvars
+import logging
+import random
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import StreamingHttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from repos.versioning import get_data_version
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = 'repomgr_primary'
+REPLICA_APPS = {'repos'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+WRITE_POSITION_KEY = 'repomgr:write-position:{version}'
+WRITE_POSITION_TIMEOUT = 60 * 60
+
+_read_alias = contextvars.ContextVar('repomgr_read_alias', default=None)
+_lag_checks = {}
+_replayed = {}
+
+
+def parse_lsn(value):
+    """Turn a WAL position such as ``16/B374D848`` into a comparable integer"""
+    high, low = value.split('/')
+    return int(high, 16) << 32 | int(low, 16)
+
+
+def replica_lag(alias):
+    """
+    Replication lag of ``alias`` in seconds, or None if it can't be reached.
+
+    Checked at most every ``REPLICA_LAG_CHECK_INTERVAL`` seconds per process.
+    """
+    now = time.monotonic()
+    checked_at, lag = _lag_checks.get(alias, (None, None))
+    if checked_at is not None and now - checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+        return lag
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(LAG_QUERY)
+            lag = float(cursor.fetchone()[0])
+    except Exception as e:
+        logger.warning(f"Replica {alias} is unavailable: {str(e)}")
+        lag = None
+    _lag_checks[alias] = (now, lag)
+    return lag
+
+
+def write_position():
+    """
+    A WAL position of the primary that includes the current data version,
+    or None if the primary can't tell.
+
+    The version is bumped after its change commits, so any position read
+    once the version is visible covers it. The first process to see a
+    version reads it from the primary and shares it through the cache.
+    """
+    key = WRITE_POSITION_KEY.format(version=get_data_version())
+    position = cache.get(key)
+    if position is None:
+        try:
+            with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+                cursor.execute('SELECT pg_current_wal_lsn()::text')
+                position = parse_lsn(cursor.fetchone()[0])
+        except Exception as e:
+            logger.warning(f"Couldn't read the primary's WAL position: {str(e)}")
+            return None
+        cache.add(key, position, WRITE_POSITION_TIMEOUT)
+    return position
+
+
+def replica_has_replayed(alias, position):
+    """
+    Whether ``alias`` has replayed the primary's WAL up to ``position``.
+
+    The replica is only asked again while it is known to be behind.
+    """
+    if _replayed.get(alias, -1) >= position:
+        return True
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT pg_last_wal_replay_lsn()::text')
+            replayed = cursor.fetchone()[0]
+    except Exception as e:
+        logger.warning(f"Replica {alias} is unavailable: {str(e)}")
+        return False
+    _replayed[alias] = parse_lsn(replayed) if replayed else -1
+    return _replayed[alias] >= position
+
+
+def choose_replica(request):
+    """Pick a replica for this request, or None to read from the primary"""
+    if not settings.DATABASE_REPLICAS:
+        return None
+    if request.method not in SAFE_METHODS or STICKY_COOKIE in request.COOKIES:
+        return None
+
+    healthy = []
+    for alias in settings.DATABASE_REPLICAS:
+        lag = replica_lag(alias)
+        if lag is not None and lag <= settings.REPLICA_MAX_LAG:
+            healthy.append(alias)
+    if not healthy:
+        return None
+    position = write_position()
+    if position is None:
+        return None
+    caught_up = [alias for alias in healthy if replica_has_replayed(alias, position)]
+    return random.choice(caught_up) if caught_up else None
+
+
+def _pinned(content, alias):
+    # Streaming responses run their queries after the view has returned
+    previous = _read_alias.get()
+    _read_alias.set(alias)
+    try:
+        yield from content
+    finally:
+        _read_alias.set(previous)
+
+
+def _read_from(alias, response):
+    if alias and isinstance(response, StreamingHttpResponse) and not response.is_async:
+        response.streaming_content = _pinned(response.streaming_content, alias)
+    return response
+
+
+def use_replica(func):
+    """Serve the view's reads from a replica when one is fresh enough"""
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            alias = await sync_to_async(choose_replica)(request)
+            token = _read_alias.set(alias)
+            try:
+                return _read_from(alias, await func(request, *args, **kwargs))
+            finally:
+                _read_alias.reset(token)
+    else:
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            alias = choose_replica(request)
+            token = _read_alias.set(alias)
+            try:
+                return _read_from(alias, func(request, *args, **kwargs))
+            finally:
+                _read_alias.reset(token)
+    return inner
+
+
+class ReplicaRouter:
+    """
+    Route reads to the replica chosen by ``use_replica`` and all writes to
+    the primary. Sessions, auth and other apps always use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias and model._meta.app_label in REPLICA_APPS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, otherwise Django would write instances back to the
+        # replica they were read from.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from either may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaStickinessMiddleware(MiddlewareMixin):
+    """Pin users to the primary for a short while after they change something"""
+
+    def process_response(self, request, response):
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
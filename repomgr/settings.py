@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -30,11 +31,55 @@ def load_env():
 load_env()
 
 # GitHub Settings
+# A missing token is reported by the repos.W001 system check
 GITHUB_ACCESS_TOKEN = os.environ.get('GITHUB_ACCESS_TOKEN')
-if GITHUB_ACCESS_TOKEN:
-    print(f"GitHub token loaded successfully (starts with: {GITHUB_ACCESS_TOKEN[:4]})")
-else:
-    print("WARNING: GITHUB_ACCESS_TOKEN not found!")
+
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+# PyGithub spaces its requests at least this many seconds apart (its default)
+GITHUB_MIN_REQUEST_INTERVAL = float(os.environ.get('GITHUB_MIN_REQUEST_INTERVAL', 0.25))
+# HTTP transport of all GitHub calls (see repos.transport): timeouts in whole
+# seconds (PyGithub takes no fractions), retries of connection errors, 5xx and
+# short secondary rate limits, and connections kept per host (at least the
+# number of concurrent workers)
+GITHUB_CONNECT_TIMEOUT = int(os.environ.get('GITHUB_CONNECT_TIMEOUT', 10))
+GITHUB_READ_TIMEOUT = int(os.environ.get('GITHUB_READ_TIMEOUT', 30))
+GITHUB_RETRIES = int(os.environ.get('GITHUB_RETRIES', 3))
+GITHUB_RETRY_BACKOFF = float(os.environ.get('GITHUB_RETRY_BACKOFF', 0.5))
+GITHUB_RETRY_AFTER_MAX = float(os.environ.get('GITHUB_RETRY_AFTER_MAX', 10))
+GITHUB_POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', 10))
+# Requests in flight per token, adapted between 1 and the maximum: grown by
+# one per round of fast successes, multiplied by the backoff on secondary
+# rate limits and errors. Responses slower than the latency factor times the
+# fastest recent one stop the growth.
+GITHUB_CONCURRENCY_INITIAL = int(os.environ.get('GITHUB_CONCURRENCY_INITIAL', 4))
+GITHUB_CONCURRENCY_MAX = int(os.environ.get('GITHUB_CONCURRENCY_MAX', 16))
+GITHUB_CONCURRENCY_BACKOFF = float(os.environ.get('GITHUB_CONCURRENCY_BACKOFF', 0.5))
+GITHUB_CONCURRENCY_LATENCY_FACTOR = float(os.environ.get('GITHUB_CONCURRENCY_LATENCY_FACTOR', 2.0))
+
+# Repository stats (stars, forks, ...) are served from an in-process cache:
+# fresh for the soft TTL, then served stale while refreshed in the background,
+# and dropped after the hard TTL.
+REPOSITORY_DETAILS_SOFT_TTL = int(os.environ.get('REPOSITORY_DETAILS_SOFT_TTL', 300))
+REPOSITORY_DETAILS_HARD_TTL = int(os.environ.get('REPOSITORY_DETAILS_HARD_TTL', 3600))
+REPOSITORY_DETAILS_MAX_SIZE = int(os.environ.get('REPOSITORY_DETAILS_MAX_SIZE', 5000))
+
+# Weights and thresholds for repos.scoring
+REPOSITORY_SCORING = {
+    'stale_half_life_days': 180,
+    'activity_half_life_days': 90,
+    'session_half_life_days': 30,
+    'branch_cap': 20,
+    'activity_weight': 0.6,
+    'session_weight': 0.25,
+    'branch_weight': 0.15,
+    'huge_size_kb': 1_000_000,
+    'size_penalty': 0.25,
+    'fork_factor': 0.8,
+    # List filters
+    'healthy_threshold': 70,
+    'at_risk_threshold': 40,
+    'stale_threshold': 0.8,
+}
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -64,12 +109,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "repomgr.middleware.MetricsMiddleware",
+    "repomgr.profiling.ProfilingMiddleware",
+    # Outermost, so session and auth queries count against the budget
+    "repomgr.query_budget.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "repomgr.replicas.ReplicaStickinessMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -92,11 +142,33 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "repomgr.wsgi.application"
+ASGI_APPLICATION = "repomgr.asgi.application"
+
+# Serve the read views and GitHub mutations from repos.async_views. Enable this
+# when running under an ASGI server; WSGI deployments are better off with the
+# synchronous views.
+REPOS_ASYNC_VIEWS = os.environ.get('REPOS_ASYNC_VIEWS', 'False').lower() == 'true'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Connection handling depends on the process role: web processes serve many
+# short requests, sync workers hold a few connections for long runs.
+# DB_POOL=true uses the psycopg 3 connection pool (required under ASGI, where
+# every request runs in a fresh thread and persistent connections never get
+# reused); otherwise connections persist per thread and are health-checked
+# before reuse.
+REPOMGR_PROCESS_ROLE = os.environ.get('REPOMGR_PROCESS_ROLE', 'web')
+if REPOMGR_PROCESS_ROLE not in ('web', 'worker'):
+    raise ValueError(f"REPOMGR_PROCESS_ROLE must be 'web' or 'worker', not {REPOMGR_PROCESS_ROLE!r}")
+
+DB_POOL_DEFAULTS = {
+    'web': {'min_size': 2, 'max_size': 10, 'timeout': 10, 'conn_max_age': 60},
+    'worker': {'min_size': 1, 'max_size': 4, 'timeout': 30, 'conn_max_age': 600},
+}[REPOMGR_PROCESS_ROLE]
+DB_POOL = os.environ.get('DB_POOL', 'False').lower() == 'true'
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -105,9 +177,88 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("POSTGRES_HOST"),
         "PORT": os.environ.get("POSTGRES_PORT"),
+        "OPTIONS": {
+            "application_name": f"repomgr-{REPOMGR_PROCESS_ROLE}",
+        },
     }
 }
 
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "name": f"repomgr-{REPOMGR_PROCESS_ROLE}",
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", DB_POOL_DEFAULTS['min_size'])),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", DB_POOL_DEFAULTS['max_size'])),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", DB_POOL_DEFAULTS['timeout'])),
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", DB_POOL_DEFAULTS['conn_max_age']))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replicas: comma-separated hosts streaming from the primary. List,
+# detail and export reads go to them (see repomgr.replicas) unless they lag
+# by more than REPLICA_MAX_LAG seconds or the user wrote something in the
+# last REPLICA_STICKY_SECONDS.
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")), start=1):
+    alias = f"replica{number}"
+    replica = {**DATABASES["default"], "HOST": host.strip(), "TEST": {"MIRROR": "default"}}
+    replica["OPTIONS"] = {**DATABASES["default"]["OPTIONS"], "application_name": f"repomgr-{REPOMGR_PROCESS_ROLE}-{alias}"}
+    if "pool" in replica["OPTIONS"]:
+        replica["OPTIONS"]["pool"] = {**replica["OPTIONS"]["pool"], "name": f"repomgr-{REPOMGR_PROCESS_ROLE}-{alias}"}
+    DATABASES[alias] = replica
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["repomgr.replicas.ReplicaRouter"]
+REPLICA_MAX_LAG = float(os.environ.get("REPLICA_MAX_LAG", 5))
+REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get("REPLICA_LAG_CHECK_INTERVAL", 5))
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 15))
+
+# Query budgets (see repomgr.query_budget): "raise" under manage.py test,
+# optionally "log" in staging, off ("") otherwise.
+TESTING = sys.argv[1:2] == ["test"]
+QUERY_BUDGET_ACTION = os.environ.get("QUERY_BUDGET_ACTION", "raise" if TESTING else "")
+QUERY_BUDGET_DEFAULT = int(os.environ.get("QUERY_BUDGET_DEFAULT", 30))
+QUERY_BUDGET_MAX_REPEATS = int(os.environ.get("QUERY_BUDGET_MAX_REPEATS", 3))
+
+# Prometheus metrics at /metrics (see repomgr.metrics). Running several
+# worker or sync processes, point PROMETHEUS_MULTIPROC_DIR at a directory they
+# share, emptied before they start. Scrapes need "Authorization: Bearer
+# <METRICS_TOKEN>"; without a token /metrics refuses every request.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() == "true"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+# A sync still running after this many seconds is assumed to have crashed or
+# been killed, and no longer counts in repomgr_sync_jobs_running.
+SYNC_RUN_TIMEOUT = int(os.environ.get("SYNC_RUN_TIMEOUT", 6 * 60 * 60))
+
+# Profiling (see repomgr.profiling), off by default: requests slower than
+# PROFILE_SLOW_REQUEST_SECONDS get their stacks sampled every
+# PROFILE_SAMPLE_INTERVAL seconds, and a PROFILE_SYNC_SAMPLE_RATE fraction
+# of syncs runs under cProfile. The latest PROFILE_KEEP profiles are kept.
+PROFILE_SLOW_REQUEST_SECONDS = float(os.environ.get("PROFILE_SLOW_REQUEST_SECONDS", 0))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", 0.005))
+PROFILE_SYNC_SAMPLE_RATE = float(os.environ.get("PROFILE_SYNC_SAMPLE_RATE", 0))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 200))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The repository data version lives here, so multi-process deployments should
+# point REDIS_URL at a shared instance.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -165,6 +316,23 @@ LOGIN_URL = 'login'
 LOCAL_REPOS_DIR = BASE_DIR / 'local_repos'
 
 # Logging Configuration
+# Records are written from a background thread (see repomgr.log). LOG_FILE
+# rotates at LOG_FILE_MAX_BYTES; set it to "" to log to the console only, e.g.
+# when several processes would share the file. At DEBUG, repetitive messages
+# are sampled one in LOG_DEBUG_SAMPLE.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.environ.get("LOG_FILE", os.path.join(BASE_DIR, 'debug.log'))
+LOG_HANDLERS = [{'class': 'logging.StreamHandler'}]
+if LOG_FILE:
+    LOG_HANDLERS.append({
+        'class': 'logging.handlers.RotatingFileHandler',
+        'filename': LOG_FILE,
+        'maxBytes': int(os.environ.get("LOG_FILE_MAX_BYTES", 10 * 1024 * 1024)),
+        'backupCount': int(os.environ.get("LOG_FILE_BACKUPS", 5)),
+        'encoding': 'utf-8',
+        'delay': True,
+    })
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -178,25 +346,33 @@ LOGGING = {
             'style': '{',
         },
     },
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+    'filters': {
+        'sample_debug': {
+            '()': 'repomgr.log.DebugSampler',
+            'every': int(os.environ.get("LOG_DEBUG_SAMPLE", 100)),
         },
-        'file': {
-            'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'debug.log'),
+    },
+    'handlers': {
+        'queue': {
+            '()': 'repomgr.log.QueuedHandler',
+            'handlers': LOG_HANDLERS,
             'formatter': 'verbose',
+            'filters': ['sample_debug'],
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'INFO',
         },
         'repos': {
-            'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
+            'propagate': True,
+        },
+        'repomgr': {
+            'handlers': ['queue'],
+            'level': LOG_LEVEL,
             'propagate': True,
         },
     },
@@ -15,15 +15,25 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 from django.contrib.auth import views as auth_views
+from repomgr.db import pool_stats_view
+from repos.lazy import lazy_attribute
+
+# prometheus_client is only imported once /metrics is scraped
+metrics_view = lazy_attribute('repomgr.metrics', 'metrics_view')
 
 urlpatterns = [
     path('', include('landing.urls')),
+    path('admin/db/pool/', pool_stats_view, name='db_pool_stats'),
     path('admin/', admin.site.urls),
     path('repos/', include('repos.urls', namespace='repos')),
     path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='/'), name='logout'),
 ]
+
+if settings.METRICS_ENABLED:
+    urlpatterns.append(path('metrics', metrics_view, name='metrics'))
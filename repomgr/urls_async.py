@@ -0,0 +1,13 @@
+from django.urls import include, path
+from repomgr.urls import urlpatterns as project_urlpatterns
+from repos import async_views
+from repos.urls import build_urlpatterns
+
+# The project URLconf with the repos app always served by repos.async_views,
+# regardless of REPOS_ASYNC_VIEWS. Used by the async view tests and the
+# WSGI/ASGI benchmark.
+urlpatterns = [
+    pattern for pattern in project_urlpatterns if getattr(pattern, 'namespace', None) != 'repos'
+] + [
+    path('repos/', include((build_urlpatterns(async_views), 'repos'), namespace='repos')),
+]
@@ -1,14 +1,24 @@
+from statistics import median
+
 from django.contrib import admin
-from .models import Repository, Branch
+from django.http import Http404, HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from repomgr.profiling import summarize
+from .models import Repository, Branch, RepositorySnapshot, SyncRun, Profile
 
 # Register your models here.
 
 @admin.register(Repository)
 class RepositoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'url', 'private', 'created_at', 'last_synced')
+    list_display = ('name', 'url', 'private', 'branch_count', 'default_branch_sha', 'created_at', 'last_synced')
     list_filter = ('private', 'created_at', 'last_synced')
     search_fields = ('name', 'description')
-    readonly_fields = ('github_id', 'created_at', 'updated_at', 'last_synced')
+    readonly_fields = (
+        'github_id', 'created_at', 'updated_at', 'last_synced',
+        'branch_count', 'default_branch_sha', 'branch_freshness_at',
+    )
 
 @admin.register(Branch)
 class BranchAdmin(admin.ModelAdmin):
@@ -16,3 +26,127 @@ class BranchAdmin(admin.ModelAdmin):
     list_filter = ('is_default', 'repository', 'updated_at')
     search_fields = ('name', 'repository__name', 'last_commit_message')
     readonly_fields = ('last_commit_sha', 'updated_at')
+
+@admin.register(RepositorySnapshot)
+class RepositorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ('repository', 'captured_on', 'stars', 'forks', 'open_issues', 'watchers', 'size', 'branch_count')
+    list_filter = ('captured_on',)
+    list_select_related = ('repository',)
+    search_fields = ('repository__name', 'repository__full_name')
+    date_hierarchy = 'captured_on'
+
+def _chart(values, width=720, height=120):
+    """SVG polyline points for ``values``, oldest first, scaled to the box"""
+    top = max(values, default=0) or 1
+    step = width / max(len(values) - 1, 1)
+    return ' '.join(f'{index * step:.1f},{height - value / top * height:.1f}' for index, value in enumerate(values))
+
+@admin.register(SyncRun)
+class SyncRunAdmin(admin.ModelAdmin):
+    list_display = (
+        'started_at', 'trigger', 'status', 'duration', 'repositories', 'api_calls',
+        'rate_limit_used', 'not_modified', 'rows_inserted', 'rows_updated', 'rows_deleted', 'error_count',
+    )
+    list_filter = ('status', 'trigger', 'started_at')
+    date_hierarchy = 'started_at'
+    change_list_template = 'admin/repos/syncrun/change_list.html'
+    # Charted runs, and how many earlier runs the latest is compared with
+    DASHBOARD_RUNS = 100
+    BASELINE_RUNS = 20
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('dashboard/', self.admin_site.admin_view(self.dashboard_view), name='repos_syncrun_dashboard'),
+            *super().get_urls(),
+        ]
+
+    def dashboard_view(self, request):
+        runs = list(
+            SyncRun.objects.filter(status=SyncRun.SUCCEEDED).order_by('-started_at')[:self.DASHBOARD_RUNS]
+        )[::-1]
+        charts = []
+        for label, value in (
+            ('Duration (s)', lambda run: run.duration),
+            ('API calls', lambda run: run.api_calls),
+            ('Rate limit used', lambda run: run.rate_limit_used),
+        ):
+            values = [value(run) for run in runs]
+            chart = {'label': label, 'points': _chart(values), 'max': max(values, default=0), 'latest': None}
+            if values:
+                chart['latest'] = values[-1]
+                previous = values[-self.BASELINE_RUNS - 1:-1]
+                if previous and median(previous):
+                    chart['baseline'] = median(previous)
+                    chart['change'] = (values[-1] - chart['baseline']) / chart['baseline'] * 100
+            charts.append(chart)
+
+        stages = sorted({stage for run in runs for stage in run.stage_seconds})
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Sync dashboard',
+            'runs': runs,
+            'charts': charts,
+            'stages': stages,
+            'recent': [(run, [run.stage_seconds.get(stage) for stage in stages]) for run in runs[::-1][:20]],
+            'baseline_runs': self.BASELINE_RUNS,
+        }
+        return TemplateResponse(request, 'admin/repos/syncrun/dashboard.html', context)
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at', 'kind', 'method', 'path', 'status_code', 'duration', 'cpu_seconds',
+        'query_count', 'query_seconds', 'samples', 'download',
+    )
+    list_filter = ('kind', 'created_at')
+    search_fields = ('path', 'view_name')
+    date_hierarchy = 'created_at'
+    list_select_related = ('sync_run',)
+    exclude = ('data',)
+    readonly_fields = ('download', 'summary')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/download/', self.admin_site.admin_view(self.download_view),
+                name='repos_profile_download',
+            ),
+            *super().get_urls(),
+        ]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        # The list doesn't need the profiles themselves
+        return queryset.defer('data') if request.resolver_match.url_name == 'repos_profile_changelist' else queryset
+
+    @admin.display(description='Profile')
+    def download(self, obj):
+        url = reverse('admin:repos_profile_download', args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.filename)
+
+    @admin.display(description='Summary')
+    def summary(self, obj):
+        return format_html('<pre>{}</pre>', summarize(obj))
+
+    def download_view(self, request, object_id):
+        profile = self.get_object(request, object_id)
+        if profile is None or not self.has_view_permission(request, profile):
+            raise Http404
+        content_type = 'application/octet-stream' if profile.kind == Profile.SYNC else 'text/plain'
+        response = HttpResponse(bytes(profile.data), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{profile.filename}"'
+        return response
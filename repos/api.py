@@ -0,0 +1,156 @@
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from repomgr.query_budget import query_budget
+from repomgr.replicas import use_replica
+
+from .conditional import conditional_view, export_etag
+from .models import Repository, Branch
+
+CHUNK_SIZE = 2000
+
+REPOSITORY_FIELDS = (
+    'id', 'github_id', 'name', 'full_name', 'description', 'url', 'private',
+    'fork', 'created_at', 'updated_at', 'pushed_at', 'size', 'language',
+    'default_branch', 'organization', 'last_synced',
+)
+BRANCH_FIELDS = ('name', 'is_default', 'last_commit_sha', 'last_commit_message', 'updated_at')
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+_encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+
+def _parse_bool(value):
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _parse_since(value):
+    if not value:
+        return None
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f"Invalid 'since' timestamp: {value}")
+    return since
+
+
+def _serialize(rows, output_format):
+    """Encode rows one at a time so the response never holds the full result"""
+    if output_format == 'ndjson':
+        for row in rows:
+            yield _encoder.encode(row) + '\n'
+        return
+
+    yield '['
+    separator = ''
+    for row in rows:
+        yield separator + _encoder.encode(row)
+        separator = ',\n'
+    yield ']\n'
+
+
+def _stream(rows, output_format):
+    return StreamingHttpResponse(_serialize(rows, output_format), content_type=CONTENT_TYPES[output_format])
+
+
+def _output_format(request):
+    output_format = request.GET.get('format', 'ndjson')
+    if output_format not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported format: {output_format}")
+    return output_format
+
+
+def _bad_request(error):
+    return JsonResponse({'error': str(error)}, status=400)
+
+
+def _iter_repositories(queryset, include_branches):
+    """Rows of ``queryset``, which must be ordered by pk"""
+    rows = queryset.values(*REPOSITORY_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    if not include_branches:
+        yield from rows
+        return
+
+    # Branches stream from one query in the same order as the repositories
+    # and are merged in as both advance, so memory is bounded by CHUNK_SIZE
+    # and the query count doesn't grow with the export.
+    branch_rows = (
+        Branch.objects.filter(repository__in=queryset.values('pk'))
+        .order_by('repository_id', '-is_default', 'name')
+        .values('repository_id', *BRANCH_FIELDS)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    branch = next(branch_rows, None)
+    for row in rows:
+        row['branches'] = []
+        while branch is not None and branch['repository_id'] <= row['id']:
+            if branch.pop('repository_id') == row['id']:
+                row['branches'].append(branch)
+            branch = next(branch_rows, None)
+        yield row
+
+
+@query_budget(4)
+@require_GET
+@login_required
+@use_replica
+@conditional_view(etag_func=export_etag)
+def repository_export(request):
+    """
+    Stream repositories as NDJSON (default) or a JSON array.
+
+    Accepts the same filters as ``Repository.search`` (``q``, ``private``,
+    ``organization``, ``language``), ``include=branches`` to embed branches
+    and ``since=<ISO timestamp>`` to return only rows changed after it.
+    """
+    try:
+        output_format = _output_format(request)
+        since = _parse_since(request.GET.get('since'))
+    except ValueError as e:
+        return _bad_request(e)
+
+    include_branches = 'branches' in request.GET.get('include', '').split(',')
+    queryset = Repository.search(
+        query=request.GET.get('q') or None,
+        private=_parse_bool(request.GET.get('private')),
+        organization=request.GET.get('organization') or None,
+        language=request.GET.get('language') or None,
+    )
+    if since is not None:
+        changed = Q(updated_at__gt=since)
+        if include_branches:
+            changed |= Q(branches__updated_at__gt=since)
+        queryset = queryset.filter(changed)
+
+    return _stream(_iter_repositories(queryset.order_by('pk'), include_branches), output_format)
+
+
+@query_budget(4)
+@require_GET
+@login_required
+@use_replica
+@conditional_view(etag_func=export_etag)
+def branch_export(request, pk):
+    """Stream the branches of a single repository"""
+    try:
+        output_format = _output_format(request)
+        since = _parse_since(request.GET.get('since'))
+    except ValueError as e:
+        return _bad_request(e)
+
+    repository = get_object_or_404(Repository.objects.only('pk'), pk=pk)
+    queryset = repository.branches.order_by('-is_default', 'name')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gt=since)
+
+    rows = queryset.values(*BRANCH_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    return _stream(rows, output_format)
@@ -0,0 +1,217 @@
+import logging
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .details_cache import details_from_graphql, details_query, repository_details
+from .lazy import lazy_import
+from .models import Repository, Branch
+from .services import remove_local_checkout
+from .telemetry import endpoint
+
+logger = logging.getLogger(__name__)
+
+httpx = lazy_import('httpx')
+metrics = lazy_import('repomgr.metrics')
+
+
+class GitHubAPIError(Exception):
+    def __init__(self, status_code, message):
+        super().__init__(f"GitHub API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+def next_page_url(response):
+    """Return the rel="next" URL from a GitHub Link header, if any"""
+    for link in response.headers.get('Link', '').split(', '):
+        if 'rel="next"' in link:
+            return link[link.index('<') + 1:link.index('>')]
+    return None
+
+
+@transaction.atomic
+def _save_branches(repo_obj, rows):
+    """Reconcile branches and the repository's branch summary in one transaction"""
+    for row in rows:
+        defaults = {key: value for key, value in row.items() if key != 'name'}
+        Branch.objects.update_or_create(repository=repo_obj, name=row['name'], defaults=defaults)
+    repo_obj.branches.exclude(name__in=[row['name'] for row in rows]).delete()
+    repo_obj.refresh_branch_state()
+
+
+class AsyncGitHubService:
+    """
+    GitHub client for async views.
+
+    Uses a single pooled ``httpx.AsyncClient`` so the event loop can keep many
+    GitHub calls in flight without tying up a worker thread per request. Use it
+    as an async context manager so the connection pool is closed afterwards.
+    """
+
+    def __init__(self, transport=None):
+        self.token = os.environ.get('GITHUB_ACCESS_TOKEN')
+        if not self.token:
+            raise ValueError("GitHub access token is not set in environment")
+
+        self.client = httpx.AsyncClient(
+            base_url=settings.GITHUB_API_URL,
+            headers={
+                'Authorization': f'token {self.token}',
+                'Accept': 'application/vnd.github.v3+json',
+                'User-Agent': 'Python'
+            },
+            timeout=httpx.Timeout(settings.GITHUB_READ_TIMEOUT, connect=settings.GITHUB_CONNECT_TIMEOUT),
+            transport=transport,
+        )
+        self._login = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _request(self, method, url, **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        if settings.METRICS_ENABLED:
+            request = response.request
+            metrics.observe_github_response(
+                endpoint(request.method, str(request.url)), response.status_code, time.perf_counter() - started,
+                response.headers, request.headers.get('Authorization'),
+            )
+
+        rate_limit = response.headers.get('X-RateLimit-Remaining')
+        if rate_limit and int(rate_limit) == 0 and response.status_code in (403, 429):
+            reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
+            wait_time = reset_time - int(timezone.now().timestamp())
+            raise GitHubAPIError(response.status_code, f"rate limit exceeded. Reset in {wait_time} seconds")
+
+        if response.is_error:
+            try:
+                message = response.json().get('message', response.text)
+            except ValueError:
+                message = response.text
+            raise GitHubAPIError(response.status_code, message)
+        return response
+
+    async def _get_all_pages(self, url, params=None):
+        params = dict(params or {}, per_page=100)
+        items = []
+        response = await self._request('GET', url, params=params)
+        while True:
+            page = response.json()
+            if not isinstance(page, list) or not page:
+                break
+            items.extend(page)
+            url = next_page_url(response)
+            if not url:
+                break
+            response = await self._request('GET', url)
+        return items
+
+    async def get_login(self):
+        if self._login is None:
+            response = await self._request('GET', '/user')
+            self._login = response.json()['login']
+        return self._login
+
+    async def _sync_branches(self, repo_obj, repo_data):
+        """Sync branches for a repository from the REST branch listing"""
+        full_name = repo_data['full_name']
+        default_branch = repo_data['default_branch']
+        branches = await self._get_all_pages(f'/repos/{full_name}/branches')
+
+        rows = []
+        for branch in branches:
+            message = ''
+            if branch['name'] == default_branch:
+                # The listing only carries SHAs; one extra call fetches the
+                # head commit message for the branch shown on the detail page.
+                response = await self._request('GET', f'/repos/{full_name}/branches/{branch["name"]}')
+                message = response.json()['commit']['commit']['message']
+            rows.append({
+                'name': branch['name'],
+                'is_default': branch['name'] == default_branch,
+                'last_commit_sha': branch['commit']['sha'],
+                'last_commit_message': message,
+            })
+
+        await sync_to_async(_save_branches)(repo_obj, rows)
+        logger.info(f"Synced {len(rows)} branches for {repo_obj.full_name}")
+
+    async def create_repository(self, name, description=None, private=False, auto_init=True):
+        """Create a new repository on GitHub and record it locally"""
+        response = await self._request('POST', '/user/repos', json={
+            'name': name,
+            'description': description or '',
+            'private': private,
+            'auto_init': auto_init,
+        })
+        repo_data = response.json()
+
+        local_path = os.path.join(os.path.dirname(settings.BASE_DIR), repo_data['name'])
+        logger.info(f"Setting local path for new repository: {local_path}")
+
+        repo_obj, _ = await Repository.objects.aupdate_or_create(
+            github_id=repo_data['id'],
+            defaults={
+                'name': repo_data['name'],
+                'full_name': repo_data['full_name'],
+                'description': repo_data['description'],
+                'url': repo_data['html_url'],
+                'private': repo_data['private'],
+                'default_branch': repo_data['default_branch'],
+                'last_synced': timezone.now(),
+                'local_path': local_path
+            }
+        )
+
+        await self._sync_branches(repo_obj, repo_data)
+        return repo_obj
+
+    async def delete_repository(self, repository):
+        """Delete a repository from GitHub, its local folder and its database record"""
+        full_name = repository.full_name or f"{await self.get_login()}/{repository.name}"
+        try:
+            await self._request('DELETE', f'/repos/{full_name}')
+            logger.info(f"Successfully deleted GitHub repository: {repository.name}")
+        except GitHubAPIError as github_delete_error:
+            logger.error(f"Error deleting GitHub repository {repository.name}: {str(github_delete_error)}")
+
+        await sync_to_async(remove_local_checkout)(repository)
+
+        try:
+            await repository.adelete()
+            logger.info(f"Successfully removed repository {repository.name} from database")
+        except Exception as db_delete_error:
+            logger.error(f"Error removing repository from database: {str(db_delete_error)}")
+
+    async def fetch_repository_details(self, full_names):
+        """Fetch details for many repositories with a single GraphQL call"""
+        query, variables, aliases = details_query(full_names)
+        response = await self._request('POST', '/graphql', json={'query': query, 'variables': variables})
+        return details_from_graphql(response.json(), aliases)
+
+
+async def fetch_repository_details(full_names):
+    # Background refreshes outlive the request's client, so use a fresh one
+    async with AsyncGitHubService() as service:
+        return await service.fetch_repository_details(full_names)
+
+
+async def get_repository_details(repository):
+    """
+    Get detailed information about a repository.
+
+    Served from ``repository_details``; stale entries are refreshed in the
+    background, batched with other repositories.
+    """
+    return await repository_details.aget(repository.full_name, fetch_repository_details)
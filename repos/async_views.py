@@ -0,0 +1,226 @@
+"""
+Async counterparts of the repository views for ASGI deployments.
+
+Database access goes through Django's async ORM and GitHub calls through
+``AsyncGitHubService``, so a single worker keeps serving other requests while
+GitHub is slow. Templates are rendered through ``sync_to_async`` because the
+auth, session and messages context processors are synchronous.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, aget_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from repomgr.query_budget import query_budget
+from repomgr.replicas import use_replica
+
+from .async_services import AsyncGitHubService, GitHubAPIError, get_repository_details
+from .autocomplete import repository_index
+from .conditional import (
+    conditional_view,
+    repository_detail_etag,
+    repository_detail_last_modified,
+    repository_list_etag,
+)
+from .forms import RepositoryCreateForm, RepositorySearchForm
+from .models import Repository
+from .progress import ImportProgress, FINISHED, FAILED
+from .sorting import apply_sort
+from .views import (
+    PROGRESS_HEARTBEAT_INTERVAL,
+    PROGRESS_POLL_INTERVAL,
+    PROGRESS_START_TIMEOUT,
+    _last_event_id,
+    _sse,
+    apply_search,
+    can_fetch_details,
+    list_queryset,
+    new_search_status,
+    repository_import,
+    start_session,
+    end_session,
+    session_list,
+)
+
+logger = logging.getLogger(__name__)
+
+__all__ = [
+    'repository_list',
+    'repository_autocomplete',
+    'repository_detail',
+    'repository_create',
+    'repository_delete',
+    'repository_import',
+    'repository_import_progress',
+    'start_session',
+    'end_session',
+    'session_list',
+]
+
+arender = sync_to_async(render)
+
+
+@query_budget(9)
+@login_required
+@use_replica
+@conditional_view(etag_func=repository_list_etag)
+async def repository_list(request):
+    search_status = await request.session.aget('search_status') or new_search_status()
+    form = RepositorySearchForm(request.GET)
+
+    repositories = list_queryset()
+    search_status['last_search_time'] = timezone.now().isoformat()
+    search_status['total_repositories'] = await repositories.acount()
+
+    repositories = apply_search(repositories, form, search_status)
+    search_status['filtered_repositories'] = await repositories.acount()
+    await request.session.aset('search_status', search_status)
+
+    sort = request.GET.get('sort', '-updated_at')
+    repositories = [repo async for repo in apply_sort(repositories, sort)]
+
+    return await arender(request, 'repos/repository_list.html', {
+        'repositories': repositories,
+        'search_form': form,
+        'current_sort': sort,
+        'search_status': search_status,
+        'scoring': settings.REPOSITORY_SCORING,
+    })
+
+
+@query_budget(5)
+@login_required
+async def repository_autocomplete(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 50))
+    except ValueError:
+        limit = 10
+
+    records = await sync_to_async(repository_index.search)(query, limit)
+    results = [
+        {
+            'id': record.pk,
+            'name': record.name,
+            'full_name': record.full_name,
+            'url': reverse('repos:repository_detail', args=[record.pk]),
+        }
+        for record in records
+    ]
+    return JsonResponse({'query': query, 'results': results})
+
+
+@query_budget(6)
+@login_required
+@use_replica
+@conditional_view(etag_func=repository_detail_etag, last_modified_func=repository_detail_last_modified)
+async def repository_detail(request, pk):
+    repository = await aget_object_or_404(Repository.objects.select_related('active_session__branch'), pk=pk)
+    branches = [branch async for branch in repository.branches.all().order_by('-is_default', 'name')]
+    return await arender(request, 'repos/repository_detail.html', {
+        'repository': repository,
+        'branches': branches,
+        'details': await github_details(repository),
+    })
+
+
+async def github_details(repository):
+    if not can_fetch_details(repository):
+        return None
+    try:
+        return await get_repository_details(repository)
+    except Exception as e:
+        logger.warning(f"Could not get details of {repository.full_name}: {str(e)}")
+        return None
+
+
+@query_budget(20)
+@login_required
+async def repository_create(request):
+    if request.method == 'POST':
+        form = RepositoryCreateForm(request.POST)
+        if form.is_valid():
+            try:
+                async with AsyncGitHubService() as service:
+                    repo = await service.create_repository(
+                        name=form.cleaned_data['name'],
+                        description=form.cleaned_data['description'],
+                        private=form.cleaned_data['private'],
+                        auto_init=form.cleaned_data['auto_init']
+                    )
+                messages.success(request, f'Successfully created repository {repo.name}')
+                return redirect('repos:repository_detail', pk=repo.pk)
+            except GitHubAPIError as e:
+                messages.error(request, f'Error creating repository: {str(e)}')
+    else:
+        form = RepositoryCreateForm()
+
+    return await arender(request, 'repos/repository_create.html', {'form': form})
+
+
+@query_budget(10)
+@login_required
+async def repository_delete(request, pk):
+    repository = await aget_object_or_404(Repository, pk=pk)
+    if request.method == 'POST':
+        try:
+            async with AsyncGitHubService() as service:
+                await service.delete_repository(repository)
+            messages.success(request, f'Successfully deleted repository {repository.name}')
+            return redirect('repos:repository_list')
+        except GitHubAPIError as e:
+            messages.error(request, f'Error deleting repository: {str(e)}')
+
+    return await arender(request, 'repos/repository_delete.html', {'repository': repository})
+
+
+@query_budget(2)
+@login_required
+async def repository_import_progress(request, job_id):
+    """
+    Stream the progress of an import as Server-Sent Events.
+
+    Served asynchronously so that an open stream waits on the event loop
+    rather than holding a worker thread for the length of the import.
+    Reconnecting browsers resume from their ``Last-Event-ID``.
+    """
+    progress = ImportProgress(job_id)
+    last_id = _last_event_id(request)
+
+    async def stream():
+        nonlocal last_id
+        yield 'retry: 2000\n\n'
+        waited = 0.0
+        since_output = 0.0
+        while True:
+            events = await progress.aevents(after=last_id)
+            for event in events:
+                last_id = event['id']
+                yield _sse('progress', event, event_id=last_id)
+            state = await progress.astatus()
+            if state is None and waited >= PROGRESS_START_TIMEOUT:
+                yield _sse(FAILED, {'message': 'Import not found.'})
+                return
+            if state and state['status'] in (FINISHED, FAILED) and not events:
+                yield _sse(state['status'], state)
+                return
+
+            if events:
+                since_output = 0.0
+            elif since_output >= PROGRESS_HEARTBEAT_INTERVAL:
+                since_output = 0.0
+                yield ': keep-alive\n\n'
+            await asyncio.sleep(PROGRESS_POLL_INTERVAL)
+            waited += PROGRESS_POLL_INTERVAL
+            since_output += PROGRESS_POLL_INTERVAL
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,143 @@
+import threading
+from array import array
+from bisect import bisect_left
+
+from .models import Repository
+from .versioning import changed_repositories, get_data_version
+
+
+def normalize(value):
+    return (value or '').strip().casefold()
+
+
+class _Record:
+    __slots__ = ('pk', 'name', 'full_name', 'keys')
+
+    def __init__(self, pk, name, full_name):
+        self.pk = pk
+        self.name = name
+        self.full_name = full_name
+        self.keys = tuple({normalize(name), normalize(full_name)} - {''})
+
+
+class RepositoryPrefixIndex:
+    """
+    In-memory prefix index over repository names and full names.
+
+    Keys are kept in a sorted list with a parallel array of primary keys, so a
+    lookup is a bisect followed by a short forward scan. The index is built
+    from the database on first use and afterwards only re-reads the rows that
+    the commits since the last data version it saw recorded as changed, and is
+    rebuilt when they didn't record them.
+    """
+    CHUNK_SIZE = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._pks = array('q')
+        self._records = {}
+        self._version = None
+
+    def __len__(self):
+        return len(self._records)
+
+    def _insert(self, record):
+        for key in record.keys:
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key and self._pks[position] < record.pk:
+                position += 1
+            self._keys.insert(position, key)
+            self._pks.insert(position, record.pk)
+        self._records[record.pk] = record
+
+    def _remove(self, pk):
+        record = self._records.pop(pk, None)
+        if record is None:
+            return
+        for key in record.keys:
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._pks[position] == pk:
+                    del self._keys[position]
+                    del self._pks[position]
+                    break
+                position += 1
+
+    def _upsert(self, pk, name, full_name):
+        existing = self._records.get(pk)
+        if existing is not None and existing.name == name and existing.full_name == full_name:
+            return
+        self._remove(pk)
+        self._insert(_Record(pk, name, full_name))
+
+    def _rebuild(self):
+        pairs = []
+        records = {}
+        rows = Repository.objects.values_list('pk', 'name', 'full_name').order_by()
+        for pk, name, full_name in rows.iterator(chunk_size=2000):
+            record = _Record(pk, name, full_name)
+            records[pk] = record
+            pairs.extend((key, pk) for key in record.keys)
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._pks = array('q', (pk for _, pk in pairs))
+        self._records = records
+
+    def _apply_changes(self, changed):
+        changed = sorted(changed)
+        for start in range(0, len(changed), self.CHUNK_SIZE):
+            chunk = changed[start:start + self.CHUNK_SIZE]
+            live = set()
+            for pk, name, full_name in Repository.objects.filter(pk__in=chunk).values_list('pk', 'name', 'full_name'):
+                self._upsert(pk, name, full_name)
+                live.add(pk)
+            for pk in chunk:
+                if pk not in live:
+                    self._remove(pk)
+
+    def refresh(self):
+        """Bring the index up to date with the current data version"""
+        version = get_data_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            changed = None if self._version is None else changed_repositories(self._version, version)
+            if changed is None:
+                self._rebuild()
+            else:
+                self._apply_changes(changed)
+            self._version = version
+
+    def search(self, prefix, limit=10):
+        """Return up to ``limit`` records whose name or full name starts with ``prefix``"""
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+        self.refresh()
+
+        results = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(results) < limit:
+                if not self._keys[position].startswith(prefix):
+                    break
+                pk = self._pks[position]
+                if pk not in seen:
+                    seen.add(pk)
+                    results.append(self._records[pk])
+                position += 1
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._keys = []
+            self._pks = array('q')
+            self._records = {}
+            self._version = None
+
+
+repository_index = RepositoryPrefixIndex()
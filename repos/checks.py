@@ -0,0 +1,31 @@
+import os
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def github_token_check(app_configs, **kwargs):
+    if os.environ.get('GITHUB_ACCESS_TOKEN'):
+        return []
+    return [
+        Warning(
+            'GITHUB_ACCESS_TOKEN is not set.',
+            hint='Set it in the environment or in .env; importing and syncing repositories need it.',
+            id='repos.W001',
+        )
+    ]
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or not backend.endswith('.LocMemCache'):
+        return []
+    return [
+        Warning(
+            'The default cache is local to each process.',
+            hint='Set REDIS_URL with several worker processes; import progress and the data version are shared through the cache.',
+            id='repos.W002',
+        )
+    ]
@@ -0,0 +1,134 @@
+"""
+Conditional GET support for the repository pages and export API.
+
+ETags are derived from the repository data version (see ``repos.versioning``),
+which is a cache lookup, so a matching ``If-None-Match`` is answered with 304
+before the view runs a single query or renders a template.
+"""
+import datetime
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from .lazy import lazy_import
+from .models import Repository
+from .versioning import get_data_version
+
+metrics = lazy_import('repomgr.metrics')
+
+
+def _digest(*parts):
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode()).hexdigest()[:16]
+
+
+def _has_pending_messages(request):
+    # A 304 would swallow flash messages queued for this page
+    return len(get_messages(request)) > 0
+
+
+def repository_list_etag(request, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    # The cards show relative "updated N minutes ago" times, so the page
+    # also goes stale once a minute even when no data changes.
+    minute = int(time.time() // 60)
+    return f'list-{_digest(get_data_version(), minute, request.session.session_key, request.GET.urlencode())}'
+
+
+def repository_detail_etag(request, pk, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    return f'detail-{pk}-{_digest(get_data_version(), request.session.session_key)}'
+
+
+def repository_detail_last_modified(request, pk, *args, **kwargs):
+    if _has_pending_messages(request):
+        return None
+    row = (
+        Repository.objects.filter(pk=pk)
+        .values_list('updated_at', 'last_synced', 'branch_freshness_at', 'last_session_at')
+        .first()
+    )
+    if row is None:
+        return None
+    return max(value for value in row if value is not None)
+
+
+def export_etag(request, *args, **kwargs):
+    return f'export-{_digest(get_data_version(), request.path, request.GET.urlencode())}'
+
+
+def _validators(request, etag_func, last_modified_func, args, kwargs):
+    etag = etag_func(request, *args, **kwargs) if etag_func else None
+    etag = quote_etag(etag) if etag is not None else None
+
+    # A matching If-None-Match wins over If-Modified-Since, so skip the
+    # last-modified lookup when the ETag already settles the request.
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if etag and if_none_match and etag in parse_etags(if_none_match):
+        return etag, None
+
+    last_modified = None
+    if last_modified_func:
+        if dt := last_modified_func(request, *args, **kwargs):
+            if not timezone.is_aware(dt):
+                dt = timezone.make_aware(dt, datetime.timezone.utc)
+            last_modified = int(dt.timestamp())
+    return etag, last_modified
+
+
+def _count(request, response):
+    """A request with validators is a hit when it gets its 304"""
+    if settings.METRICS_ENABLED and (
+        'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+    ):
+        metrics.count_cache('conditional_get', 'miss' if response is None else 'hit')
+
+
+def _finalize(request, response, etag, last_modified):
+    if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+        if last_modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+            # Pages are per-session; make browsers revalidate every time.
+            patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_view(etag_func=None, last_modified_func=None):
+    """
+    Like ``django.views.decorators.http.condition``, but also usable on
+    async views: the validator callables may hit the database, so there they
+    run through ``sync_to_async``.
+    """
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def inner(request, *args, **kwargs):
+                etag, last_modified = await sync_to_async(_validators)(
+                    request, etag_func, last_modified_func, args, kwargs
+                )
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                _count(request, response)
+                if response is None:
+                    response = await func(request, *args, **kwargs)
+                return _finalize(request, response, etag, last_modified)
+        else:
+            @wraps(func)
+            def inner(request, *args, **kwargs):
+                etag, last_modified = _validators(request, etag_func, last_modified_func, args, kwargs)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                _count(request, response)
+                if response is None:
+                    response = func(request, *args, **kwargs)
+                return _finalize(request, response, etag, last_modified)
+        return inner
+    return decorator
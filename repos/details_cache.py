@@ -0,0 +1,251 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .lazy import lazy_import
+
+logger = logging.getLogger(__name__)
+
+metrics = lazy_import('repomgr.metrics')
+
+DETAILS_FIELDS = """
+    stargazerCount
+    forkCount
+    issues(states: OPEN) { totalCount }
+    pullRequests(states: OPEN) { totalCount }
+    watchers { totalCount }
+    defaultBranchRef { name }
+    primaryLanguage { name }
+    createdAt
+    updatedAt
+    pushedAt
+"""
+
+
+def _timestamp(value):
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+def details_from_rest(data):
+    """Details from a REST repository payload, e.g. a repository listing entry"""
+    return {
+        'stars': data['stargazers_count'],
+        'forks': data['forks_count'],
+        'open_issues': data['open_issues_count'],
+        'watchers': data['watchers_count'],
+        'default_branch': data['default_branch'],
+        'language': data['language'],
+        'created_at': _timestamp(data['created_at']),
+        'updated_at': _timestamp(data['updated_at']),
+        'pushed_at': _timestamp(data['pushed_at']),
+    }
+
+
+def details_query(full_names):
+    """
+    A single GraphQL query fetching details for all ``full_names``.
+
+    Returns the query, its variables and the alias used for each name.
+    """
+    aliases = {}
+    variables = {}
+    declarations = []
+    selections = []
+    for number, full_name in enumerate(full_names):
+        owner, name = full_name.split('/', 1)
+        aliases[f'r{number}'] = full_name
+        variables[f'o{number}'] = owner
+        variables[f'n{number}'] = name
+        declarations.append(f'$o{number}: String!, $n{number}: String!')
+        selections.append(f'r{number}: repository(owner: $o{number}, name: $n{number}) {{ {DETAILS_FIELDS} }}')
+    query = f"query({', '.join(declarations)}) {{ {' '.join(selections)} }}"
+    return query, variables, aliases
+
+
+def details_from_graphql(payload, aliases):
+    """Map a GraphQL response for ``details_query`` back to full names"""
+    details = {}
+    for alias, node in (payload.get('data') or {}).items():
+        if node is None:
+            continue
+        details[aliases[alias]] = {
+            'stars': node['stargazerCount'],
+            'forks': node['forkCount'],
+            # Matches REST's open_issues_count, which counts pull requests too
+            'open_issues': node['issues']['totalCount'] + node['pullRequests']['totalCount'],
+            'watchers': node['watchers']['totalCount'],
+            'default_branch': (node['defaultBranchRef'] or {}).get('name'),
+            'language': (node['primaryLanguage'] or {}).get('name'),
+            'created_at': _timestamp(node['createdAt']),
+            'updated_at': _timestamp(node['updatedAt']),
+            'pushed_at': _timestamp(node['pushedAt']),
+        }
+    for error in payload.get('errors') or []:
+        logger.warning(f"GitHub GraphQL error: {error.get('message')}")
+    return details
+
+
+class RepositoryDetailsCache:
+    """
+    Stale-while-revalidate LRU cache of repository details, keyed by full name.
+
+    Entries younger than ``soft_ttl`` are served as they are. Older entries are
+    still served, but queued for a background refresh; refreshes are collected
+    for ``batch_window`` seconds and fetched ``batch_size`` repositories per
+    call. Entries older than ``hard_ttl`` are never served and are fetched
+    before returning. At most ``max_size`` entries are kept.
+
+    ``fetch`` callables take a list of full names and return a dict of details
+    by full name; names missing from the result are left as they are.
+    """
+
+    def __init__(self, soft_ttl, hard_ttl, max_size, batch_size=50, batch_window=0.1, clock=time.monotonic):
+        self.clock = clock
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._worker = None
+        self._task = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        """Return (details, is_fresh); details is None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            stored_at, details = entry
+            age = self.clock() - stored_at
+            if age >= self.hard_ttl:
+                del self._entries[key]
+                return None, False
+            self._entries.move_to_end(key)
+            return details, age < self.soft_ttl
+
+    def prime(self, key, details):
+        with self._lock:
+            self._entries[key] = (self.clock(), details)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def prime_many(self, details_by_key):
+        for key, details in details_by_key.items():
+            self.prime(key, details)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    def _count(self, details, fresh):
+        if settings.METRICS_ENABLED:
+            metrics.count_cache('repository_details', 'miss' if details is None else 'hit' if fresh else 'stale')
+
+    def get(self, key, fetch):
+        details, fresh = self._lookup(key)
+        self._count(details, fresh)
+        if details is None:
+            fetched = fetch([key])
+            self.prime_many(fetched)
+            if key not in fetched:
+                raise LookupError(f"No details returned for {key}")
+            return fetched[key]
+        if not fresh:
+            self._schedule(key, fetch)
+        return details
+
+    async def aget(self, key, afetch):
+        details, fresh = self._lookup(key)
+        self._count(details, fresh)
+        if details is None:
+            fetched = await afetch([key])
+            self.prime_many(fetched)
+            if key not in fetched:
+                raise LookupError(f"No details returned for {key}")
+            return fetched[key]
+        if not fresh:
+            self._schedule(key, afetch)
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._arefresh())
+        return details
+
+    def _schedule(self, key, fetch):
+        with self._lock:
+            self._pending[key] = fetch
+            if self._worker is None and not iscoroutinefunction(fetch):
+                self._worker = threading.Thread(target=self._refresh, name='repository-details-refresh', daemon=True)
+                self._worker.start()
+
+    def _take_batches(self, is_async):
+        """Remove pending keys and group them by fetcher in batches"""
+        with self._lock:
+            taken = [(key, fetch) for key, fetch in self._pending.items() if iscoroutinefunction(fetch) == is_async]
+            for key, _ in taken:
+                del self._pending[key]
+        by_fetch = {}
+        for key, fetch in taken:
+            by_fetch.setdefault(fetch, []).append(key)
+        return [
+            (fetch, keys[start:start + self.batch_size])
+            for fetch, keys in by_fetch.items()
+            for start in range(0, len(keys), self.batch_size)
+        ]
+
+    def _has_pending(self, is_async):
+        return any(iscoroutinefunction(fetch) == is_async for fetch in self._pending.values())
+
+    def _refresh(self):
+        while True:
+            time.sleep(self.batch_window)
+            for fetch, keys in self._take_batches(is_async=False):
+                try:
+                    self.prime_many(fetch(keys))
+                except Exception as e:
+                    logger.warning(f"Background refresh of {len(keys)} repositories failed: {str(e)}")
+            with self._lock:
+                if not self._has_pending(is_async=False):
+                    self._worker = None
+                    return
+
+    async def _arefresh(self):
+        while True:
+            await asyncio.sleep(self.batch_window)
+            for fetch, keys in self._take_batches(is_async=True):
+                try:
+                    self.prime_many(await fetch(keys))
+                except Exception as e:
+                    logger.warning(f"Background refresh of {len(keys)} repositories failed: {str(e)}")
+            with self._lock:
+                if not self._has_pending(is_async=True):
+                    return
+
+    def wait(self, timeout=None):
+        """Wait for the background refresh thread; used by tests and commands"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+
+repository_details = RepositoryDetailsCache(
+    soft_ttl=settings.REPOSITORY_DETAILS_SOFT_TTL,
+    hard_ttl=settings.REPOSITORY_DETAILS_HARD_TTL,
+    max_size=settings.REPOSITORY_DETAILS_MAX_SIZE,
+)
@@ -26,6 +26,7 @@ class RepositoryImportForm(forms.Form):
         initial=True,
         help_text="Include repositories you collaborate on"
     )
+    progress_id = forms.UUIDField(required=False, widget=forms.HiddenInput)
 
 class RepositorySearchForm(forms.Form):
     query = forms.CharField(
@@ -34,7 +35,9 @@ class RepositorySearchForm(forms.Form):
         widget=forms.TextInput(attrs={
             'class': 'form-control',
             'placeholder': 'Search repositories...',
-            'aria-label': 'Search'
+            'aria-label': 'Search',
+            'list': 'repository-suggestions',
+            'autocomplete': 'off'
         })
     )
     private = forms.ChoiceField(
@@ -56,6 +59,18 @@ class RepositorySearchForm(forms.Form):
             'placeholder': 'Filter by organization...'
         })
     )
+    health = forms.ChoiceField(
+        required=False,
+        choices=[
+            ('', 'Any Health'),
+            ('healthy', 'Healthy'),
+            ('at_risk', 'At Risk'),
+            ('stale', 'Stale'),
+        ],
+        widget=forms.Select(attrs={
+            'class': 'form-select'
+        })
+    )
 
     def clean(self):
         cleaned_data = super().clean()
@@ -0,0 +1,54 @@
+"""
+Deferred imports for heavy third-party modules.
+
+``github``, ``git``, ``requests``, ``httpx`` and ``rich`` together add a few
+hundred milliseconds to every process start, yet most invocations (``manage.py
+check``, ``--help``, cron jobs that exit early) never touch them. Modules
+returned by ``lazy_import`` are only executed on first attribute access, and
+``lazy_attribute`` does the same for a single class or function, so existing
+``patch('repos.services.Github')`` style patch targets keep working.
+"""
+import importlib
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Return module ``name``, deferring its execution until first use"""
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class lazy_attribute:
+    """
+    Stand-in for ``from module import name`` that imports on first use.
+
+    Calling the stand-in or reading an attribute from it imports ``module``
+    and forwards to the real object.
+    """
+
+    def __init__(self, module, name):
+        self._module = module
+        self._name = name
+
+    def resolve(self):
+        return getattr(importlib.import_module(self._module), self._name)
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f'<lazy {self._module}.{self._name}>'
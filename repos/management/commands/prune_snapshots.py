@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from repos.models import RepositorySnapshot
+
+class Command(BaseCommand):
+    help = 'Downsample and expire historical repository metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--daily-days', type=int, default=90, help='Keep daily snapshots for this many days')
+        parser.add_argument('--keep-days', type=int, default=730, help='Delete snapshots older than this many days')
+
+    def handle(self, *args, **options):
+        deleted = RepositorySnapshot.downsample(daily_days=options['daily_days'], keep_days=options['keep_days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} snapshots'))
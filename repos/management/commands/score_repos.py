@@ -0,0 +1,12 @@
+import time
+from django.core.management.base import BaseCommand
+from repos.scoring import score_repositories
+
+class Command(BaseCommand):
+    help = 'Recompute repository health and staleness scores'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scored = score_repositories()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Scored {scored} repositories in {elapsed:.2f}s'))
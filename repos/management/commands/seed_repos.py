@@ -0,0 +1,150 @@
+import hashlib
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from repos.models import Repository, Branch, WindsurfSession
+from repos.versioning import bump_data_version
+
+LANGUAGES = ['Python', 'Go', 'TypeScript', 'JavaScript', 'Rust', 'Java', 'Ruby', None]
+ORGANIZATIONS = ['platform', 'web', 'data', 'infra', None, None]
+WORDS = ['api', 'service', 'client', 'worker', 'dashboard', 'sdk', 'cli', 'docs', 'infra', 'pipeline']
+
+
+def _sha(*parts):
+    return hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def insert(model, objects, batch_size):
+    """
+    Insert unsaved ``objects`` as fast as the database allows: COPY on
+    PostgreSQL, ``bulk_create`` elsewhere. Returns the number inserted.
+
+    COPY keeps explicit values of ``auto_now_add`` fields, so generated
+    histories keep their timestamps; ``bulk_create`` overwrites them.
+    """
+    if connection.vendor != 'postgresql':
+        inserted = 0
+        for batch in _batched(objects, batch_size):
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            inserted += len(batch)
+        return inserted
+
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    inserted = 0
+    with connection.cursor() as cursor:
+        with cursor.copy(f'COPY {model._meta.db_table} ({columns}) FROM STDIN') as copy:
+            for obj in objects:
+                copy.write_row([
+                    field.get_db_prep_save(field.pre_save(obj, add=False), connection) for field in fields
+                ])
+                inserted += 1
+    return inserted
+
+
+class Command(BaseCommand):
+    help = 'Seed large synthetic datasets of repositories, branches and sessions for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repositories', type=int, default=100_000)
+        parser.add_argument('--branches', type=int, default=2_000_000, help='Total branches, spread evenly')
+        parser.add_argument('--sessions', type=int, default=500_000, help='Total ended sessions, spread evenly')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for repeatable datasets')
+        parser.add_argument('--clear', action='store_true', help='Delete all repositories first')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        repositories = options['repositories']
+        if not repositories:
+            return
+        branches_per_repository = max(options['branches'] // repositories, 1)
+        sessions_per_repository = options['sessions'] // repositories
+        now = timezone.now()
+
+        with transaction.atomic():
+            if options['clear']:
+                Repository.objects.all().delete()
+            # Continue after any existing rows so the command can be run repeatedly
+            first_id = (Repository.objects.order_by('-github_id').values_list('github_id', flat=True).first() or 0) + 1
+            github_ids = range(first_id, first_id + repositories)
+
+            def repository(github_id):
+                name = f'{rng.choice(WORDS)}-{rng.choice(WORDS)}-{github_id}'
+                owner = rng.choice(ORGANIZATIONS)
+                pushed_at = now - timedelta(days=rng.expovariate(1 / 120))
+                return Repository(
+                    github_id=github_id,
+                    name=name,
+                    full_name=f"{owner or 'seed'}/{name}",
+                    description=f'Seeded {rng.choice(WORDS)} repository',
+                    url=f"https://github.com/{owner or 'seed'}/{name}",
+                    private=rng.random() < 0.3,
+                    fork=rng.random() < 0.1,
+                    created_at=pushed_at - timedelta(days=rng.randint(0, 2000)),
+                    pushed_at=pushed_at,
+                    size=int(rng.lognormvariate(8, 2)),
+                    language=rng.choice(LANGUAGES),
+                    organization=owner,
+                    branch_count=branches_per_repository,
+                    default_branch_sha=_sha(github_id, 0),
+                    branch_freshness_at=now,
+                    session_count=sessions_per_repository,
+                    last_session_at=now - timedelta(days=1) if sessions_per_repository else None,
+                )
+
+            self.stdout.write(f'Inserting {repositories} repositories...')
+            insert(Repository, (repository(github_id) for github_id in github_ids), batch_size)
+            pks = list(
+                Repository.objects.filter(github_id__gte=first_id).order_by('github_id').values_list('pk', flat=True)
+            )
+
+            def branches():
+                for pk, github_id in zip(pks, github_ids):
+                    for number in range(branches_per_repository):
+                        yield Branch(
+                            repository_id=pk,
+                            name='main' if number == 0 else f'feature/{rng.choice(WORDS)}-{number}',
+                            is_default=number == 0,
+                            last_commit_sha=_sha(github_id, number),
+                            last_commit_message=f'Update {rng.choice(WORDS)}',
+                        )
+
+            self.stdout.write(f'Inserting {len(pks) * branches_per_repository} branches...')
+            insert(Branch, branches(), batch_size)
+
+            def sessions():
+                for pk in pks:
+                    for number in range(sessions_per_repository, 0, -1):
+                        start_time = now - timedelta(days=number, minutes=rng.randint(0, 600))
+                        yield WindsurfSession(
+                            repository_id=pk,
+                            start_time=start_time,
+                            end_time=start_time + timedelta(minutes=rng.randint(5, 240)),
+                            active=False,
+                            last_file_accessed=f'src/{rng.choice(WORDS)}.py',
+                            notes='',
+                        )
+
+            self.stdout.write(f'Inserting {len(pks) * sessions_per_repository} sessions...')
+            insert(WindsurfSession, sessions(), batch_size)
+
+        # Neither COPY nor bulk_create sends post_save signals
+        bump_data_version()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(pks)} repositories, {len(pks) * branches_per_repository} branches and '
+            f'{len(pks) * sessions_per_repository} sessions in {elapsed:.1f}s'
+        ))
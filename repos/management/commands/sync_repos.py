@@ -1,7 +1,5 @@
 from django.core.management.base import BaseCommand
 from repos.services import GitHubService
-from rich.console import Console
-from rich.table import Table
 
 class Command(BaseCommand):
     help = 'Synchronize GitHub repositories'
@@ -10,12 +8,19 @@ class Command(BaseCommand):
         parser.add_argument('--username', type=str, help='GitHub username to sync repositories from')
 
     def handle(self, *args, **options):
+        # Imported here so that --help and command discovery stay fast
+        from rich.console import Console
+        from rich.table import Table
+        from repos.scoring import score_repositories
+
         console = Console()
         
         with console.status("[bold green]Syncing repositories...") as status:
             service = GitHubService()
             try:
-                repos = service.sync_repositories(username=options.get('username'))
+                repos = service.sync_repositories(username=options.get('username'), trigger='command')
+                status.update("[bold green]Scoring repositories...")
+                score_repositories()
                 
                 # Create table for output
                 table = Table(show_header=True, header_style="bold magenta")
@@ -23,13 +28,15 @@ class Command(BaseCommand):
                 table.add_column("URL")
                 table.add_column("Private")
                 table.add_column("Branches")
+                table.add_column("Head")
                 
                 for repo in repos:
                     table.add_row(
                         repo.name,
                         repo.url,
                         "✓" if repo.private else "✗",
-                        str(repo.branches.count())
+                        str(repo.branch_count),
+                        repo.default_branch_sha[:7]
                     )
                 
                 console.print("\n[bold green]Successfully synced repositories![/bold green]")
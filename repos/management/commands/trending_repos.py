@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from repos.models import Repository, RepositorySnapshot
+
+class Command(BaseCommand):
+    help = 'Show the fastest-growing repositories from recorded metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--metric', choices=RepositorySnapshot.METRICS, default='stars', help='Metric to rank by')
+        parser.add_argument('--days', type=int, default=30, help='Length of the window in days')
+        parser.add_argument('--limit', type=int, default=10, help='Number of repositories to show')
+
+    def handle(self, *args, **options):
+        from rich.console import Console
+        from rich.table import Table
+
+        metric = options['metric']
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Repository")
+        table.add_column(f"{metric} then", justify="right")
+        table.add_column(f"{metric} now", justify="right")
+        table.add_column("Growth", justify="right")
+
+        for repo in Repository.fastest_growing(metric=metric, days=options['days'], limit=options['limit']):
+            table.add_row(repo.full_name, str(repo.metric_start), str(repo.metric_end), f"{repo.growth:+d}")
+
+        Console().print(table)
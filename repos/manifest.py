@@ -0,0 +1,88 @@
+"""
+Repository manifests for bulk creation (``cli.py create-repos --from``).
+
+A manifest is a YAML file listing the repositories to create, with optional
+defaults and an optional organization that owns them all::
+
+    organization: my-team        # omit to create under the token owner
+    defaults:
+      private: true
+      auto_init: true
+    repositories:
+      - name: api
+        description: Public API
+        has_wiki: false
+      - web                      # a bare name takes the defaults
+"""
+import re
+
+from .lazy import lazy_import
+
+yaml = lazy_import('yaml')
+
+# Keys passed through to GitHub's create repository endpoint
+REPOSITORY_KEYS = (
+    'name', 'description', 'homepage', 'private', 'auto_init', 'has_issues',
+    'has_projects', 'has_wiki', 'is_template', 'gitignore_template', 'license_template',
+)
+BUILTIN_DEFAULTS = {'private': False, 'auto_init': True}
+NAME = re.compile(r'^[A-Za-z0-9._-]{1,100}$')
+
+
+def parse_manifest(data):
+    """
+    Validate a loaded manifest and return ``(organization, specs)``.
+
+    Each spec is a dict of REPOSITORY_KEYS with the defaults applied.
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Manifest must be a mapping with a 'repositories' list")
+    unknown = set(data) - {'organization', 'defaults', 'repositories'}
+    if unknown:
+        raise ValueError(f"Unknown manifest keys: {', '.join(sorted(unknown))}")
+
+    defaults = {**BUILTIN_DEFAULTS, **(data.get('defaults') or {})}
+    _check_keys(defaults, 'defaults')
+    if 'name' in defaults:
+        raise ValueError("'defaults' cannot set a name")
+
+    entries = data.get('repositories') or []
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("Manifest lists no repositories")
+
+    specs = []
+    seen = set()
+    for number, entry in enumerate(entries, start=1):
+        if isinstance(entry, str):
+            entry = {'name': entry}
+        if not isinstance(entry, dict):
+            raise ValueError(f"Repository #{number} must be a name or a mapping")
+        _check_keys(entry, f"repository #{number}")
+
+        name = str(entry.get('name') or '')
+        if not NAME.match(name) or name in ('.', '..'):
+            raise ValueError(f"Repository #{number} has an invalid name: {name!r}")
+        # GitHub repository names are case-insensitive
+        if name.lower() in seen:
+            raise ValueError(f"Repository {name} is listed more than once")
+        seen.add(name.lower())
+        specs.append({**defaults, **entry, 'name': name})
+
+    return data.get('organization') or None, specs
+
+
+def load_manifest(path):
+    """Read and validate the manifest at ``path``; see ``parse_manifest``"""
+    with open(path, encoding='utf-8') as manifest:
+        try:
+            data = yaml.safe_load(manifest)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML in {path}: {e}")
+    return parse_manifest(data)
+
+
+def _check_keys(mapping, where):
+    unknown = set(mapping) - set(REPOSITORY_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown keys in {where}: {', '.join(sorted(unknown))}")
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def backfill_session_state(apps, schema_editor):
+    Repository = apps.get_model('repos', 'Repository')
+    WindsurfSession = apps.get_model('repos', 'WindsurfSession')
+
+    # Keep only the newest active session per repository so the partial
+    # unique constraint below can be created.
+    seen = set()
+    stale = []
+    for session_id, repository_id, start_time in (
+        WindsurfSession.objects.filter(active=True)
+        .order_by('repository_id', '-start_time', '-id')
+        .values_list('id', 'repository_id', 'start_time')
+    ):
+        if repository_id in seen:
+            stale.append(session_id)
+        else:
+            seen.add(repository_id)
+    if stale:
+        WindsurfSession.objects.filter(id__in=stale).update(active=False, end_time=models.F('start_time'))
+
+    stats = WindsurfSession.objects.values('repository_id').annotate(total=Count('id'), latest=Max('start_time'))
+    for row in stats:
+        Repository.objects.filter(pk=row['repository_id']).update(
+            session_count=row['total'],
+            last_session_at=row['latest'],
+        )
+    for session_id, repository_id in WindsurfSession.objects.filter(active=True).values_list('id', 'repository_id'):
+        Repository.objects.filter(pk=repository_id).update(active_session_id=session_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repos', '0005_repository_repos_repos_updated_a26900_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='active_session',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='repos.windsurfsession'),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='last_session_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='session_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_session_state, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='windsurfsession',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True)), fields=('repository',), name='repos_one_active_session_per_repository'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:39
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_branch_state(apps, schema_editor):
+    Repository = apps.get_model('repos', 'Repository')
+    Branch = apps.get_model('repos', 'Branch')
+
+    stats = Branch.objects.values('repository_id').annotate(
+        count=Count('id'),
+        sha=Max('last_commit_sha', filter=Q(is_default=True)),
+        freshness=Max('updated_at'),
+    )
+    for row in stats:
+        Repository.objects.filter(pk=row['repository_id']).update(
+            branch_count=row['count'],
+            default_branch_sha=row['sha'] or '',
+            branch_freshness_at=row['freshness'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repos', '0006_repository_session_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='branch_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='branch_freshness_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='default_branch_sha',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.RunPython(backfill_branch_state, migrations.RunPython.noop),
+    ]
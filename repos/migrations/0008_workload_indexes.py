@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# icontains compiles to UPPER(column::text) LIKE UPPER(%s) on PostgreSQL; a
+# trigram index on the same expression lets the search use a bitmap scan.
+TRIGRAM_COLUMNS = ('name', 'description', 'organization')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS repos_repo_{column}_trgm_idx ON repos_repository '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS repos_repo_{column}_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repos', '0007_repository_branch_state'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='branch',
+            index=models.Index(fields=['repository', '-is_default', 'name'], name='repos_branch_default_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repository',
+            index=models.Index(fields=['private', '-updated_at'], name='repos_repo_private_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repository',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='repos_repo_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='windsurfsession',
+            index=models.Index(fields=['repository', '-start_time'], name='repos_session_history_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
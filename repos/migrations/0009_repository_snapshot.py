@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repos', '0008_workload_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('captured_on', models.DateField(default=django.utils.timezone.localdate)),
+                ('stars', models.PositiveIntegerField(default=0)),
+                ('forks', models.PositiveIntegerField(default=0)),
+                ('open_issues', models.PositiveIntegerField(default=0)),
+                ('watchers', models.PositiveIntegerField(default=0)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('branch_count', models.PositiveIntegerField(default=0)),
+                ('repository', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='repos.repository')),
+            ],
+            options={
+                'ordering': ['-captured_on'],
+                'indexes': [models.Index(fields=['captured_on'], name='repos_repos_capture_a5ac95_idx')],
+                'constraints': [models.UniqueConstraint(fields=('repository', 'captured_on'), name='repos_one_snapshot_per_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repos', '0009_repository_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repository',
+            name='health_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repository',
+            name='staleness_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='repository',
+            index=models.Index(fields=['health_score'], name='repos_repo_health_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repository',
+            index=models.Index(fields=['staleness_score'], name='repos_repo_staleness_idx'),
+        ),
+    ]
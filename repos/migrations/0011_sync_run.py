@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repos', '0010_repository_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=10)),
+                ('trigger', models.CharField(blank=True, help_text='What started the sync, e.g. "command" or "web"', max_length=20)),
+                ('repositories', models.PositiveIntegerField(default=0)),
+                ('api_calls', models.PositiveIntegerField(default=0)),
+                ('api_calls_by_endpoint', models.JSONField(blank=True, default=dict)),
+                ('bytes_received', models.BigIntegerField(default=0)),
+                ('rate_limit_used', models.PositiveIntegerField(default=0)),
+                ('not_modified', models.PositiveIntegerField(default=0, help_text='Conditional requests answered with 304')),
+                ('rows_inserted', models.PositiveIntegerField(default=0)),
+                ('rows_updated', models.PositiveIntegerField(default=0)),
+                ('rows_deleted', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('stage_seconds', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['started_at'], name='repos_syncr_started_63845d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repos', '0011_sync_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('kind', models.CharField(choices=[('request', 'Slow request'), ('sync', 'Sync')], max_length=10)),
+                ('method', models.CharField(blank=True, max_length=10)),
+                ('path', models.TextField(blank=True)),
+                ('view_name', models.CharField(blank=True, max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('duration', models.FloatField(help_text='Wall time in seconds')),
+                ('cpu_seconds', models.FloatField(default=0, help_text='CPU time of the thread that did the work')),
+                ('query_count', models.PositiveIntegerField(default=0)),
+                ('query_seconds', models.FloatField(default=0)),
+                ('samples', models.PositiveIntegerField(default=0, help_text='Stack samples taken, for request profiles')),
+                ('data', models.BinaryField()),
+                ('sync_run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='profiles', to='repos.syncrun')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='repos_profi_created_4dd51d_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models.functions import Lower, RowNumber, TruncWeek
 from django.utils import timezone
 
 # Create your models here.
@@ -20,8 +23,22 @@ class Repository(models.Model):
     organization = models.CharField(max_length=255, null=True, blank=True)
     last_synced = models.DateTimeField(null=True, blank=True)
     local_path = models.CharField(max_length=512, null=True, blank=True)
-    _cached_active_session = None
-    _cached_has_sessions = None
+    # Session state maintained by start_session()/WindsurfSession.end_session()
+    # so list and detail pages never have to query the sessions table.
+    active_session = models.ForeignKey(
+        'WindsurfSession', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    session_count = models.PositiveIntegerField(default=0)
+    last_session_at = models.DateTimeField(null=True, blank=True)
+    # Branch summary maintained by refresh_branch_state() after each branch
+    # sync so pages can show and sort by it without joining branches.
+    branch_count = models.PositiveIntegerField(default=0)
+    default_branch_sha = models.CharField(max_length=40, blank=True, default='')
+    branch_freshness_at = models.DateTimeField(null=True, blank=True)
+    # Written in bulk by repos.scoring.score_repositories()
+    health_score = models.FloatField(null=True, blank=True)
+    staleness_score = models.FloatField(null=True, blank=True)
+    scored_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name_plural = "repositories"
@@ -30,6 +47,14 @@ class Repository(models.Model):
             models.Index(fields=['updated_at']),
             models.Index(fields=['organization']),
             models.Index(fields=['language']),
+            # List page: private filter with the default newest-first sort
+            models.Index(fields=['private', '-updated_at'], name='repos_repo_private_updated_idx'),
+            # Case-insensitive name sort on the list page
+            models.Index(Lower('name'), name='repos_repo_lower_name_idx'),
+            models.Index(fields=['health_score'], name='repos_repo_health_idx'),
+            models.Index(fields=['staleness_score'], name='repos_repo_staleness_idx'),
+            # The icontains search is served by trigram indexes that only
+            # exist on PostgreSQL, see migration 0008.
         ]
 
     def __str__(self):
@@ -40,30 +65,57 @@ class Repository(models.Model):
             self.full_name = self.name  # Set full_name if not provided
         super().save(*args, **kwargs)
 
-    @property
-    def active_session(self):
-        if self._cached_active_session is None:
-            from django.db.models import Q
-            from .models import WindsurfSession
-            
-            self._cached_active_session = self.sessions.filter(active=True).select_related('branch').first()
-            print(f"Repository {self.name}: Active Session = {self._cached_active_session}")
-            print(f"Total Sessions: {self.sessions.count()}")
-        
-        return self._cached_active_session
-
     @property
     def has_sessions(self):
-        if self._cached_has_sessions is None:
-            self._cached_has_sessions = self.sessions.exists()
-            print(f"Repository {self.name}: Has Sessions = {self._cached_has_sessions}")
-        
-        return self._cached_has_sessions
+        return self.session_count > 0
 
-    def refresh_from_db(self, *args, **kwargs):
-        super().refresh_from_db(*args, **kwargs)
-        self._cached_active_session = None
-        self._cached_has_sessions = None
+    def start_session(self, **fields):
+        """
+        End the active session, if any, and start a new one.
+
+        The repository row is locked for the duration so concurrent starts
+        serialize, and the session counters are updated in the same
+        transaction as the sessions themselves.
+        """
+        with transaction.atomic():
+            session_count = Repository.objects.select_for_update().values_list(
+                'session_count', flat=True
+            ).get(pk=self.pk) + 1
+            WindsurfSession.objects.filter(repository_id=self.pk, active=True).update(
+                active=False,
+                end_time=timezone.now()
+            )
+            session = WindsurfSession.objects.create(repository=self, **fields)
+            Repository.objects.filter(pk=self.pk).update(
+                active_session=session,
+                session_count=session_count,
+                last_session_at=session.start_time
+            )
+        self.active_session = session
+        self.session_count = session_count
+        self.last_session_at = session.start_time
+        return session
+
+    def refresh_branch_state(self):
+        """
+        Recompute the branch summary from the branches table.
+
+        Call this inside the transaction that reconciles the branches so the
+        summary never disagrees with the rows it describes.
+        """
+        state = self.branches.aggregate(
+            count=models.Count('id'),
+            sha=models.Max('last_commit_sha', filter=models.Q(is_default=True)),
+            freshness=models.Max('updated_at'),
+        )
+        self.branch_count = state['count']
+        self.default_branch_sha = state['sha'] or ''
+        self.branch_freshness_at = state['freshness']
+        Repository.objects.filter(pk=self.pk).update(
+            branch_count=self.branch_count,
+            default_branch_sha=self.default_branch_sha,
+            branch_freshness_at=self.branch_freshness_at
+        )
 
     @classmethod
     def search(cls, query=None, private=None, organization=None, language=None):
@@ -105,6 +157,28 @@ class Repository(models.Model):
         
         return queryset.distinct()
 
+    @classmethod
+    def fastest_growing(cls, metric='stars', days=30, limit=10):
+        """
+        Repositories with the largest increase in ``metric`` over the last
+        ``days`` days, measured between their first and last snapshot in that
+        window. Each result is annotated with ``metric_start``,
+        ``metric_end`` and ``growth``.
+        """
+        if metric not in RepositorySnapshot.METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        since = timezone.localdate() - timedelta(days=days)
+        window = RepositorySnapshot.objects.filter(repository=models.OuterRef('pk'), captured_on__gte=since)
+        return (
+            cls.objects.annotate(
+                metric_start=models.Subquery(window.order_by('captured_on').values(metric)[:1]),
+                metric_end=models.Subquery(window.order_by('-captured_on').values(metric)[:1]),
+            )
+            .filter(metric_start__isnull=False)
+            .annotate(growth=models.F('metric_end') - models.F('metric_start'))
+            .order_by('-growth', 'name')[:limit]
+        )
+
 class Branch(models.Model):
     repository = models.ForeignKey(Repository, on_delete=models.CASCADE, related_name='branches')
     name = models.CharField(max_length=255)
@@ -117,6 +191,10 @@ class Branch(models.Model):
         verbose_name_plural = "branches"
         ordering = ['-updated_at']
         unique_together = ['repository', 'name']
+        indexes = [
+            # Default-branch lookups and the detail page's branch ordering
+            models.Index(fields=['repository', '-is_default', 'name'], name='repos_branch_default_idx'),
+        ]
 
     def __str__(self):
         return f"{self.repository.name}/{self.name}"
@@ -136,6 +214,18 @@ class WindsurfSession(models.Model):
 
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['repository', '-start_time'], name='repos_session_history_idx'),
+        ]
+        # The partial unique constraint doubles as the (repository) WHERE
+        # active index for active-session lookups.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['repository'],
+                condition=models.Q(active=True),
+                name='repos_one_active_session_per_repository',
+            ),
+        ]
 
     def __str__(self):
         duration = ""
@@ -153,6 +243,181 @@ class WindsurfSession(models.Model):
         self.save()
     
     def end_session(self):
-        self.end_time = timezone.now()
-        self.active = False
+        with transaction.atomic():
+            self.end_time = timezone.now()
+            self.active = False
+            self.save()
+            # last_session_at moves too, so the detail page's Last-Modified
+            # changes; updated_at is left alone, it orders the list.
+            Repository.objects.filter(pk=self.repository_id).update(
+                active_session=models.Case(
+                    models.When(active_session=self, then=None), default=models.F('active_session')
+                ),
+                last_session_at=self.end_time,
+            )
+
+class RepositorySnapshot(models.Model):
+    """
+    Daily metrics for a repository, appended by the sync from data it has
+    already fetched. Re-syncing on the same day overwrites that day's row.
+    """
+    METRICS = ('stars', 'forks', 'open_issues', 'watchers', 'size', 'branch_count')
+
+    repository = models.ForeignKey(Repository, on_delete=models.CASCADE, related_name='snapshots')
+    captured_on = models.DateField(default=timezone.localdate)
+    stars = models.PositiveIntegerField(default=0)
+    forks = models.PositiveIntegerField(default=0)
+    open_issues = models.PositiveIntegerField(default=0)
+    watchers = models.PositiveIntegerField(default=0)
+    size = models.PositiveIntegerField(default=0)
+    branch_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-captured_on']
+        constraints = [
+            models.UniqueConstraint(fields=['repository', 'captured_on'], name='repos_one_snapshot_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['captured_on']),
+        ]
+
+    def __str__(self):
+        return f"{self.repository.name} on {self.captured_on}"
+
+    @classmethod
+    def record(cls, snapshots, batch_size=1000):
+        """Insert snapshots in bulk, replacing any already taken that day"""
+        return cls.objects.bulk_create(
+            snapshots,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['repository', 'captured_on'],
+            update_fields=list(cls.METRICS),
+        )
+
+    @classmethod
+    def downsample(cls, daily_days=90, keep_days=730):
+        """
+        Thin out old snapshots: keep every day for ``daily_days``, then only
+        the last snapshot of each week, and nothing older than ``keep_days``.
+
+        Returns the number of rows deleted.
+        """
+        today = timezone.localdate()
+        expired, _ = cls.objects.filter(captured_on__lt=today - timedelta(days=keep_days)).delete()
+
+        ranked = cls.objects.filter(captured_on__lt=today - timedelta(days=daily_days)).annotate(
+            rank=models.Window(
+                RowNumber(),
+                partition_by=[models.F('repository'), TruncWeek('captured_on')],
+                order_by=models.F('captured_on').desc(),
+            )
+        )
+        redundant = list(ranked.filter(rank__gt=1).values_list('pk', flat=True))
+        thinned = 0
+        for start in range(0, len(redundant), 1000):
+            deleted, _ = cls.objects.filter(pk__in=redundant[start:start + 1000]).delete()
+            thinned += deleted
+        return expired + thinned
+
+class SyncRun(models.Model):
+    """
+    What one repository sync cost: API calls, transfer, rate limit, rows
+    written, errors and time per stage. Filled from a
+    ``repos.telemetry.SyncTelemetry`` when the sync finishes.
+    """
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    trigger = models.CharField(max_length=20, blank=True, help_text='What started the sync, e.g. "command" or "web"')
+    repositories = models.PositiveIntegerField(default=0)
+    api_calls = models.PositiveIntegerField(default=0)
+    api_calls_by_endpoint = models.JSONField(default=dict, blank=True)
+    bytes_received = models.BigIntegerField(default=0)
+    rate_limit_used = models.PositiveIntegerField(default=0)
+    not_modified = models.PositiveIntegerField(default=0, help_text='Conditional requests answered with 304')
+    rows_inserted = models.PositiveIntegerField(default=0)
+    rows_updated = models.PositiveIntegerField(default=0)
+    rows_deleted = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    stage_seconds = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['started_at']),
+        ]
+
+    def __str__(self):
+        return f"Sync {self.pk} at {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+    @property
+    def duration(self):
+        """Wall time in seconds, or None while the sync is running"""
+        if self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
+
+    def finish(self, telemetry, status, repositories=0):
+        self.finished_at = timezone.now()
+        self.status = status
+        self.repositories = repositories
+        self.api_calls = sum(telemetry.api_calls.values())
+        self.api_calls_by_endpoint = dict(telemetry.api_calls)
+        self.bytes_received = telemetry.bytes_received
+        self.rate_limit_used = telemetry.rate_limit_used
+        self.not_modified = telemetry.not_modified
+        self.rows_inserted = telemetry.rows['inserted']
+        self.rows_updated = telemetry.rows['updated']
+        self.rows_deleted = telemetry.rows['deleted']
+        self.error_count = telemetry.error_count
+        self.errors = telemetry.errors
+        self.stage_seconds = {stage: round(seconds, 3) for stage, seconds in telemetry.stages.items()}
         self.save()
+
+
+class Profile(models.Model):
+    """
+    A profile of a slow request or of a sampled sync (see
+    ``repomgr.profiling``). Request profiles hold stack samples in the
+    collapsed format read by flamegraph.pl and speedscope, sync profiles
+    cProfile stats as written by ``pstats``.
+    """
+    REQUEST = 'request'
+    SYNC = 'sync'
+    KIND_CHOICES = [(REQUEST, 'Slow request'), (SYNC, 'Sync')]
+
+    created_at = models.DateTimeField(default=timezone.now)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    method = models.CharField(max_length=10, blank=True)
+    path = models.TextField(blank=True)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    sync_run = models.ForeignKey(SyncRun, on_delete=models.CASCADE, null=True, blank=True, related_name='profiles')
+    duration = models.FloatField(help_text='Wall time in seconds')
+    cpu_seconds = models.FloatField(default=0, help_text='CPU time of the thread that did the work')
+    query_count = models.PositiveIntegerField(default=0)
+    query_seconds = models.FloatField(default=0)
+    samples = models.PositiveIntegerField(default=0, help_text='Stack samples taken, for request profiles')
+    data = models.BinaryField()
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        if self.kind == self.SYNC:
+            return f"Profile of sync {self.sync_run_id} ({self.duration:.1f}s)"
+        return f"Profile of {self.method} {self.path} ({self.duration:.1f}s)"
+
+    @property
+    def filename(self):
+        return f"profile-{self.pk}.{'prof' if self.kind == self.SYNC else 'txt'}"
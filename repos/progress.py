@@ -0,0 +1,84 @@
+import time
+
+from django.core.cache import cache
+
+PROGRESS_TIMEOUT = 60 * 60
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+
+class ImportProgress:
+    """
+    Progress counters for a single import, shared through the cache.
+
+    The sync process appends events with ``emit()``; readers such as the
+    Server-Sent Events view poll ``events()`` with the last id they have seen.
+    Each event is stored under its own key so that emitting stays O(1) no
+    matter how long the import runs.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = str(job_id)
+        self.prefix = f'repos:import-progress:{self.job_id}'
+        self.status_key = f'{self.prefix}:status'
+        self.seq_key = f'{self.prefix}:seq'
+
+    def _event_key(self, seq):
+        return f'{self.prefix}:event:{seq}'
+
+    def start(self):
+        """
+        Claim the job id for a new import run.
+
+        Returns False if an import with this id is running or has finished;
+        a failed import may be started again, once per failure, and keeps its
+        event sequence.
+        """
+        running = {'status': RUNNING, 'message': ''}
+        if cache.add(self.status_key, running, PROGRESS_TIMEOUT):
+            cache.set(self.seq_key, 0, PROGRESS_TIMEOUT)
+            return True
+        state = self.status()
+        if not state or state['status'] != FAILED:
+            return False
+        # Concurrent restarts all read the same failure; only one claims it
+        if not cache.add(f"{self.prefix}:restart:{state.get('failure')}", True, PROGRESS_TIMEOUT):
+            return False
+        cache.set(self.status_key, running, PROGRESS_TIMEOUT)
+        return True
+
+    def emit(self, message, **data):
+        try:
+            seq = cache.incr(self.seq_key)
+        except ValueError:
+            seq = 1
+            cache.set(self.seq_key, seq, PROGRESS_TIMEOUT)
+        cache.set(self._event_key(seq), dict(data, id=seq, message=message, time=time.time()), PROGRESS_TIMEOUT)
+        return seq
+
+    def finish(self, message):
+        self.emit(message)
+        cache.set(self.status_key, {'status': FINISHED, 'message': message}, PROGRESS_TIMEOUT)
+
+    def fail(self, message):
+        seq = self.emit(message)
+        cache.set(self.status_key, {'status': FAILED, 'message': message, 'failure': seq}, PROGRESS_TIMEOUT)
+
+    def status(self):
+        return cache.get(self.status_key)
+
+    def events(self, after=0):
+        last = cache.get(self.seq_key) or 0
+        keys = [self._event_key(seq) for seq in range(after + 1, last + 1)]
+        found = cache.get_many(keys)
+        return [found[key] for key in keys if key in found]
+
+    async def astatus(self):
+        return await cache.aget(self.status_key)
+
+    async def aevents(self, after=0):
+        last = await cache.aget(self.seq_key) or 0
+        keys = [self._event_key(seq) for seq in range(after + 1, last + 1)]
+        found = await cache.aget_many(keys)
+        return [found[key] for key in keys if key in found]
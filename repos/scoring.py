@@ -0,0 +1,111 @@
+"""
+Batch health and staleness scoring for repositories.
+
+All repositories are loaded into NumPy arrays in one pass, scored with
+vectorized arithmetic and written back with ``bulk_update``, so scoring
+thousands of repositories takes a handful of queries and no per-row Python.
+
+Scores
+------
+``staleness_score``
+    0 (just pushed) to 1 (abandoned): ``1 - 0.5 ** (days_since_push / half_life)``.
+``health_score``
+    0 to 100: a weighted mix of push recency, session recency and branch
+    activity, reduced for very large repositories and for forks.
+
+Weights and thresholds come from ``settings.REPOSITORY_SCORING``.
+"""
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Repository
+from .versioning import bump_data_version
+
+FEATURE_FIELDS = (
+    'pk', 'size', 'pushed_at', 'updated_at', 'fork', 'branch_count', 'last_session_at',
+)
+SECONDS_PER_DAY = 86400.0
+
+
+def _days_since(timestamps, now):
+    """Days between ``now`` and each POSIX timestamp; NaN where missing"""
+    return (now.timestamp() - timestamps) / SECONDS_PER_DAY
+
+
+def load_features(queryset):
+    """Read the scoring inputs for ``queryset`` into a dict of NumPy arrays"""
+    rows = list(queryset.order_by().values_list(*FEATURE_FIELDS).iterator(chunk_size=5000))
+    count = len(rows)
+
+    def column(index, dtype, convert=None):
+        values = (row[index] for row in rows)
+        if convert is not None:
+            values = map(convert, values)
+        return np.fromiter(values, dtype=dtype, count=count)
+
+    def timestamp(value):
+        return value.timestamp() if value is not None else np.nan
+
+    return {
+        'pk': column(0, np.int64),
+        'size': column(1, np.float64),
+        'pushed_at': column(2, np.float64, timestamp),
+        'updated_at': column(3, np.float64, timestamp),
+        'fork': column(4, np.bool_),
+        'branch_count': column(5, np.float64),
+        'last_session_at': column(6, np.float64, timestamp),
+    }
+
+
+def compute_scores(features, now=None, config=None):
+    """
+    Compute ``(health, staleness)`` arrays for the given feature arrays.
+
+    Repositories that were never pushed fall back to their last update time.
+    """
+    config = {**settings.REPOSITORY_SCORING, **(config or {})}
+    now = now or timezone.now()
+
+    pushed = np.where(np.isnan(features['pushed_at']), features['updated_at'], features['pushed_at'])
+    days_since_push = np.clip(_days_since(pushed, now), 0, None)
+    days_since_session = np.clip(_days_since(features['last_session_at'], now), 0, None)
+
+    staleness = 1.0 - np.exp2(-days_since_push / config['stale_half_life_days'])
+
+    activity = np.exp2(-days_since_push / config['activity_half_life_days'])
+    # Never-used repositories have NaN here and contribute nothing
+    sessions = np.nan_to_num(np.exp2(-days_since_session / config['session_half_life_days']), nan=0.0)
+    branches = np.clip(np.log1p(features['branch_count']) / np.log1p(config['branch_cap']), 0, 1)
+
+    weights = np.array([config['activity_weight'], config['session_weight'], config['branch_weight']])
+    health = np.stack([activity, sessions, branches]).T @ weights / weights.sum()
+
+    # Every factor of ten above the size threshold costs size_penalty
+    oversize = np.clip(np.log10(np.maximum(features['size'], 1) / config['huge_size_kb']), 0, None)
+    health *= np.clip(1.0 - config['size_penalty'] * oversize, 0, 1)
+    health *= np.where(features['fork'], config['fork_factor'], 1.0)
+
+    return np.round(health * 100, 2), np.round(staleness, 4)
+
+
+def score_repositories(queryset=None, now=None, config=None, batch_size=1000):
+    """Score ``queryset`` (all repositories by default) and save the results"""
+    queryset = Repository.objects.all() if queryset is None else queryset
+    now = now or timezone.now()
+
+    features = load_features(queryset)
+    if not len(features['pk']):
+        return 0
+    health, staleness = compute_scores(features, now=now, config=config)
+
+    repositories = [
+        Repository(pk=pk, health_score=health_score, staleness_score=staleness_score, scored_at=now)
+        for pk, health_score, staleness_score in zip(features['pk'].tolist(), health.tolist(), staleness.tolist())
+    ]
+    Repository.objects.bulk_update(
+        repositories, ['health_score', 'staleness_score', 'scored_at'], batch_size=batch_size
+    )
+    # bulk_update sends no post_save signals
+    bump_data_version()
+    return len(repositories)
@@ -1,16 +1,166 @@
-from github import Github
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from .models import Repository, Branch
+from repomgr.profiling import profile_sync
+from .details_cache import details_from_graphql, details_from_rest, details_query, repository_details
+from .lazy import lazy_attribute, lazy_import
+from .models import Repository, Branch, RepositorySnapshot, SyncRun
+from .telemetry import SyncTelemetry
+from .versioning import bump_data_version
 import logging
 import os
 import shutil
-import requests
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qs, urlparse
 
 logger = logging.getLogger(__name__)
 
+Github = lazy_attribute('github', 'Github')
+transport = lazy_import('repos.transport')
+
+def remove_local_checkout(repository):
+    """Remove the local folder of a repository if it exists"""
+    local_paths_to_check = [
+        repository.local_path,  # Path from database
+        os.path.join(settings.LOCAL_REPOS_DIR, repository.name),  # Default local repos directory
+        os.path.join(settings.BASE_DIR, 'local_repos', repository.name)  # Alternative local repos path
+    ]
+    
+    for local_path in local_paths_to_check:
+        if not local_path:
+            continue
+        
+        logger.info(f"Checking local path for deletion: {local_path}")
+        
+        try:
+            # Ensure we're not trying to delete something outside the intended directory
+            base_github_dir = os.path.dirname(settings.BASE_DIR)
+            if not local_path.startswith(base_github_dir):
+                logger.warning(f"Local path {local_path} is not within {base_github_dir}. Skipping deletion.")
+                continue
+            
+            if not os.path.exists(local_path):
+                logger.warning(f"Local folder does not exist: {local_path}")
+                continue
+            
+            # Check if it's a directory
+            if not os.path.isdir(local_path):
+                logger.warning(f"Local path is not a directory: {local_path}")
+                continue
+            
+            # Detailed directory contents logging
+            logger.info(f"Directory contents of {local_path}:")
+            for item in os.listdir(local_path):
+                logger.info(f"  - {item}")
+            
+            # Use shutil to remove the entire directory
+            shutil.rmtree(local_path)
+            logger.info(f"Successfully deleted local folder: {local_path}")
+            break  # Stop after successfully deleting one path
+        except PermissionError:
+            logger.error(f"Permission denied when trying to delete {local_path}")
+        except Exception as delete_error:
+            logger.error(f"Error deleting local folder {local_path}: {str(delete_error)}")
+
+def repository_fields(repo_data):
+    """Repository model fields from a REST repository payload"""
+    return {
+        'name': repo_data['name'],
+        'full_name': repo_data['full_name'],
+        'description': repo_data['description'] or '',
+        'url': repo_data['html_url'],
+        'private': repo_data['private'],
+        'fork': repo_data['fork'],
+        'created_at': datetime.strptime(repo_data['created_at'], '%Y-%m-%dT%H:%M:%SZ'),
+        'updated_at': datetime.strptime(repo_data['updated_at'], '%Y-%m-%dT%H:%M:%SZ'),
+        'pushed_at': datetime.strptime(repo_data['pushed_at'], '%Y-%m-%dT%H:%M:%SZ') if repo_data['pushed_at'] else None,
+        'size': repo_data['size'],
+        'language': repo_data['language'] or '',
+        'default_branch': repo_data['default_branch'],
+        'organization': repo_data['owner']['login'] if repo_data['owner']['type'] == 'Organization' else None,
+        'last_synced': timezone.now(),
+        # The checkout lives next to this project, named after the repository
+        'local_path': os.path.join(os.path.dirname(settings.BASE_DIR), repo_data['name']),
+    }
+
+class RateLimitGate:
+    """
+    Pause shared by concurrent GitHub calls.
+
+    When one call hits the primary or secondary rate limit every worker
+    waits for the limit to reset, instead of each of them retrying into it.
+    """
+    # GitHub asks for at least a minute when a secondary limit gives no hint
+    DEFAULT_WAIT = 60
+
+    def __init__(self, sleep=time.sleep, clock=time.time):
+        self.sleep = sleep
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._resume_at = 0
+
+    def wait(self):
+        while True:
+            with self._lock:
+                delay = self._resume_at - self.clock()
+            if delay <= 0:
+                return
+            self.sleep(delay)
+
+    def observe(self, response):
+        """
+        Pause everyone if ``response`` shows the rate limit is used up.
+
+        Returns True if the request was rejected and should be retried.
+        """
+        headers = response.headers
+        limited = response.status_code == 429 or (
+            response.status_code == 403 and (
+                headers.get('X-RateLimit-Remaining') == '0'
+                or 'Retry-After' in headers
+                or 'rate limit' in response.text.lower()
+            )
+        )
+        retry_after = self._retry_after(headers.get('Retry-After'))
+        if retry_after is not None:
+            resume_at = retry_after
+        elif headers.get('X-RateLimit-Remaining') == '0':
+            resume_at = int(headers.get('X-RateLimit-Reset', 0)) or self.clock() + self.DEFAULT_WAIT
+        elif limited:
+            resume_at = self.clock() + self.DEFAULT_WAIT
+        else:
+            return False
+
+        with self._lock:
+            if resume_at > self._resume_at:
+                self._resume_at = resume_at
+                logger.warning(f"GitHub rate limit reached, pausing for {resume_at - self.clock():.0f} seconds")
+        return limited
+
+    def _retry_after(self, value):
+        """When to resume per a Retry-After header, given in seconds or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            return self.clock() + int(value)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp(), self.clock())
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring unparseable Retry-After header: {value!r}")
+            return None
+
 class GitHubService:
+    RATE_LIMIT_RETRIES = 5
+    # A sync logs a progress summary line every this many repositories
+    LOG_SUMMARY_EVERY = 500
+
     def __init__(self):
         self.token = os.environ.get('GITHUB_ACCESS_TOKEN')
         if not self.token:
@@ -18,7 +168,14 @@ class GitHubService:
         
         try:
             # Initialize PyGithub client for some operations
-            self.client = Github(self.token)
+            # PyGithub's connections share the transport's pool and retries
+            transport.install_pygithub()
+            self.client = Github(
+                self.token,
+                base_url=settings.GITHUB_API_URL,
+                timeout=settings.GITHUB_READ_TIMEOUT,
+                seconds_between_requests=settings.GITHUB_MIN_REQUEST_INTERVAL,
+            )
             self.user = self.client.get_user()
             logger.info(f"Connected to GitHub as user: {self.user.login}")
             
@@ -27,22 +184,28 @@ class GitHubService:
             logger.info(f"Local repositories directory: {settings.LOCAL_REPOS_DIR}")
             
             # Set up session for direct API calls
-            self.session = requests.Session()
-            self.session.headers.update({
-                'Authorization': f'token {self.token}',
-                'Accept': 'application/vnd.github.v3+json',
-                'User-Agent': 'Python'
-            })
+            self.session = api_session(self.token)
             
             # Test API access
-            response = self.session.get('https://api.github.com/user')
+            response = self.session.get(f'{settings.GITHUB_API_URL}/user')
             response.raise_for_status()
-            logger.info(f"API connection successful. Rate limit: {self.client.get_rate_limit().core.remaining}/{self.client.get_rate_limit().core.limit}")
+            # The response already carries the rate limit; get_rate_limit() would
+            # cost two more calls (and its .core attribute is gone in PyGithub 2)
+            logger.info(f"API connection successful. Rate limit: {response.headers.get('X-RateLimit-Remaining')}/{response.headers.get('X-RateLimit-Limit')}")
         except Exception as e:
             logger.error(f"Failed to initialize GitHub client: {str(e)}")
             raise ValueError(f"Failed to connect to GitHub: {str(e)}")
 
-    def _get_all_pages(self, url, params=None):
+    @staticmethod
+    def _last_page(response):
+        """Read the total page count from the rel="last" Link header, if present"""
+        for link in response.headers.get('Link', '').split(', '):
+            if 'rel="last"' in link:
+                query = parse_qs(urlparse(link[link.index('<') + 1:link.index('>')]).query)
+                return int(query.get('page', ['0'])[0]) or None
+        return None
+
+    def _get_all_pages(self, url, params=None, progress=None, label='repositories'):
         """Helper method to handle GitHub API pagination using Link headers"""
         if params is None:
             params = {}
@@ -50,6 +213,8 @@ class GitHubService:
         
         all_items = []
         current_url = url
+        page = 0
+        total_pages = None
         
         while current_url:
             # For the first request, use the original URL with params
@@ -68,7 +233,7 @@ class GitHubService:
                 raise Exception(f"GitHub API rate limit exceeded. Reset in {wait_time} seconds")
             
             response.raise_for_status()
-            logger.info(f"Rate limit remaining: {rate_limit}")
+            logger.debug("Rate limit remaining: %s", rate_limit)
             
             # Get items from current page
             items = response.json()
@@ -79,7 +244,12 @@ class GitHubService:
                 break
                 
             all_items.extend(items)
-            logger.debug(f"Fetched {len(items)} items")
+            logger.debug("Fetched %d items", len(items))
+
+            page += 1
+            if progress:
+                total_pages = total_pages or self._last_page(response) or page
+                progress.emit(f"{label}: page {page}/{total_pages} fetched", stage=label, page=page, pages=total_pages)
             
             # Check for next page in Link header
             current_url = None
@@ -88,7 +258,7 @@ class GitHubService:
                 for link in links:
                     if 'rel="next"' in link:
                         current_url = link[link.index('<') + 1:link.index('>')]
-                        logger.debug(f"Found next page: {current_url}")
+                        logger.debug("Found next page: %s", current_url)
                         break
             
             if not current_url:
@@ -97,125 +267,170 @@ class GitHubService:
         
         return all_items
 
-    def sync_repositories(self, username=None, affiliation='owner'):
-        """Sync repositories for a specific user or all accessible repositories"""
+    def sync_repositories(self, username=None, affiliation='owner', progress=None, trigger=''):
+        """
+        Sync repositories for a specific user or all accessible repositories
+
+        If ``progress`` is given (see ``repos.progress.ImportProgress``), page
+        fetches and per-repository branch counts are reported through its
+        ``emit()`` method as the sync runs. Every sync is recorded as a
+        ``SyncRun``; ``trigger`` says what started it. A sampled fraction
+        of syncs is also profiled (``repomgr.profiling.profile_sync``).
+        """
+        run = SyncRun.objects.create(trigger=trigger)
+        telemetry = SyncTelemetry()
         try:
-            # Get all repositories using direct API call with proper pagination
+            with telemetry.active(), profile_sync(run):
+                synced_repos = self._sync_repositories(affiliation, progress, telemetry)
+        except Exception as e:
+            logger.error(f"Error in sync_repositories: {str(e)}")
+            telemetry.error(str(e))
+            run.finish(telemetry, SyncRun.FAILED)
+            raise
+        run.finish(telemetry, SyncRun.SUCCEEDED, repositories=len(synced_repos))
+        logger.info(f"Sync {run.pk} finished in {run.duration:.1f}s with {run.api_calls} API calls")
+        return synced_repos
+
+    def _sync_repositories(self, affiliation, progress, telemetry):
+        # Get all repositories using direct API call with proper pagination
+        with telemetry.stage('listing'):
             logger.info("Fetching all accessible repositories...")
             repos_data = self._get_all_pages(
-                'https://api.github.com/user/repos',
-                params={'affiliation': affiliation, 'sort': 'full_name'}
+                f'{settings.GITHUB_API_URL}/user/repos',
+                params={'affiliation': affiliation, 'sort': 'full_name'},
+                progress=progress
             )
-            
+
             # Also get starred repositories
             logger.info("Fetching starred repositories...")
-            starred_repos = self._get_all_pages('https://api.github.com/user/starred')
-            
-            # Combine and deduplicate repositories
-            all_repos = repos_data + starred_repos
-            seen_ids = set()
-            unique_repos = []
-            for repo in all_repos:
-                if repo['id'] not in seen_ids:
-                    seen_ids.add(repo['id'])
-                    unique_repos.append(repo)
-            
-            logger.info(f"Total unique repositories found: {len(unique_repos)}")
-            logger.info("Repository IDs found:")
-            for repo in unique_repos:
-                logger.info(f"ID: {repo['id']} - {repo['full_name']}")
-            
-            synced_repos = []
-            for repo_data in unique_repos:
-                try:
-                    logger.info(f"Processing repository: {repo_data['full_name']}")
-                    
-                    # Parse dates
-                    created_at = datetime.strptime(repo_data['created_at'], '%Y-%m-%dT%H:%M:%SZ')
-                    updated_at = datetime.strptime(repo_data['updated_at'], '%Y-%m-%dT%H:%M:%SZ')
-                    pushed_at = datetime.strptime(repo_data['pushed_at'], '%Y-%m-%dT%H:%M:%SZ') if repo_data['pushed_at'] else None
-                    
-                    # Determine the actual local path
-                    local_path = os.path.join(os.path.dirname(settings.BASE_DIR), repo_data['name'])
-                    logger.info(f"Actual local path for {repo_data['name']}: {local_path}")
-                    
-                    # Create or update repository
+            starred_repos = self._get_all_pages(f'{settings.GITHUB_API_URL}/user/starred', progress=progress, label='starred')
+
+        # Combine and deduplicate repositories
+        all_repos = repos_data + starred_repos
+        seen_ids = set()
+        unique_repos = []
+        for repo in all_repos:
+            if repo['id'] not in seen_ids:
+                seen_ids.add(repo['id'])
+                unique_repos.append(repo)
+
+        logger.info(f"Total unique repositories found: {len(unique_repos)}")
+
+        synced_repos = []
+        snapshots = []
+        # Per-repository outcomes, logged as summary lines rather than one
+        # line each
+        summary = Counter({'branches': 0, 'without local checkout': 0, 'failed': 0})
+        for repo_data in unique_repos:
+            try:
+                logger.debug("Processing repository %s (ID %s)", repo_data['full_name'], repo_data['id'])
+
+                defaults = repository_fields(repo_data)
+                local_path = defaults['local_path']
+
+                # Create or update repository
+                with telemetry.stage('repositories'):
                     repo_obj, created = Repository.objects.update_or_create(
                         github_id=repo_data['id'],
-                        defaults={
-                            'name': repo_data['name'],
-                            'full_name': repo_data['full_name'],
-                            'description': repo_data['description'] or '',
-                            'url': repo_data['html_url'],
-                            'private': repo_data['private'],
-                            'fork': repo_data['fork'],
-                            'created_at': created_at,
-                            'updated_at': updated_at,
-                            'pushed_at': pushed_at,
-                            'size': repo_data['size'],
-                            'language': repo_data['language'] or '',
-                            'default_branch': repo_data['default_branch'],
-                            'organization': repo_data['owner']['login'] if repo_data['owner']['type'] == 'Organization' else None,
-                            'last_synced': timezone.now(),
-                            'local_path': local_path
-                        }
+                        defaults=defaults
                     )
-                    
-                    # Verify local directory exists
-                    if os.path.exists(local_path):
-                        logger.info(f"Local directory exists: {local_path}")
-                    else:
-                        logger.warning(f"Local directory does not exist: {local_path}")
-
-                    # Get repository object for branch syncing
+                telemetry.count_rows(inserted=int(created), updated=int(not created))
+
+                # The listing already carries the stats, so prime the cache
+                if 'stargazers_count' in repo_data:
+                    repository_details.prime(repo_data['full_name'], details_from_rest(repo_data))
+
+                if not os.path.exists(local_path):
+                    summary['without local checkout'] += 1
+
+                # Get repository object for branch syncing
+                with telemetry.stage('branches'):
                     github_repo = self.client.get_repo(repo_data['full_name'])
-                    self._sync_branches(repo_obj, github_repo)
-                    
-                    synced_repos.append(repo_obj)
-                    logger.info(f"Successfully synced repository: {repo_data['full_name']}")
-                except Exception as e:
-                    logger.error(f"Error syncing repository {repo_data['full_name']}: {str(e)}")
-                    continue
-
-            # Log summary
-            logger.info(f"Sync complete. Total repositories synced: {len(synced_repos)}")
-            logger.info(f"Private repos: {sum(1 for r in synced_repos if r.private)}")
-            logger.info(f"Organization repos: {sum(1 for r in synced_repos if r.organization)}")
-            
-            return synced_repos
-        except Exception as e:
-            logger.error(f"Error in sync_repositories: {str(e)}")
-            raise
+                    branch_count = self._sync_branches(repo_obj, github_repo, telemetry)
+                if 'stargazers_count' in repo_data:
+                    snapshots.append(RepositorySnapshot(
+                        repository=repo_obj,
+                        stars=repo_data['stargazers_count'],
+                        forks=repo_data['forks_count'],
+                        open_issues=repo_data['open_issues_count'],
+                        watchers=repo_data['watchers_count'],
+                        size=repo_data['size'],
+                        branch_count=branch_count,
+                    ))
 
-    def _sync_branches(self, repo_obj, github_repo):
+                synced_repos.append(repo_obj)
+                summary['branches'] += branch_count
+                if len(synced_repos) % self.LOG_SUMMARY_EVERY == 0:
+                    logger.info(self._summary(f"Synced {len(synced_repos)}/{len(unique_repos)} repositories", summary))
+                if progress:
+                    progress.emit(
+                        f"{repo_data['full_name']}: {branch_count} branches written",
+                        stage='branches', done=len(synced_repos), total=len(unique_repos)
+                    )
+            except Exception as e:
+                summary['failed'] += 1
+                logger.error(f"Error syncing repository {repo_data['full_name']}: {str(e)}")
+                telemetry.error(f"{repo_data['full_name']}: {e}")
+                if progress:
+                    progress.emit(f"{repo_data['full_name']}: failed ({e})", stage='error')
+                continue
+
+        # Metrics come from the listing already fetched, written in bulk.
+        # Upserts can't tell inserts from updates; they count as updates.
+        with telemetry.stage('snapshots'):
+            RepositorySnapshot.record(snapshots)
+        telemetry.count_rows(updated=len(snapshots))
+
+        summary['private'] = sum(1 for r in synced_repos if r.private)
+        summary['organization'] = sum(1 for r in synced_repos if r.organization)
+        logger.info(self._summary(f"Sync complete. Total repositories synced: {len(synced_repos)}", summary))
+
+        return synced_repos
+
+    @staticmethod
+    def _summary(message, counts):
+        """``message`` followed by the non-zero ``counts``"""
+        details = ', '.join(f"{count} {name}" for name, count in counts.items() if count)
+        return f"{message} ({details})" if details else message
+
+    def _sync_branches(self, repo_obj, github_repo, telemetry=None):
         """Sync branches for a specific repository"""
         try:
             # Get all branches for the repository
             branches = list(github_repo.get_branches())
+            rows = Counter()
             
-            # Keep track of existing branches
-            existing_branches = set()
-            
-            for branch in branches:
-                try:
-                    branch_obj, _ = Branch.objects.update_or_create(
-                        repository=repo_obj,
-                        name=branch.name,
-                        defaults={
-                            'is_default': branch.name == github_repo.default_branch,
-                            'last_commit_sha': branch.commit.sha,
-                            'last_commit_message': branch.commit.commit.message if branch.commit.commit else '',
-                        }
-                    )
-                    existing_branches.add(branch.name)
-                except Exception as e:
-                    logger.error(f"Error syncing branch {branch.name} for repo {repo_obj.full_name}: {str(e)}")
-                    continue
+            with transaction.atomic():
+                # Keep track of existing branches
+                existing_branches = set()
+                
+                for branch in branches:
+                    try:
+                        branch_obj, created = Branch.objects.update_or_create(
+                            repository=repo_obj,
+                            name=branch.name,
+                            defaults={
+                                'is_default': branch.name == github_repo.default_branch,
+                                'last_commit_sha': branch.commit.sha,
+                                'last_commit_message': branch.commit.commit.message if branch.commit.commit else '',
+                            }
+                        )
+                        rows['inserted' if created else 'updated'] += 1
+                        existing_branches.add(branch.name)
+                    except Exception as e:
+                        logger.error(f"Error syncing branch {branch.name} for repo {repo_obj.full_name}: {str(e)}")
+                        if telemetry:
+                            telemetry.error(f"{repo_obj.full_name} branch {branch.name}: {e}")
+                        continue
 
-            # Remove branches that no longer exist
-            repo_obj.branches.exclude(name__in=existing_branches).delete()
+                # Remove branches that no longer exist
+                rows['deleted'], _ = repo_obj.branches.exclude(name__in=existing_branches).delete()
+                repo_obj.refresh_branch_state()
             
-            logger.info(f"Synced {len(existing_branches)} branches for {repo_obj.full_name}")
+            if telemetry:
+                telemetry.count_rows(**rows)
+            logger.debug("Synced %d branches for %s", len(existing_branches), repo_obj.full_name)
+            return len(existing_branches)
         except Exception as e:
             logger.error(f"Error in _sync_branches for {repo_obj.full_name}: {str(e)}")
             raise
@@ -254,6 +469,162 @@ class GitHubService:
         self._sync_branches(repo_obj, github_repo)
         return repo_obj
 
+    def _request(self, method, url, gate, **kwargs):
+        """Send a request, waiting out and retrying rate limit rejections"""
+        for attempt in range(self.RATE_LIMIT_RETRIES):
+            gate.wait()
+            response = self.session.request(method, url, **kwargs)
+            if not gate.observe(response):
+                return response
+        return response
+
+    def _create_from_spec(self, spec, organization, gate):
+        """
+        Create one repository; returns ``(status, repo_data, branch_data)``.
+
+        A repository created concurrently elsewhere is reported as existing.
+        """
+        owner = organization or self.user.login
+        create_url = f'{settings.GITHUB_API_URL}/orgs/{organization}/repos' if organization else f'{settings.GITHUB_API_URL}/user/repos'
+        response = self._request('post', create_url, gate, json=spec)
+        if response.status_code == 422 and 'already exists' in response.text:
+            response = self._request('get', f"{settings.GITHUB_API_URL}/repos/{owner}/{spec['name']}", gate)
+            response.raise_for_status()
+            return 'exists', response.json(), None
+        response.raise_for_status()
+        repo_data = response.json()
+
+        # auto_init creates the default branch with an initial commit
+        branch_data = None
+        if spec.get('auto_init'):
+            branch = self._request(
+                'get', f"{settings.GITHUB_API_URL}/repos/{repo_data['full_name']}/branches/{repo_data['default_branch']}", gate
+            )
+            if branch.ok:
+                branch_data = branch.json()
+            else:
+                logger.warning(f"Could not read the default branch of {repo_data['full_name']}: {branch.status_code}")
+        return 'created', repo_data, branch_data
+
+    def create_repositories(self, specs, organization=None, max_workers=4, dry_run=False, gate=None):
+        """
+        Create the repositories described by ``specs`` (see ``repos.manifest``).
+
+        Repositories that already exist are skipped, so re-running a manifest
+        is safe. At most ``max_workers`` creations run at once, fewer while
+        the transport's adaptive limiter (``repos.transport``) sees secondary
+        rate limits, and all of them pause together when a rate limit asks
+        for a longer wait. Created and existing
+        repositories are then registered with one bulk upsert, plus one for
+        the default branches of created repositories; existing repositories
+        whose branches were never synced get a branch sync.
+
+        Returns one dict per spec with ``name``, ``status`` (created, exists,
+        would_create or failed), ``url`` and ``error``.
+        """
+        gate = gate or RateLimitGate()
+        if organization:
+            listing = self._get_all_pages(f'{settings.GITHUB_API_URL}/orgs/{organization}/repos', params={'type': 'all'})
+        else:
+            listing = self._get_all_pages(f'{settings.GITHUB_API_URL}/user/repos', params={'affiliation': 'owner'})
+        existing = {repo_data['name'].lower(): repo_data for repo_data in listing}
+
+        results = {}
+        to_create = []
+        for spec in specs:
+            repo_data = existing.get(spec['name'].lower())
+            if repo_data is not None:
+                results[spec['name']] = ('exists', repo_data, None)
+            elif dry_run:
+                results[spec['name']] = ('would_create', None, None)
+            else:
+                to_create.append(spec)
+
+        def create(spec):
+            try:
+                return spec['name'], self._create_from_spec(spec, organization, gate)
+            except Exception as e:
+                logger.error(f"Error creating repository {spec['name']}: {str(e)}")
+                return spec['name'], ('failed', None, str(e))
+
+        transport.ensure_pool_size(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='create-repos') as executor:
+            results.update(executor.map(create, to_create))
+
+        if not dry_run:
+            self._register_repositories([
+                (repo_data, branch_data) for status, repo_data, branch_data in results.values() if repo_data
+            ])
+            self._sync_unseen_branches([repo_data for status, repo_data, _ in results.values() if status == 'exists'])
+
+        summary = []
+        for spec in specs:
+            status, repo_data, detail = results[spec['name']]
+            summary.append({
+                'name': spec['name'],
+                'status': status,
+                'url': repo_data['html_url'] if repo_data else None,
+                'error': detail if status == 'failed' else None,
+            })
+        return summary
+
+    def _sync_unseen_branches(self, existing):
+        """
+        Sync the branches of repositories that already existed on GitHub but
+        whose branches were never synced here, e.g. ones registered just now.
+        """
+        pending = Repository.objects.filter(
+            github_id__in=[repo_data['id'] for repo_data in existing], branch_freshness_at__isnull=True
+        )
+        for repo_obj in pending:
+            try:
+                self._sync_branches(repo_obj, self.client.get_repo(repo_obj.full_name))
+            except Exception as e:
+                # The next sync picks them up; the repository itself is registered
+                logger.error(f"Error syncing branches of existing repository {repo_obj.full_name}: {str(e)}")
+
+    def _register_repositories(self, created):
+        """Upsert repositories and their default branches in bulk"""
+        if not created:
+            return
+        repositories = []
+        for repo_data, branch_data in created:
+            repository = Repository(github_id=repo_data['id'], **repository_fields(repo_data))
+            if branch_data:
+                repository.branch_count = 1
+                repository.default_branch_sha = branch_data['commit']['sha']
+                repository.branch_freshness_at = timezone.now()
+            repositories.append(repository)
+
+        with transaction.atomic():
+            Repository.objects.bulk_create(
+                repositories,
+                update_conflicts=True,
+                unique_fields=['github_id'],
+                update_fields=list(repository_fields(created[0][0])),
+            )
+            ids = dict(Repository.objects.filter(
+                github_id__in=[repo_data['id'] for repo_data, _ in created]
+            ).values_list('github_id', 'pk'))
+            Branch.objects.bulk_create(
+                [
+                    Branch(
+                        repository_id=ids[repo_data['id']],
+                        name=branch_data['name'],
+                        is_default=True,
+                        last_commit_sha=branch_data['commit']['sha'],
+                        last_commit_message=branch_data['commit']['commit']['message'],
+                    )
+                    for repo_data, branch_data in created if branch_data
+                ],
+                update_conflicts=True,
+                unique_fields=['repository', 'name'],
+                update_fields=['is_default', 'last_commit_sha', 'last_commit_message'],
+            )
+        # Bulk writes send no post_save signals
+        bump_data_version(ids.values())
+        logger.info(f"Registered {len(repositories)} repositories")
+
     def delete_repository(self, repository):
         """Delete a repository from GitHub and remove its local folder if it exists"""
         try:
@@ -264,49 +635,7 @@ class GitHubService:
         except Exception as github_delete_error:
             logger.error(f"Error deleting GitHub repository {repository.name}: {str(github_delete_error)}")
         
-        # Delete local folder if it exists
-        local_paths_to_check = [
-            repository.local_path,  # Path from database
-            os.path.join(settings.LOCAL_REPOS_DIR, repository.name),  # Default local repos directory
-            os.path.join(settings.BASE_DIR, 'local_repos', repository.name)  # Alternative local repos path
-        ]
-        
-        for local_path in local_paths_to_check:
-            if not local_path:
-                continue
-            
-            logger.info(f"Checking local path for deletion: {local_path}")
-            
-            try:
-                # Ensure we're not trying to delete something outside the intended directory
-                base_github_dir = os.path.dirname(settings.BASE_DIR)
-                if not local_path.startswith(base_github_dir):
-                    logger.warning(f"Local path {local_path} is not within {base_github_dir}. Skipping deletion.")
-                    continue
-                
-                if not os.path.exists(local_path):
-                    logger.warning(f"Local folder does not exist: {local_path}")
-                    continue
-                
-                # Check if it's a directory
-                if not os.path.isdir(local_path):
-                    logger.warning(f"Local path is not a directory: {local_path}")
-                    continue
-                
-                # Detailed directory contents logging
-                logger.info(f"Directory contents of {local_path}:")
-                for item in os.listdir(local_path):
-                    logger.info(f"  - {item}")
-                
-                # Use shutil to remove the entire directory
-                import shutil
-                shutil.rmtree(local_path)
-                logger.info(f"Successfully deleted local folder: {local_path}")
-                break  # Stop after successfully deleting one path
-            except PermissionError:
-                logger.error(f"Permission denied when trying to delete {local_path}")
-            except Exception as delete_error:
-                logger.error(f"Error deleting local folder {local_path}: {str(delete_error)}")
+        remove_local_checkout(repository)
         
         # Finally, remove from database
         try:
@@ -315,17 +644,39 @@ class GitHubService:
         except Exception as db_delete_error:
             logger.error(f"Error removing repository from database: {str(db_delete_error)}")
 
-    def get_repository_details(self, repository):
-        """Get detailed information about a repository"""
-        github_repo = self.client.get_repo(f"{self.client.get_user().login}/{repository.name}")
-        return {
-            'stars': github_repo.stargazers_count,
-            'forks': github_repo.forks_count,
-            'open_issues': github_repo.open_issues_count,
-            'watchers': github_repo.watchers_count,
-            'default_branch': github_repo.default_branch,
-            'language': github_repo.language,
-            'created_at': github_repo.created_at,
-            'updated_at': github_repo.updated_at,
-            'pushed_at': github_repo.pushed_at,
-        }
+    def fetch_repository_details(self, full_names):
+        """Fetch details for many repositories with a single GraphQL call"""
+        return _fetch_details(self.session, full_names)
+
+
+def api_session(token):
+    """A transport session for direct REST and GraphQL calls as ``token``"""
+    return transport.session({
+        'Authorization': f'token {token}',
+        'Accept': 'application/vnd.github.v3+json',
+        'User-Agent': 'Python'
+    })
+
+
+def _fetch_details(session, full_names):
+    query, variables, aliases = details_query(full_names)
+    response = session.post(f'{settings.GITHUB_API_URL}/graphql', json={'query': query, 'variables': variables})
+    response.raise_for_status()
+    return details_from_graphql(response.json(), aliases)
+
+
+def fetch_repository_details(full_names):
+    # One fetcher for every request, so stale entries they queue are
+    # refreshed in the same batch and keep no request's service alive
+    return _fetch_details(api_session(os.environ.get('GITHUB_ACCESS_TOKEN')), full_names)
+
+
+def get_repository_details(repository):
+    """
+    Get detailed information about a repository.
+
+    Served from ``repository_details``; stale entries are refreshed in the
+    background, batched with other repositories. Needs no ``GitHubService``,
+    whose construction costs two API calls.
+    """
+    return repository_details.get(repository.full_name, fetch_repository_details)
@@ -0,0 +1,36 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .lazy import lazy_import
+from .models import Branch, Repository, WindsurfSession
+from .versioning import bump_data_version
+
+metrics = lazy_import('repomgr.metrics')
+
+
+@receiver(post_save, sender=Repository)
+@receiver(post_save, sender=Branch)
+@receiver(post_save, sender=WindsurfSession)
+def repository_data_saved(sender, instance, using, **kwargs):
+    # After the commit, so that readers can't cache the old rows under the new version
+    changed = [instance.pk] if sender is Repository else []
+    transaction.on_commit(partial(bump_data_version, changed), using=using)
+
+
+@receiver(post_delete, sender=Repository)
+@receiver(post_delete, sender=Branch)
+@receiver(post_delete, sender=WindsurfSession)
+def repository_data_deleted(sender, instance, using, **kwargs):
+    changed = [instance.pk] if sender is Repository else []
+    transaction.on_commit(partial(bump_data_version, changed), using=using)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    if settings.METRICS_ENABLED:
+        metrics.instrument_connection(connection)
@@ -0,0 +1,27 @@
+"""
+Orderings of the repository list, shared by the web views and the CLI.
+
+Kept apart from ``repos.views`` so that the CLI can sort without loading the
+view layer.
+"""
+from django.db.models import F
+from django.db.models.functions import Lower
+
+SORT_FIELDS = [
+    'name', '-name', 'updated_at', '-updated_at', 'language', '-language', 'branch_count', '-branch_count',
+    'health_score', '-health_score', 'staleness_score', '-staleness_score',
+]
+
+
+def apply_sort(repositories, sort):
+    if sort in ('name', '-name'):
+        # Matches the Lower(name) index and sorts case-insensitively
+        name = Lower('name')
+        return repositories.order_by(name.desc() if sort == '-name' else name.asc())
+    if sort in ('health_score', '-health_score', 'staleness_score', '-staleness_score'):
+        # Unscored repositories go last either way
+        field = F(sort.lstrip('-'))
+        return repositories.order_by(field.desc(nulls_last=True) if sort.startswith('-') else field.asc(nulls_last=True))
+    if sort in SORT_FIELDS:
+        repositories = repositories.order_by(sort)
+    return repositories
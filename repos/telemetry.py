@@ -0,0 +1,127 @@
+"""
+Numbers a sync collects for its ``SyncRun``.
+
+``SyncTelemetry`` counts API calls per endpoint, bytes received, 304s and
+rate limit used from the responses it observes, and rows written, errors and
+time per stage from the sync itself. ``record_response`` is a requests
+response hook that passes every response to the Prometheus metrics and to
+the telemetry active on the current thread; ``repos.transport`` installs it
+on the service's sessions and on PyGithub's connections.
+"""
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from .lazy import lazy_import
+
+metrics = lazy_import('repomgr.metrics')
+
+_active = threading.local()
+
+# Owner, repository, user and ref names in paths, so calls group by endpoint
+ENDPOINT_PATTERNS = [
+    (re.compile(r'^/repos/[^/]+/[^/]+'), '/repos/{owner}/{repo}'),
+    (re.compile(r'/(branches|commits|git/refs/heads)/.+$'), r'/\1/{ref}'),
+    (re.compile(r'^/(users|orgs)/[^/]+'), r'/\1/{name}'),
+]
+
+
+def endpoint(method, url):
+    """``"GET /repos/{owner}/{repo}/branches"`` for a request URL"""
+    path = urlparse(url).path
+    prefix = urlparse(settings.GITHUB_API_URL).path.rstrip('/')
+    if prefix and path.startswith(prefix):
+        path = path[len(prefix):]
+    for pattern, replacement in ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return f'{method} {path or "/"}'
+
+
+class SyncTelemetry:
+    # Errors beyond this are counted but their messages dropped
+    MAX_ERRORS = 50
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.api_calls = Counter()
+        self.bytes_received = 0
+        self.not_modified = 0
+        self.rows = Counter()
+        self.errors = []
+        self.error_count = 0
+        self.stages = defaultdict(float)
+        # X-RateLimit-Reset -> lowest and highest X-RateLimit-Used seen
+        self._rate_limit_windows = {}
+
+    @contextmanager
+    def active(self):
+        """Send the responses of this thread's requests to this telemetry"""
+        previous = getattr(_active, 'telemetry', None)
+        _active.telemetry = self
+        try:
+            yield self
+        finally:
+            _active.telemetry = previous
+
+    @contextmanager
+    def stage(self, name):
+        """Add the time spent in the block to stage ``name``"""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.stages[name] += self.clock() - started
+
+    def observe(self, response, stream=False):
+        request = response.request
+        self.api_calls[endpoint(request.method, request.url)] += 1
+        length = response.headers.get('Content-Length')
+        if length is not None:
+            self.bytes_received += int(length)
+        elif not stream:
+            self.bytes_received += len(response.content or b'')
+
+        # 304s don't count against the rate limit
+        if response.status_code == 304:
+            self.not_modified += 1
+            return
+        used, reset = response.headers.get('X-RateLimit-Used'), response.headers.get('X-RateLimit-Reset')
+        if used is not None and reset is not None:
+            used = int(used)
+            low, high = self._rate_limit_windows.get(reset, (used, used))
+            self._rate_limit_windows[reset] = (min(low, used), max(high, used))
+
+    @property
+    def rate_limit_used(self):
+        """
+        Calls used from the rate limit, per window between the first and the
+        last call seen (both included); other clients of the token count too
+        """
+        return sum(high - low + 1 for low, high in self._rate_limit_windows.values())
+
+    def count_rows(self, inserted=0, updated=0, deleted=0):
+        self.rows.update(inserted=inserted, updated=updated, deleted=deleted)
+
+    def error(self, message):
+        self.error_count += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(message)
+
+
+def record_response(response, *args, **kwargs):
+    """requests response hook feeding Prometheus and the current thread's active telemetry"""
+    if settings.METRICS_ENABLED:
+        request = response.request
+        metrics.observe_github_response(
+            endpoint(request.method, request.url), response.status_code, response.elapsed.total_seconds(),
+            response.headers, request.headers.get('Authorization'),
+        )
+    telemetry = getattr(_active, 'telemetry', None)
+    if telemetry is not None:
+        telemetry.observe(response, stream=kwargs.get('stream', False))
+
@@ -0,0 +1,113 @@
+import json
+from datetime import timedelta
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth.models import User
+from repos.models import Repository, Branch
+
+def read_ndjson(response):
+    body = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+class RepositoryExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+
+        self.repo1 = Repository.objects.create(
+            github_id=1,
+            name='django-project',
+            full_name='user/django-project',
+            url='https://github.com/user/django-project',
+            language='Python'
+        )
+        self.repo2 = Repository.objects.create(
+            github_id=2,
+            name='react-app',
+            full_name='org/react-app',
+            url='https://github.com/org/react-app',
+            private=True,
+            language='JavaScript',
+            organization='TestOrg'
+        )
+        Branch.objects.create(repository=self.repo1, name='main', is_default=True, last_commit_sha='abc123')
+        Branch.objects.create(repository=self.repo1, name='develop', last_commit_sha='def456')
+
+    def test_streams_ndjson(self):
+        response = self.client.get(reverse('repos:api_repository_export'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = read_ndjson(response)
+        self.assertEqual([row['name'] for row in rows], ['django-project', 'react-app'])
+        self.assertNotIn('branches', rows[0])
+
+    def test_json_array_format(self):
+        response = self.client.get(reverse('repos:api_repository_export'), {'format': 'json'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 2)
+
+    def test_filters_reuse_search(self):
+        response = self.client.get(reverse('repos:api_repository_export'), {'q': 'react', 'private': 'true'})
+        self.assertEqual([row['name'] for row in read_ndjson(response)], ['react-app'])
+
+        response = self.client.get(reverse('repos:api_repository_export'), {'language': 'python'})
+        self.assertEqual([row['name'] for row in read_ndjson(response)], ['django-project'])
+
+    def test_embeds_branches(self):
+        response = self.client.get(reverse('repos:api_repository_export'), {'include': 'branches'})
+        rows = {row['name']: row for row in read_ndjson(response)}
+        self.assertEqual([b['name'] for b in rows['django-project']['branches']], ['main', 'develop'])
+        self.assertEqual(rows['react-app']['branches'], [])
+
+    @patch('repos.api.CHUNK_SIZE', 2)
+    def test_branch_queries_dont_grow_with_the_export(self):
+        branch_counts = {'django-project': 2, 'react-app': 0}
+        for number in range(3, 10):
+            repository = Repository.objects.create(
+                github_id=number,
+                name=f'repo-{number}',
+                full_name=f'user/repo-{number}',
+                url=f'https://github.com/user/repo-{number}'
+            )
+            branch_counts[repository.name] = number % 2
+            if number % 2:
+                Branch.objects.create(repository=repository, name='main', is_default=True, last_commit_sha='abc123')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('repos:api_repository_export'), {'include': 'branches'})
+            rows = read_ndjson(response)
+        self.assertLessEqual(len(queries), 4)
+        self.assertEqual({row['name']: len(row['branches']) for row in rows}, branch_counts)
+
+    def test_since_returns_only_changed_rows(self):
+        since = timezone.now()
+        Repository.objects.filter(pk=self.repo1.pk).update(updated_at=since - timedelta(days=1))
+        Repository.objects.filter(pk=self.repo2.pk).update(updated_at=since + timedelta(seconds=1))
+
+        response = self.client.get(reverse('repos:api_repository_export'), {'since': since.isoformat()})
+        self.assertEqual([row['name'] for row in read_ndjson(response)], ['react-app'])
+
+    def test_invalid_parameters(self):
+        response = self.client.get(reverse('repos:api_repository_export'), {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('repos:api_repository_export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_branch_export(self):
+        response = self.client.get(reverse('repos:api_branch_export', kwargs={'pk': self.repo1.pk}))
+        self.assertEqual([row['name'] for row in read_ndjson(response)], ['main', 'develop'])
+
+        response = self.client.get(reverse('repos:api_branch_export', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('repos:api_repository_export'))
+        self.assertEqual(response.status_code, 302)
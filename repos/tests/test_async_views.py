@@ -0,0 +1,102 @@
+import json
+import httpx
+from unittest.mock import patch
+from django.test import TestCase, AsyncClient, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from repos.async_services import AsyncGitHubService
+from repos.details_cache import repository_details
+from repos.models import Repository, Branch
+
+def github_handler(request):
+    """Answer the GitHub API calls made while creating and deleting a repository"""
+    if request.method == 'POST' and request.url.path == '/user/repos':
+        payload = json.loads(request.content)
+        return httpx.Response(201, json={
+            'id': 42,
+            'name': payload['name'],
+            'full_name': f"testuser/{payload['name']}",
+            'description': payload['description'],
+            'html_url': f"https://github.com/testuser/{payload['name']}",
+            'private': payload['private'],
+            'default_branch': 'main',
+        })
+    if request.method == 'GET' and request.url.path == '/repos/testuser/new-repo/branches':
+        return httpx.Response(200, json=[{'name': 'main', 'commit': {'sha': 'abc123'}}])
+    if request.method == 'GET' and request.url.path == '/repos/testuser/new-repo/branches/main':
+        return httpx.Response(200, json={'name': 'main', 'commit': {'sha': 'abc123', 'commit': {'message': 'Initial commit'}}})
+    if request.method == 'DELETE' and request.url.path == '/repos/user/test-repo':
+        return httpx.Response(204)
+    if request.method == 'POST' and request.url.path == '/graphql':
+        return httpx.Response(200, json={'data': {'r0': {
+            'stargazerCount': 12, 'forkCount': 3, 'issues': {'totalCount': 1}, 'pullRequests': {'totalCount': 1},
+            'watchers': {'totalCount': 4}, 'defaultBranchRef': {'name': 'main'}, 'primaryLanguage': None,
+            'createdAt': None, 'updatedAt': None, 'pushedAt': None,
+        }}})
+    return httpx.Response(404, json={'message': 'Not Found'})
+
+def fake_service():
+    return AsyncGitHubService(transport=httpx.MockTransport(github_handler))
+
+@override_settings(ROOT_URLCONF='repomgr.urls_async')
+@patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = AsyncClient()
+        self.repo = Repository.objects.create(
+            github_id=1,
+            name='test-repo',
+            full_name='user/test-repo',
+            url='https://github.com/user/test-repo'
+        )
+        Branch.objects.create(repository=self.repo, name='main', is_default=True, last_commit_sha='abc123')
+
+    async def test_repository_list_view(self):
+        await self.client.aforce_login(self.user)
+        response = await self.client.get(reverse('repos:repository_list'), {'query': 'test'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'repos/repository_list.html')
+        self.assertContains(response, 'test-repo')
+        self.assertEqual(response.context['search_status']['filtered_repositories'], 1)
+
+    @patch('repos.async_services.AsyncGitHubService', side_effect=fake_service)
+    async def test_repository_detail_view(self, mock_service):
+        repository_details.clear()
+        self.addCleanup(repository_details.clear)
+        await self.client.aforce_login(self.user)
+        response = await self.client.get(reverse('repos:repository_detail', kwargs={'pk': self.repo.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'abc123')
+        self.assertContains(response, '12 stars, 3 forks, 2 open issues, 4 watchers')
+
+        response = await self.client.get(reverse('repos:repository_detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_requires_login(self):
+        response = await self.client.get(reverse('repos:repository_list'))
+        self.assertEqual(response.status_code, 302)
+
+    @patch('repos.async_views.AsyncGitHubService', fake_service)
+    async def test_repository_create_view(self):
+        await self.client.aforce_login(self.user)
+        response = await self.client.post(reverse('repos:repository_create'), {
+            'name': 'new-repo',
+            'description': 'Created asynchronously',
+            'auto_init': True
+        })
+        repo = await Repository.objects.aget(github_id=42)
+        self.assertRedirects(response, reverse('repos:repository_detail', kwargs={'pk': repo.pk}), fetch_redirect_response=False)
+        branch = await repo.branches.aget()
+        self.assertEqual(branch.last_commit_message, 'Initial commit')
+        self.assertTrue(branch.is_default)
+        await repo.arefresh_from_db()
+        self.assertEqual(repo.branch_count, 1)
+        self.assertEqual(repo.default_branch_sha, branch.last_commit_sha)
+
+    @patch('repos.async_views.AsyncGitHubService', fake_service)
+    async def test_repository_delete_view(self):
+        await self.client.aforce_login(self.user)
+        response = await self.client.post(reverse('repos:repository_delete', kwargs={'pk': self.repo.pk}))
+        self.assertRedirects(response, reverse('repos:repository_list'), fetch_redirect_response=False)
+        self.assertFalse(await Repository.objects.filter(pk=self.repo.pk).aexists())
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from django.db import connection
+from unittest.mock import patch
+from django.test import TestCase, Client
+from django.utils import timezone
+from django.urls import reverse
+from django.contrib.auth.models import User
+from repos.autocomplete import RepositoryPrefixIndex, repository_index
+from repos.models import Repository
+from repos.versioning import bump_data_version
+
+class RepositoryPrefixIndexTests(TestCase):
+    def setUp(self):
+        self.index = RepositoryPrefixIndex()
+        self.repo1 = Repository.objects.create(
+            github_id=1,
+            name='django-project',
+            full_name='user/django-project',
+            url='https://github.com/user/django-project'
+        )
+        self.repo2 = Repository.objects.create(
+            github_id=2,
+            name='Django-Utils',
+            full_name='org/Django-Utils',
+            url='https://github.com/org/Django-Utils'
+        )
+        self.repo3 = Repository.objects.create(
+            github_id=3,
+            name='react-app',
+            full_name='org/react-app',
+            url='https://github.com/org/react-app'
+        )
+
+    def test_prefix_matches_name_case_insensitively(self):
+        results = self.index.search('DJANGO')
+        self.assertEqual([r.pk for r in results], [self.repo1.pk, self.repo2.pk])
+
+    def test_prefix_matches_full_name(self):
+        results = self.index.search('org/')
+        self.assertEqual({r.pk for r in results}, {self.repo2.pk, self.repo3.pk})
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search('d', limit=1)), 1)
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search('vue'), [])
+        self.assertEqual(self.index.search(''), [])
+
+    def test_incremental_update_on_data_change(self):
+        self.assertEqual(len(self.index.search('django')), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.objects.create(
+                github_id=4,
+                name='django-extra',
+                full_name='user/django-extra',
+                url='https://github.com/user/django-extra'
+            )
+            self.repo2.name = 'flask-utils'
+            self.repo2.full_name = 'org/flask-utils'
+            self.repo2.save()
+            self.repo1.delete()
+
+        names = [r.name for r in self.index.search('django')]
+        self.assertEqual(names, ['django-extra'])
+        self.assertEqual([r.name for r in self.index.search('flask')], ['flask-utils'])
+        self.assertEqual(len(self.index), 3)
+
+    def test_changes_are_applied_without_a_rebuild(self):
+        self.assertEqual(len(self.index.search('django')), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            late = Repository.objects.create(
+                github_id=4,
+                name='django-late',
+                full_name='user/django-late',
+                url='https://github.com/user/django-late'
+            )
+            # A long transaction: saved well before it commits
+            Repository.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+            self.repo3.name = 'react-native'
+            self.repo3.save()
+        with patch.object(self.index, '_rebuild', side_effect=AssertionError):
+            self.assertIn('django-late', [r.name for r in self.index.search('django')])
+            self.assertEqual([r.name for r in self.index.search('react')], ['react-native'])
+
+    def test_deletion_from_another_process(self):
+        self.assertEqual(len(self.index.search('react')), 1)
+        # Another process deleting the row only leaves a version bump behind
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM repos_repository WHERE id = %s', [self.repo3.pk])
+        bump_data_version()
+        self.assertEqual(self.index.search('react'), [])
+
+class RepositoryAutocompleteViewTests(TestCase):
+    def setUp(self):
+        repository_index.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.repo = Repository.objects.create(
+            github_id=1,
+            name='test-repo',
+            full_name='user/test-repo',
+            url='https://github.com/user/test-repo'
+        )
+
+    def test_returns_matches_as_json(self):
+        response = self.client.get(reverse('repos:repository_autocomplete'), {'q': 'tes'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'query': 'tes',
+            'results': [{
+                'id': self.repo.pk,
+                'name': 'test-repo',
+                'full_name': 'user/test-repo',
+                'url': reverse('repos:repository_detail', args=[self.repo.pk]),
+            }]
+        })
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('repos:repository_autocomplete'), {'q': 'tes'})
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,106 @@
+import csv
+import json
+import subprocess
+import sys
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+from click.testing import CliRunner
+from django.test import TestCase
+from django.utils import timezone
+from repos.models import Repository, RepositorySnapshot
+from repos.sorting import SORT_FIELDS
+from src import cli
+
+class OfflineListReposTests(TestCase):
+    def setUp(self):
+        self.runner = CliRunner()
+        today = timezone.localdate()
+        for i, (name, language, private) in enumerate([
+            ('alpha', 'Python', False),
+            ('Beta', 'Go', True),
+            ('gamma', 'Python', True),
+        ], start=1):
+            repo = Repository.objects.create(
+                github_id=i, name=name, full_name=f'user/{name}', url=f'https://github.com/user/{name}',
+                language=language, private=private, description=f'{name} project',
+            )
+            # Only the latest snapshot's stars are reported
+            RepositorySnapshot.objects.create(repository=repo, captured_on=today - timedelta(days=1), stars=1)
+            RepositorySnapshot.objects.create(repository=repo, captured_on=today, stars=i * 10)
+        Repository.objects.create(github_id=4, name='other', full_name='someone/other', url='https://github.com/someone/other')
+
+    def list_repos(self, *args):
+        result = self.runner.invoke(cli.cli, ['list-repos', *args])
+        self.assertEqual(result.exit_code, 0, result.output)
+        return result.output
+
+    def test_reads_database_without_token_or_github(self):
+        with patch.dict('os.environ', {'GITHUB_TOKEN': ''}), patch('github.Github') as mock_github:
+            output = self.list_repos('--username', 'user')
+        mock_github.assert_not_called()
+        lines = output.splitlines()
+        self.assertIn('Stars', lines[1])
+        self.assertEqual([line.split()[0] for line in lines[2:]], ['alpha', 'Beta', 'gamma'])
+        self.assertIn(' 20 ', lines[3])
+
+    def test_ndjson_is_filtered_and_sorted_by_the_database(self):
+        output = self.list_repos('--format', 'ndjson', '--language', 'python', '--sort', '-name')
+        rows = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['gamma', 'alpha'])
+        self.assertEqual(rows[0]['stars'], 30)
+        self.assertEqual(set(rows[0]), set(cli.REPO_FIELDS))
+
+    def test_json_and_csv(self):
+        rows = json.loads(self.list_repos('--format', 'json', '--private', '--limit', '1'))
+        self.assertEqual([row['name'] for row in rows], ['Beta'])
+
+        self.assertEqual(json.loads(self.list_repos('--format', 'json', '--query', 'nothing-matches')), [])
+
+        rows = list(csv.DictReader(StringIO(self.list_repos('--format', 'csv', '--public', '-q', 'oth'))))
+        self.assertEqual([row['full_name'] for row in rows], ['someone/other'])
+
+    def test_list_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.list_repos('--format', 'ndjson')
+
+    def test_sorts_like_the_web_list_without_loading_views(self):
+        self.assertEqual(cli.SORT_CHOICES, SORT_FIELDS)
+        result = subprocess.run(
+            [sys.executable, '-c', "import sys; from src import cli; cli.local_rows(sort='-name'); print('repos.views' in sys.modules)"],
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip(), 'False')
+
+class LiveListReposTests(TestCase):
+    def github_repo(self, name, language, private):
+        return SimpleNamespace(
+            name=name, full_name=f'user/{name}', description=None, language=language,
+            stargazers_count=5, private=private, updated_at=timezone.now(),
+        )
+
+    @patch.dict('os.environ', {'GITHUB_TOKEN': 'test-token'})
+    @patch('github.Github')
+    def test_live_streams_from_github(self, mock_github):
+        user = mock_github.return_value.get_user.return_value
+        user.get_repos.return_value = iter([
+            self.github_repo('alpha', 'Python', False),
+            self.github_repo('beta', 'Go', False),
+            self.github_repo('gamma', 'Python', True),
+        ])
+
+        result = CliRunner().invoke(cli.cli, [
+            'list-repos', '--live', '--username', 'user', '--format', 'ndjson',
+            '--language', 'python', '--public', '--sort', '-updated_at',
+        ])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        mock_github.assert_called_once_with('test-token', per_page=100)
+        user.get_repos.assert_called_once_with(sort='updated', direction='desc')
+        self.assertEqual([json.loads(line)['name'] for line in result.output.splitlines()], ['alpha'])
+
+    def test_live_rejects_database_only_sorts(self):
+        result = CliRunner().invoke(cli.cli, ['list-repos', '--live', '--sort', 'health_score'])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('--live can only sort by', result.output)
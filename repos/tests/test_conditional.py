@@ -0,0 +1,109 @@
+import time
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.utils.http import http_date
+from django.contrib.auth.models import User
+from repos.models import Repository, Branch
+from repos.versioning import get_data_version
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.repo = Repository.objects.create(
+            github_id=1,
+            name='test-repo',
+            full_name='user/test-repo',
+            url='https://github.com/user/test-repo'
+        )
+        Branch.objects.create(repository=self.repo, name='main', is_default=True, last_commit_sha='abc123')
+
+    def assertRevalidates(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # Only the session and user lookups behind login_required remain
+        self.assertLessEqual(len(queries), 2)
+        return etag
+
+    def test_repository_list(self):
+        etag = self.assertRevalidates(reverse('repos:repository_list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Repository.objects.create(
+                github_id=2,
+                name='other-repo',
+                full_name='user/other-repo',
+                url='https://github.com/user/other-repo'
+            )
+        response = self.client.get(reverse('repos:repository_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'other-repo')
+
+    def test_data_version_changes_on_commit(self):
+        version = get_data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.repo.save()
+            # Readers still see the old rows, so they must see the old version
+            self.assertEqual(get_data_version(), version)
+        self.assertGreater(get_data_version(), version)
+
+    def test_repository_list_etag_depends_on_filters(self):
+        etag = self.assertRevalidates(reverse('repos:repository_list'), query='test')
+        response = self.client.get(reverse('repos:repository_list'), {'query': 'other'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_repository_detail(self):
+        url = reverse('repos:repository_detail', kwargs={'pk': self.repo.pk})
+        etag = self.assertRevalidates(url)
+
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Branch.objects.create(repository=self.repo, name='develop', last_commit_sha='def456')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'develop')
+
+    def test_pending_messages_are_not_revalidated(self):
+        url = reverse('repos:repository_detail', kwargs={'pk': self.repo.pk})
+        Repository.objects.filter(pk=self.repo.pk).update(local_path='/nonexistent/test-repo')
+        self.client.post(reverse('repos:start_session', kwargs={'pk': self.repo.pk}))
+        # A client sending only If-Modified-Since must still see the message
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 3600))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        self.assertContains(response, 'Started new Windsurf session')
+
+    def test_ending_a_session_changes_last_modified(self):
+        url = reverse('repos:repository_detail', kwargs={'pk': self.repo.pk})
+        session = self.repo.start_session()
+        last_modified = self.client.get(url)['Last-Modified']
+        time.sleep(1)
+        session.end_session()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_repository_is_not_cached(self):
+        response = self.client.get(reverse('repos:repository_detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+    def test_export_api(self):
+        self.assertRevalidates(reverse('repos:api_repository_export'))
+        self.assertRevalidates(reverse('repos:api_branch_export', kwargs={'pk': self.repo.pk}))
+
+    @override_settings(ROOT_URLCONF='repomgr.urls_async')
+    def test_async_repository_detail(self):
+        self.assertRevalidates(reverse('repos:repository_detail', kwargs={'pk': self.repo.pk}))
@@ -0,0 +1,45 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from unittest.mock import patch, MagicMock
+from repomgr.db import pool_stats
+
+class PoolStatsTests(TestCase):
+    def test_persistent_connection_stats(self):
+        stats = pool_stats()
+        self.assertEqual(stats['mode'], 'persistent')
+        self.assertEqual(stats['role'], 'web')
+        self.assertIn('conn_max_age', stats)
+
+    def test_pool_stats(self):
+        pool = MagicMock()
+        pool.get_stats.return_value = {
+            'pool_min': 2,
+            'pool_max': 10,
+            'pool_size': 4,
+            'pool_available': 1,
+            'requests_num': 120,
+            'requests_queued': 7,
+            'requests_wait_ms': 350,
+        }
+        connection = MagicMock(vendor='postgresql', pool=pool)
+        with patch('repomgr.db.connections', {'default': connection}):
+            stats = pool_stats()
+        self.assertEqual(stats['mode'], 'pool')
+        self.assertEqual(stats['in_use'], 3)
+        self.assertEqual(stats['waits'], 7)
+        self.assertEqual(stats['wait_ms'], 350)
+        self.assertEqual(stats['timeouts'], 0)
+
+    def test_endpoint_is_staff_only(self):
+        User.objects.create_user(username='testuser', password='testpass123')
+        User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        client = Client()
+
+        client.login(username='testuser', password='testpass123')
+        self.assertEqual(client.get(reverse('db_pool_stats')).status_code, 302)
+
+        client.login(username='staff', password='testpass123')
+        response = client.get(reverse('db_pool_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['databases'][0]['alias'], 'default')
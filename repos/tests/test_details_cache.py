@@ -0,0 +1,180 @@
+import asyncio
+from unittest.mock import patch, MagicMock
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, Client, AsyncClient, override_settings
+from django.urls import reverse
+from repos.details_cache import RepositoryDetailsCache, details_query, details_from_graphql, repository_details
+from repos.models import Repository
+from repos.services import get_repository_details
+
+def node(stars):
+    return {
+        'stargazerCount': stars,
+        'forkCount': 2,
+        'issues': {'totalCount': 3},
+        'pullRequests': {'totalCount': 1},
+        'watchers': {'totalCount': 5},
+        'defaultBranchRef': {'name': 'main'},
+        'primaryLanguage': None,
+        'createdAt': '2024-01-01T00:00:00Z',
+        'updatedAt': '2024-02-01T00:00:00Z',
+        'pushedAt': None,
+    }
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class RepositoryDetailsCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = RepositoryDetailsCache(soft_ttl=60, hard_ttl=600, max_size=3, batch_window=0, clock=self.clock)
+        self.calls = []
+
+    def fetch(self, names):
+        self.calls.append(list(names))
+        return {name: {'stars': self.clock.now} for name in names}
+
+    def test_fresh_entries_are_served_from_cache(self):
+        self.assertEqual(self.cache.get('user/a', self.fetch), {'stars': 1000.0})
+        self.clock.now += 30
+        self.assertEqual(self.cache.get('user/a', self.fetch), {'stars': 1000.0})
+        self.assertEqual(self.calls, [['user/a']])
+
+    def test_stale_entries_are_served_while_refreshed_in_one_batch(self):
+        self.cache.prime_many({'user/a': {'stars': 1}, 'user/b': {'stars': 2}})
+        self.clock.now += 120
+
+        # Hold the refresh until both stale reads have been queued
+        with patch.object(self.cache, 'batch_window', 0.2):
+            self.assertEqual(self.cache.get('user/a', self.fetch), {'stars': 1})
+            self.assertEqual(self.cache.get('user/b', self.fetch), {'stars': 2})
+            self.cache.wait()
+
+        self.assertEqual(self.calls, [['user/a', 'user/b']])
+        self.assertEqual(self.cache.get('user/a', self.fetch), {'stars': 1120.0})
+
+    def test_expired_entries_are_fetched_before_returning(self):
+        self.cache.prime('user/a', {'stars': 1})
+        self.clock.now += 600
+        self.assertEqual(self.cache.get('user/a', self.fetch), {'stars': 1600.0})
+        self.assertEqual(self.calls, [['user/a']])
+
+    def test_failed_refresh_keeps_stale_value(self):
+        self.cache.prime('user/a', {'stars': 1})
+        self.clock.now += 120
+        failing = MagicMock(side_effect=Exception('GitHub is down'))
+        self.assertEqual(self.cache.get('user/a', failing), {'stars': 1})
+        self.cache.wait()
+        self.assertEqual(self.cache.get('user/a', self.fetch), {'stars': 1})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for name in ('user/a', 'user/b', 'user/c'):
+            self.cache.prime(name, {'stars': 0})
+        self.cache.get('user/a', self.fetch)
+        self.cache.prime('user/d', {'stars': 0})
+        self.assertEqual(len(self.cache), 3)
+        self.cache.get('user/b', self.fetch)
+        self.assertEqual(self.calls, [['user/b']])
+
+    def test_async_stale_refresh(self):
+        async def afetch(names):
+            self.calls.append(list(names))
+            return {name: {'stars': 'new'} for name in names}
+
+        async def scenario():
+            self.cache.prime('user/a', {'stars': 'old'})
+            self.clock.now += 120
+            self.assertEqual(await self.cache.aget('user/a', afetch), {'stars': 'old'})
+            await self.cache._task
+            return await self.cache.aget('user/a', afetch)
+
+        self.assertEqual(asyncio.run(scenario()), {'stars': 'new'})
+        self.assertEqual(self.calls, [['user/a']])
+
+    def test_graphql_query_round_trip(self):
+        query, variables, aliases = details_query(['user/a', 'org/b'])
+        self.assertIn('r1: repository(owner: $o1, name: $n1)', query)
+        self.assertEqual(variables, {'o0': 'user', 'n0': 'a', 'o1': 'org', 'n1': 'b'})
+
+        details = details_from_graphql({'data': {'r0': node(10), 'r1': None}}, aliases)
+        self.assertEqual(list(details), ['user/a'])
+        self.assertEqual(details['user/a']['open_issues'], 4)
+        self.assertEqual(details['user/a']['watchers'], 5)
+        self.assertIsNone(details['user/a']['language'])
+
+@patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+class RepositoryDetailsTests(TestCase):
+    def setUp(self):
+        repository_details.clear()
+        self.repo = Repository.objects.create(
+            github_id=1,
+            name='test-repo',
+            full_name='user/test-repo',
+            url='https://github.com/user/test-repo'
+        )
+
+    def tearDown(self):
+        repository_details.clear()
+
+    @patch('repos.transport.requests.Session')
+    def test_get_repository_details_is_cached(self, mock_session):
+        mock_session.return_value.post.return_value.json.return_value = {'data': {'r0': node(10)}}
+        details = get_repository_details(self.repo)
+        self.assertEqual(details['stars'], 10)
+        details = get_repository_details(self.repo)
+        self.assertEqual(details['stars'], 10)
+
+        mock_session.return_value.post.assert_called_once()
+
+    @patch('repos.transport.requests.Session')
+    def test_stale_entries_from_different_requests_share_a_batch(self, mock_session):
+        mock_session.return_value.post.return_value.json.return_value = {'data': {'r0': node(1), 'r1': node(2)}}
+        other = Repository.objects.create(
+            github_id=2,
+            name='other-repo',
+            full_name='user/other-repo',
+            url='https://github.com/user/other-repo'
+        )
+        repository_details.prime_many({'user/test-repo': {'stars': 0}, 'user/other-repo': {'stars': 0}})
+
+        with patch.object(repository_details, 'soft_ttl', 0), patch.object(repository_details, 'batch_window', 0.2):
+            get_repository_details(self.repo)
+            get_repository_details(other)
+            repository_details.wait()
+
+        mock_session.return_value.post.assert_called_once()
+        self.assertEqual(repository_details.get('user/other-repo', None)['stars'], 2)
+
+    def test_detail_page_shows_details(self):
+        User.objects.create_user(username='testuser', password='testpass123')
+        client = Client()
+        client.login(username='testuser', password='testpass123')
+        repository_details.prime('user/test-repo', {'stars': 7, 'forks': 3, 'open_issues': 2, 'watchers': 5})
+
+        response = client.get(reverse('repos:repository_detail', args=[self.repo.pk]))
+        self.assertContains(response, '7 stars, 3 forks, 2 open issues, 5 watchers')
+
+    @patch('repos.transport.requests.Session')
+    def test_detail_page_renders_when_github_fails(self, mock_session):
+        mock_session.return_value.post.side_effect = ConnectionError('unreachable')
+        User.objects.create_user(username='testuser', password='testpass123')
+        client = Client()
+        client.login(username='testuser', password='testpass123')
+
+        response = client.get(reverse('repos:repository_detail', args=[self.repo.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['details'])
+
+    @override_settings(ROOT_URLCONF='repomgr.urls_async')
+    async def test_async_detail_page_shows_details(self):
+        user = await User.objects.acreate_user(username='testuser', password='testpass123')
+        client = AsyncClient()
+        await client.aforce_login(user)
+        repository_details.prime('user/test-repo', {'stars': 7, 'forks': 3, 'open_issues': 2, 'watchers': 5})
+
+        response = await client.get(reverse('repos:repository_detail', args=[self.repo.pk]))
+        self.assertContains(response, '7 stars, 3 forks, 2 open issues, 5 watchers')
@@ -0,0 +1,59 @@
+import json
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from django.test import TestCase, override_settings
+from benchmarks.fake_github import FakeGitHub, serve
+from repos.models import Repository, Branch, RepositorySnapshot
+from repos.services import GitHubService
+
+def get(url, headers=None):
+    with urlopen(Request(url, headers=headers or {})) as response:
+        return response.status, dict(response.headers), json.loads(response.read() or 'null')
+
+class FakeGitHubTests(TestCase):
+    def test_pagination_etags_and_rate_limit(self):
+        fake = FakeGitHub(repositories=5, branches=1, rate_limit=3)
+        with serve(fake) as base_url:
+            status, headers, page = get(f'{base_url}/user/repos?per_page=2&affiliation=owner')
+            self.assertEqual([repo['name'] for repo in page], ['repo-00000', 'repo-00001'])
+            self.assertIn(f'<{base_url}/user/repos?per_page=2&affiliation=owner&page=2>; rel="next"', headers['Link'])
+            self.assertIn('page=3>; rel="last"', headers['Link'])
+            self.assertEqual(headers['X-RateLimit-Remaining'], '2')
+
+            # A matching ETag is answered with 304 and costs nothing
+            with self.assertRaises(HTTPError) as cm:
+                get(f'{base_url}/user/repos?per_page=2&affiliation=owner', {'If-None-Match': headers['ETag']})
+            self.assertEqual(cm.exception.code, 304)
+
+            get(f'{base_url}/repos/bench/repo-00004')
+            get(f'{base_url}/repos/bench/repo-00004/branches')
+            with self.assertRaises(HTTPError) as cm:
+                get(f'{base_url}/user')
+            self.assertEqual(cm.exception.code, 403)
+            self.assertEqual(cm.exception.headers['X-RateLimit-Remaining'], '0')
+
+            stats = fake.stats()
+            self.assertEqual(stats['not_modified'], 1)
+            self.assertEqual(stats['by_endpoint'], {'user_repos': 2, 'repository': 1, 'branches': 1, 'user': 1})
+
+@override_settings(GITHUB_MIN_REQUEST_INTERVAL=0)
+@patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+class SyncAgainstFakeGitHubTests(TestCase):
+    def test_sync_repositories(self):
+        # 35 branches span two pages of PyGithub's default 30
+        fake = FakeGitHub(repositories=3, branches=35)
+        with serve(fake) as base_url, override_settings(GITHUB_API_URL=base_url):
+            synced = GitHubService().sync_repositories()
+
+        self.assertEqual(len(synced), 3)
+        self.assertEqual(Repository.objects.count(), 3)
+        self.assertEqual(Branch.objects.count(), 105)
+        self.assertEqual(RepositorySnapshot.objects.count(), 3)
+        repo = Repository.objects.get(name='repo-00001')
+        self.assertEqual(repo.branch_count, 35)
+        self.assertEqual(repo.default_branch_sha, Branch.objects.get(repository=repo, name='main').last_commit_sha)
+        self.assertEqual(
+            fake.stats()['by_endpoint'],
+            {'user': 2, 'user_repos': 1, 'user_starred': 1, 'repository': 3, 'branches': 6, 'commit': 105},
+        )
@@ -0,0 +1,123 @@
+import uuid
+from unittest.mock import patch
+from django.test import TestCase, Client, AsyncClient, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from repos.models import Repository
+from repos.progress import ImportProgress
+
+class ImportProgressTests(TestCase):
+    def test_events_are_read_after_last_id(self):
+        progress = ImportProgress(uuid.uuid4())
+        self.assertTrue(progress.start())
+        progress.emit('repositories: page 1/2 fetched', page=1, pages=2)
+        progress.emit('repositories: page 2/2 fetched', page=2, pages=2)
+        progress.finish('done')
+
+        self.assertEqual([e['message'] for e in progress.events(after=1)], ['repositories: page 2/2 fetched', 'done'])
+        self.assertEqual(progress.status()['status'], 'finished')
+
+    def test_start_claims_job_once(self):
+        progress = ImportProgress(uuid.uuid4())
+        self.assertTrue(progress.start())
+        self.assertFalse(progress.start())
+        progress.fail('boom')
+        self.assertTrue(progress.start())
+
+    def test_failed_job_is_restarted_once(self):
+        progress = ImportProgress(uuid.uuid4())
+        progress.start()
+        progress.fail('boom')
+        with patch.object(ImportProgress, 'status', return_value=progress.status()):
+            # Both callers saw the job failed before either restarted it
+            self.assertTrue(progress.start())
+            self.assertFalse(ImportProgress(progress.job_id).start())
+        progress.fail('boom again')
+        self.assertTrue(progress.start())
+
+class ImportProgressViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.repo = Repository.objects.create(
+            github_id=1,
+            name='test-repo',
+            full_name='user/test-repo',
+            url='https://github.com/user/test-repo'
+        )
+        self.job_id = uuid.uuid4()
+
+    def test_import_form_carries_progress_stream(self):
+        response = self.client.get(reverse('repos:repository_import'))
+        progress_id = response.context['form']['progress_id'].value()
+        self.assertEqual(
+            response.context['progress_url'],
+            reverse('repos:repository_import_progress', args=[progress_id])
+        )
+
+    @patch('repos.views.GitHubService')
+    def test_import_reports_progress(self, mock_github_service):
+        def sync(username=None, affiliation='owner', progress=None, trigger=''):
+            progress.emit('user/test-repo: 3 branches written')
+            return [self.repo]
+        mock_github_service.return_value.sync_repositories.side_effect = sync
+
+        response = self.client.post(reverse('repos:repository_import'), {
+            'include_private': True,
+            'include_organization': True,
+            'include_collaborations': True,
+            'progress_id': str(self.job_id)
+        })
+        self.assertRedirects(response, reverse('repos:repository_list'))
+
+        progress = ImportProgress(self.job_id)
+        self.assertEqual(progress.status()['status'], 'finished')
+        self.assertEqual(progress.events()[0]['message'], 'user/test-repo: 3 branches written')
+
+    @patch('repos.views.GitHubService')
+    def test_reposting_running_import_does_not_restart_it(self, mock_github_service):
+        ImportProgress(self.job_id).start()
+        response = self.client.post(reverse('repos:repository_import'), {
+            'progress_id': str(self.job_id)
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['import_running'])
+        mock_github_service.assert_not_called()
+
+    def test_event_stream_is_not_buffered(self):
+        progress = ImportProgress(self.job_id)
+        progress.start()
+        progress.emit('repositories: page 1/2 fetched')
+
+        response = self.client.get(reverse('repos:repository_import_progress', args=[self.job_id]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = iter(response.streaming_content)
+        self.assertEqual(next(chunks).decode(), 'retry: 2000\n\n')
+        # Delivered while the import is still running
+        self.assertIn('repositories: page 1/2 fetched', next(chunks).decode())
+
+        progress.emit('repositories: page 2/2 fetched')
+        progress.finish('Import of 2 repositories completed successfully!')
+        body = b''.join(chunks).decode()
+        self.assertIn('id: 2\nevent: progress\n', body)
+        self.assertIn('event: finished\n', body)
+
+    @override_settings(ROOT_URLCONF='repomgr.urls_async')
+    async def test_event_stream(self):
+        progress = ImportProgress(self.job_id)
+        progress.start()
+        progress.emit('repositories: page 1/1 fetched')
+        progress.finish('Import of 1 repositories completed successfully!')
+
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(
+            reverse('repos:repository_import_progress', args=[self.job_id]),
+            HTTP_LAST_EVENT_ID='0'
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertIn('id: 1\nevent: progress\n', body)
+        self.assertIn('repositories: page 1/1 fetched', body)
+        self.assertIn('event: finished\n', body)
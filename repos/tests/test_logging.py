@@ -0,0 +1,93 @@
+import logging
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from benchmarks.fake_github import FakeGitHub, serve
+from repomgr.log import DebugSampler, QueuedHandler
+from repos.services import GitHubService
+
+def record(message, level=logging.DEBUG, *args):
+    return logging.LogRecord('repos.services', level, __file__, 1, message, args, None)
+
+class BlockingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.unblock.wait(5)
+        self.records.append(record.getMessage())
+
+class QueuedHandlerTests(SimpleTestCase):
+    def test_writes_rotate_in_the_background(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'repomgr.log')
+            handler = QueuedHandler([{
+                'class': 'logging.handlers.RotatingFileHandler',
+                'filename': filename, 'maxBytes': 200, 'backupCount': 2,
+            }])
+            for number in range(100):
+                handler.handle(record('line %d', logging.INFO, number))
+            handler.close()
+
+            self.assertTrue(os.path.exists(f'{filename}.1'))
+            with open(filename) as log:
+                self.assertIn('line 99', log.read())
+
+    def test_records_are_dropped_when_the_queue_is_full(self):
+        handler = QueuedHandler([{'class': f'{__name__}.BlockingHandler'}], max_size=2)
+        target = handler.listener.handlers[0]
+        for number in range(10):
+            handler.handle(record('line %d', logging.INFO, number))
+        target.unblock.set()
+        handler.close()
+        self.assertGreater(handler.dropped, 0)
+        # The count of dropped records is logged once there is room
+        *written, report = target.records
+        self.assertEqual(report, f'{handler.dropped} log records dropped, the log queue was full')
+        self.assertEqual(len(written) + handler.dropped, 10)
+
+    def test_forked_processes_write_their_records(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'repomgr.log')
+            handler = QueuedHandler([{'class': 'logging.FileHandler', 'filename': filename}])
+            handler.handle(record('from the parent', logging.INFO))
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    handler.handle(record('from the child', logging.INFO))
+                    handler.close()
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+            handler.close()
+            with open(filename) as log:
+                self.assertEqual(sorted(log.read().splitlines()), ['from the child', 'from the parent'])
+
+class DebugSamplerTests(SimpleTestCase):
+    def test_repeated_debug_messages_are_sampled(self):
+        sampler = DebugSampler(every=3)
+        passed = [sampler.filter(record('Fetched %d items', logging.DEBUG, n)) for n in range(7)]
+        self.assertEqual(passed, [True, False, False, True, False, False, True])
+        self.assertTrue(sampler.filter(record('Other message')))
+        self.assertTrue(all(sampler.filter(record('Fetched %d items', logging.INFO, n)) for n in range(3)))
+
+@override_settings(GITHUB_MIN_REQUEST_INTERVAL=0)
+@patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+class SyncLoggingTests(TestCase):
+    @patch.object(GitHubService, 'LOG_SUMMARY_EVERY', 2)
+    def test_repositories_are_summarized(self):
+        with serve(FakeGitHub(repositories=5, branches=3)) as base_url, override_settings(GITHUB_API_URL=base_url):
+            service = GitHubService()
+            with self.assertLogs('repos.services', logging.INFO) as logs:
+                service.sync_repositories()
+
+        messages = [line.split(':', 2)[2] for line in logs.output]
+        self.assertIn('Synced 2/5 repositories (6 branches, 2 without local checkout)', messages)
+        self.assertIn('Synced 4/5 repositories (12 branches, 4 without local checkout)', messages)
+        self.assertTrue(any(m.startswith('Sync complete. Total repositories synced: 5 (15 branches') for m in messages))
+        # Nothing is logged per repository at INFO
+        self.assertFalse(any('repo-' in m for m in messages))
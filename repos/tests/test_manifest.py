@@ -0,0 +1,248 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+from click.testing import CliRunner
+from django.test import TestCase
+from repos.manifest import load_manifest, parse_manifest
+from repos.models import Repository, Branch
+from repos.services import GitHubService, RateLimitGate
+from repos.versioning import get_data_version
+from src import cli
+
+def repo_payload(github_id, name, owner='user'):
+    return {
+        'id': github_id,
+        'name': name,
+        'full_name': f'{owner}/{name}',
+        'html_url': f'https://github.com/{owner}/{name}',
+        'description': None,
+        'private': True,
+        'fork': False,
+        'created_at': '2024-01-01T00:00:00Z',
+        'updated_at': '2024-01-01T00:00:00Z',
+        'pushed_at': None,
+        'size': 0,
+        'language': None,
+        'default_branch': 'main',
+        'owner': {'login': owner, 'type': 'User'},
+    }
+
+def response(status_code=200, data=None, headers=None):
+    mock = MagicMock(status_code=status_code, headers=headers or {}, ok=status_code < 400)
+    mock.json.return_value = data
+    mock.text = json.dumps(data)
+    if status_code >= 400:
+        mock.raise_for_status.side_effect = Exception(f'HTTP {status_code}')
+    return mock
+
+class ManifestTests(TestCase):
+    def test_defaults_and_bare_names(self):
+        organization, specs = parse_manifest({
+            'organization': 'team',
+            'defaults': {'private': True},
+            'repositories': ['web', {'name': 'api', 'description': 'API', 'auto_init': False}],
+        })
+        self.assertEqual(organization, 'team')
+        self.assertEqual(specs, [
+            {'private': True, 'auto_init': True, 'name': 'web'},
+            {'private': True, 'auto_init': False, 'name': 'api', 'description': 'API'},
+        ])
+
+    def test_invalid_manifests(self):
+        for data, message in [
+            ([], 'must be a mapping'),
+            ({'repositories': []}, 'no repositories'),
+            ({'repositories': ['ok'], 'extra': 1}, 'Unknown manifest keys'),
+            ({'repositories': [{'name': 'x', 'visibility': 'internal'}]}, 'Unknown keys in repository #1'),
+            ({'repositories': ['has space']}, 'invalid name'),
+            ({'repositories': ['web', 'Web']}, 'more than once'),
+        ]:
+            with self.subTest(message=message), self.assertRaisesMessage(ValueError, message):
+                parse_manifest(data)
+
+    def test_load_yaml(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as manifest:
+            manifest.write('repositories:\n  - name: web\n    private: true\n')
+        self.addCleanup(os.unlink, manifest.name)
+        self.assertEqual(load_manifest(manifest.name), (None, [{'private': True, 'auto_init': True, 'name': 'web'}]))
+
+class RateLimitGateTests(TestCase):
+    def test_retry_after_pauses_every_caller(self):
+        now = [1000.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        gate = RateLimitGate(sleep=sleep, clock=lambda: now[0])
+        self.assertTrue(gate.observe(response(403, {'message': 'secondary rate limit'}, {'Retry-After': '30'})))
+        gate.wait()
+        gate.wait()
+        self.assertEqual(sleeps, [30.0])
+
+    def test_retry_after_as_http_date(self):
+        now = [1000.0]
+        gate = RateLimitGate(sleep=lambda seconds: now.__setitem__(0, now[0] + seconds), clock=lambda: now[0])
+        resume = format_datetime(datetime.fromtimestamp(1045, timezone.utc), usegmt=True)
+        self.assertTrue(gate.observe(response(429, {'message': 'slow down'}, {'Retry-After': resume})))
+        gate.wait()
+        self.assertEqual(now[0], 1045)
+        # Unparseable values fall back to the default wait
+        self.assertTrue(gate.observe(response(429, {'message': 'slow down'}, {'Retry-After': 'soon'})))
+        gate.wait()
+        self.assertEqual(now[0], 1045 + RateLimitGate.DEFAULT_WAIT)
+
+    def test_exhausted_primary_limit_waits_for_reset(self):
+        now = [1000.0]
+        gate = RateLimitGate(sleep=lambda seconds: now.__setitem__(0, now[0] + seconds), clock=lambda: now[0])
+        # The last allowed call succeeds but later ones must wait for the reset
+        self.assertFalse(gate.observe(response(201, {}, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1100'})))
+        gate.wait()
+        self.assertEqual(now[0], 1100)
+        self.assertFalse(gate.observe(response(404, {'message': 'Not Found'})))
+
+class CreateRepositoriesTests(TestCase):
+    @patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+    @patch('repos.services.Github')
+    @patch('repos.transport.requests.Session')
+    def setUp(self, mock_session, mock_github):
+        mock_github.return_value.get_user.return_value.login = 'user'
+        self.service = GitHubService()
+        self.service._get_all_pages = MagicMock(return_value=[repo_payload(1, 'Existing')])
+        self.calls = []
+        self.lock = threading.Lock()
+        self.service.session.request.side_effect = self.github
+
+    def github(self, method, url, json=None):
+        with self.lock:
+            self.calls.append((method, url))
+        if method == 'post':
+            if json['name'] == 'broken':
+                return response(500, {'message': 'Server Error'})
+            if json['name'] == 'racing':
+                return response(422, {'message': 'Validation Failed', 'errors': [{'message': 'name already exists on this account'}]})
+            return response(201, repo_payload(sum(map(ord, json['name'])), json['name']))
+        if url.endswith('/repos/user/racing'):
+            return response(200, repo_payload(50, 'racing'))
+        name = url.split('/branches/')[0].rsplit('/', 1)[1]
+        return response(200, {'name': 'main', 'commit': {'sha': f'{name}-sha', 'commit': {'message': 'Initial commit'}}})
+
+    def test_creates_missing_repositories_and_registers_them_in_bulk(self):
+        specs = [
+            {'name': 'existing', 'private': True, 'auto_init': True},
+            {'name': 'web', 'private': True, 'auto_init': True},
+            {'name': 'api', 'private': True, 'auto_init': False},
+            {'name': 'racing', 'private': True, 'auto_init': True},
+            {'name': 'broken', 'private': True, 'auto_init': True},
+        ]
+        version = get_data_version()
+
+        results = self.service.create_repositories(specs, max_workers=3)
+
+        self.assertEqual(
+            [(result['name'], result['status']) for result in results],
+            [('existing', 'exists'), ('web', 'created'), ('api', 'created'), ('racing', 'exists'), ('broken', 'failed')],
+        )
+        self.assertIn('HTTP 500', results[4]['error'])
+        self.assertEqual(sum(method == 'post' for method, _ in self.calls), 4)
+        self.assertEqual(
+            set(Repository.objects.values_list('name', flat=True)),
+            {'Existing', 'web', 'api', 'racing'},
+        )
+        web = Repository.objects.get(name='web')
+        self.assertEqual((web.branch_count, web.default_branch_sha), (1, 'web-sha'))
+        self.assertEqual(list(Branch.objects.values_list('repository__name', 'name', 'is_default')), [('web', 'main', True)])
+        self.assertEqual(Repository.objects.get(name='api').branch_count, 0)
+        self.assertGreater(get_data_version(), version)
+
+    def test_rerun_creates_nothing(self):
+        specs = [{'name': 'web', 'private': True, 'auto_init': True}]
+        self.service.create_repositories(specs)
+        self.service._get_all_pages.return_value = [repo_payload(sum(map(ord, 'web')), 'web')]
+        self.calls.clear()
+
+        results = self.service.create_repositories(specs)
+
+        self.assertEqual(results[0]['status'], 'exists')
+        self.assertEqual(self.calls, [])
+        self.assertEqual(Repository.objects.filter(name='web').count(), 1)
+        self.assertEqual(Branch.objects.count(), 1)
+
+    def test_existing_repositories_get_their_branches(self):
+        branch = SimpleNamespace(name='main', commit=SimpleNamespace(sha='existing-sha', commit=SimpleNamespace(message='Initial commit')))
+        github_repo = self.service.client.get_repo.return_value
+        github_repo.default_branch = 'main'
+        github_repo.get_branches.return_value = [branch]
+        specs = [{'name': 'existing', 'private': True, 'auto_init': True}]
+
+        self.service.create_repositories(specs)
+
+        self.service.client.get_repo.assert_called_once_with('user/Existing')
+        existing = Repository.objects.get(name='Existing')
+        self.assertEqual((existing.branch_count, existing.default_branch_sha), (1, 'existing-sha'))
+        # Once synced they are left to the regular sync
+        self.service.client.get_repo.reset_mock()
+        self.service.create_repositories(specs)
+        self.service.client.get_repo.assert_not_called()
+
+    def test_dry_run_writes_nothing(self):
+        results = self.service.create_repositories([{'name': 'web', 'private': True, 'auto_init': True}], dry_run=True)
+        self.assertEqual(results[0]['status'], 'would_create')
+        self.assertEqual(self.calls, [])
+        self.assertFalse(Repository.objects.exists())
+
+    def test_rate_limited_creation_is_retried(self):
+        now = [0.0]
+        sleep = MagicMock(side_effect=lambda seconds: now.__setitem__(0, now[0] + seconds))
+        gate = RateLimitGate(sleep=sleep, clock=lambda: now[0])
+        replies = iter([
+            response(403, {'message': 'You have exceeded a secondary rate limit'}, {'Retry-After': '1'}),
+            response(201, repo_payload(7, 'web')),
+        ])
+        self.service.session.request.side_effect = lambda method, url, json=None: next(replies)
+
+        results = self.service.create_repositories([{'name': 'web', 'private': True, 'auto_init': False}], gate=gate)
+
+        self.assertEqual(results[0]['status'], 'created')
+        self.assertEqual(self.service.session.request.call_count, 2)
+        sleep.assert_called_once_with(1.0)
+
+    def test_organization_manifest_posts_to_the_organization(self):
+        self.service.create_repositories([{'name': 'web', 'private': True, 'auto_init': False}], organization='team')
+        self.service._get_all_pages.assert_called_once_with('https://api.github.com/orgs/team/repos', params={'type': 'all'})
+        self.assertEqual(self.calls, [('post', 'https://api.github.com/orgs/team/repos')])
+
+class CreateReposCommandTests(TestCase):
+    @patch('repos.services.GitHubService')
+    def test_reports_results_and_fails_on_errors(self, mock_service):
+        mock_service.return_value.create_repositories.return_value = [
+            {'name': 'web', 'status': 'created', 'url': 'https://github.com/user/web', 'error': None},
+            {'name': 'api', 'status': 'failed', 'url': None, 'error': 'HTTP 500'},
+        ]
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('manifest.yaml', 'w') as manifest:
+                manifest.write('repositories: [web, api]\n')
+            result = runner.invoke(cli.cli, ['create-repos', '--from', 'manifest.yaml', '--concurrency', '2'])
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('https://github.com/user/web', result.output)
+        self.assertIn('1 created, 1 failed', result.output)
+        args, kwargs = mock_service.return_value.create_repositories.call_args
+        self.assertEqual([spec['name'] for spec in args[0]], ['web', 'api'])
+        self.assertEqual(kwargs, {'organization': None, 'max_workers': 2, 'dry_run': False})
+
+    def test_invalid_manifest_is_a_usage_error(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            with open('manifest.yaml', 'w') as manifest:
+                manifest.write('repositories: []\n')
+            result = runner.invoke(cli.cli, ['create-repos', '--from', 'manifest.yaml'])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn('no repositories', result.output)
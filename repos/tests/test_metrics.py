@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from benchmarks.fake_github import FakeGitHub, serve
+from repomgr import metrics
+from repos.details_cache import RepositoryDetailsCache
+from repos.models import Repository, SyncRun
+from repos.services import GitHubService
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+
+    def test_request_latency_per_view(self):
+        labels = {'view': 'repos:repository_list', 'method': 'GET', 'status': '200'}
+        before = sample('repomgr_http_request_duration_seconds_count', **labels)
+        self.client.get(reverse('repos:repository_list'))
+        self.client.get('/no-such-page/')
+        self.assertEqual(sample('repomgr_http_request_duration_seconds_count', **labels), before + 1)
+        self.assertGreater(sample(
+            'repomgr_http_request_duration_seconds_count', view='unresolved', method='GET', status='404'
+        ), 0)
+
+    def test_queries_are_timed(self):
+        before = sample('repomgr_db_query_duration_seconds_count', alias='default')
+        with connection.execute_wrapper(lambda execute, *args: execute(*args)):
+            Repository.objects.count()
+        # The temporary wrapper is gone, the timing one stays
+        self.assertIn(metrics.time_query, connection.execute_wrappers)
+        Repository.objects.count()
+        self.assertEqual(sample('repomgr_db_query_duration_seconds_count', alias='default'), before + 2)
+
+    def test_cache_hits_and_misses(self):
+        cache = RepositoryDetailsCache(soft_ttl=60, hard_ttl=120, max_size=10)
+        counts = {result: sample('repomgr_cache_requests_total', cache='repository_details', result=result)
+                  for result in ('hit', 'miss')}
+        fetch = lambda keys: {key: {'stars': 1} for key in keys}
+        cache.get('octo/hello', fetch)
+        cache.get('octo/hello', fetch)
+        self.assertEqual(sample('repomgr_cache_requests_total', cache='repository_details', result='miss'), counts['miss'] + 1)
+        self.assertEqual(sample('repomgr_cache_requests_total', cache='repository_details', result='hit'), counts['hit'] + 1)
+
+        before = sample('repomgr_cache_requests_total', cache='conditional_get', result='hit')
+        url = reverse('repos:repository_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(sample('repomgr_cache_requests_total', cache='conditional_get', result='hit'), before + 1)
+
+    @override_settings(GITHUB_MIN_REQUEST_INTERVAL=0)
+    @patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+    def test_github_calls_and_rate_limit(self):
+        labels = {'endpoint': 'GET /repos/{owner}/{repo}/branches', 'status': '200'}
+        before = sample('repomgr_github_request_duration_seconds_count', **labels)
+        with serve(FakeGitHub(repositories=2, branches=1, rate_limit=1000)) as base_url, \
+                override_settings(GITHUB_API_URL=base_url):
+            GitHubService().sync_repositories()
+        self.assertEqual(sample('repomgr_github_request_duration_seconds_count', **labels), before + 2)
+        remaining = sample(
+            'repomgr_github_rate_limit_remaining',
+            token=metrics.token_fingerprint('token fake-token'), resource='core',
+        )
+        self.assertLess(remaining, 1000)
+        self.assertGreater(remaining, 0)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_endpoint(self):
+        SyncRun.objects.create()
+        # Crashed or killed long ago, never finished
+        SyncRun.objects.create(started_at=timezone.now() - timedelta(days=1))
+        self.client.logout()
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('repomgr_sync_jobs_running 1.0', body)
+        self.assertIn('# TYPE repomgr_http_request_duration_seconds histogram', body)
+        # Tokens are only ever exposed as fingerprints
+        self.assertNotIn('fake-token', body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_need_a_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+class MultiprocessMetricsTests(TestCase):
+    def run_python(self, code, directory):
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=directory)
+        result = subprocess.run(
+            [sys.executable, '-c', f'import django; django.setup(); from repomgr import metrics; {code}'],
+            env=env, capture_output=True, text=True, check=True,
+        )
+        return result.stdout
+
+    def test_samples_from_all_processes_are_merged(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for _ in range(2):
+                self.run_python("metrics.count_cache('test', 'hit')", directory)
+            output = self.run_python(
+                'print(metrics.generate_latest(metrics.scrape_registry()).decode())', directory
+            )
+        self.assertIn('repomgr_cache_requests_total{cache="test",result="hit"} 2.0', output)
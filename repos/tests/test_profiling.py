@@ -0,0 +1,91 @@
+import time
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from benchmarks.fake_github import FakeGitHub, serve
+from repomgr.profiling import ProfilingMiddleware, save_profile, summarize
+from repos.models import Profile, Repository, SyncRun
+from repos.services import GitHubService
+
+def slow_view(request):
+    Repository.objects.count()
+    time.sleep(0.2)
+    return HttpResponse('done')
+
+def fast_view(request):
+    return HttpResponse('done')
+
+@override_settings(PROFILE_SLOW_REQUEST_SECONDS=0.05, PROFILE_SAMPLE_INTERVAL=0.005)
+class ProfilingMiddlewareTests(TestCase):
+    def test_slow_requests_are_sampled(self):
+        ProfilingMiddleware(slow_view)(RequestFactory().get('/slow/?page=2'))
+
+        profile = Profile.objects.get()
+        self.assertEqual((profile.kind, profile.method, profile.path), (Profile.REQUEST, 'GET', '/slow/?page=2'))
+        self.assertEqual(profile.status_code, 200)
+        self.assertEqual(profile.query_count, 1)
+        self.assertGreaterEqual(profile.duration, 0.2)
+        self.assertGreater(profile.samples, 5)
+        stacks = bytes(profile.data).decode().splitlines()
+        # Frames start below the middleware and end in the sleeping view
+        self.assertTrue(stacks[0].startswith(f'{__name__}:slow_view '))
+        self.assertIn(f'{__name__}:slow_view', summarize(profile))
+
+    def test_fast_requests_are_not_kept(self):
+        ProfilingMiddleware(fast_view)(RequestFactory().get('/fast/'))
+        self.assertFalse(Profile.objects.exists())
+
+    @override_settings(PROFILE_SLOW_REQUEST_SECONDS=0)
+    def test_disabled_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(fast_view)
+
+    @override_settings(PROFILE_KEEP=2)
+    def test_only_the_latest_are_kept(self):
+        for _ in range(3):
+            save_profile(kind=Profile.REQUEST, path='/', duration=1, data=b'')
+        self.assertEqual(Profile.objects.count(), 2)
+
+@override_settings(GITHUB_MIN_REQUEST_INTERVAL=0)
+@patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+class SyncProfilingTests(TestCase):
+    def sync(self):
+        with serve(FakeGitHub(repositories=2, branches=2)) as base_url, override_settings(GITHUB_API_URL=base_url):
+            GitHubService().sync_repositories()
+
+    @override_settings(PROFILE_SYNC_SAMPLE_RATE=1)
+    def test_sampled_syncs_are_profiled(self):
+        self.sync()
+        profile = Profile.objects.get()
+        self.assertEqual(profile.kind, Profile.SYNC)
+        self.assertEqual(profile.sync_run, SyncRun.objects.get())
+        self.assertGreater(profile.query_count, 0)
+        self.assertIn('_sync_repositories', summarize(profile))
+
+    @override_settings(PROFILE_SYNC_SAMPLE_RATE=0)
+    def test_unsampled_syncs_are_not(self):
+        self.sync()
+        self.assertTrue(SyncRun.objects.exists())
+        self.assertFalse(Profile.objects.exists())
+
+class ProfileAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.profile = save_profile(
+            kind=Profile.REQUEST, method='GET', path='/repos/', duration=2.5, samples=3,
+            data=b'repos.views:repository_list;django.db:execute 2\nrepos.views:repository_list 1\n',
+        )
+
+    def test_profiles_are_listed_and_downloadable(self):
+        response = self.client.get(reverse('admin:repos_profile_changelist'))
+        self.assertContains(response, self.profile.filename)
+
+        response = self.client.get(reverse('admin:repos_profile_change', args=[self.profile.pk]))
+        self.assertContains(response, '66.7%  django.db:execute')
+
+        response = self.client.get(reverse('admin:repos_profile_download', args=[self.profile.pk]))
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="profile-{self.profile.pk}.txt"')
+        self.assertEqual(response.content, bytes(self.profile.data))
@@ -0,0 +1,147 @@
+import logging
+import uuid
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from repomgr.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, QueryCounter, query_budget, query_shape
+from repos import async_views, views
+from repos.models import Repository, Branch, RepositorySnapshot
+from repos.progress import ImportProgress
+from repos.urls import build_urlpatterns, urlpatterns
+
+# url name: (method, url args, query string or POST data)
+CASES = {
+    'repository_list': ('get', lambda data: [], {'sort': '-health_score'}),
+    'repository_autocomplete': ('get', lambda data: [], {'q': 'repo'}),
+    'repository_import': ('get', lambda data: [], {}),
+    'repository_import_progress': ('get', lambda data: [data['job_id']], {}),
+    'repository_create': ('get', lambda data: [], {}),
+    'repository_detail': ('get', lambda data: [data['repository'].pk], {}),
+    'repository_delete': ('get', lambda data: [data['repository'].pk], {}),
+    'start_session': ('post', lambda data: [data['repository'].pk], {}),
+    'end_session': ('post', lambda data: [data['repository'].pk, data['session'].pk], {'notes': 'done'}),
+    'session_list': ('get', lambda data: [data['repository'].pk], {}),
+    'api_repository_export': ('get', lambda data: [], {'include': 'branches', 'format': 'json'}),
+    'api_branch_export': ('get', lambda data: [data['repository'].pk], {}),
+}
+
+def seed(count):
+    """``count`` more repositories with ``count`` branches, sessions and a
+    snapshot each, so that every page has ``count``-sized collections to show"""
+    first = Repository.objects.count()
+    repositories = []
+    for i in range(first, first + count):
+        repo = Repository.objects.create(
+            github_id=1000 + i, name=f'repo-{i}', full_name=f'user/repo-{i}',
+            url=f'https://github.com/user/repo-{i}', local_path=f'/nonexistent/repo-{i}',
+        )
+        for name in ['main'] + [f'feature-{n}' for n in range(count)]:
+            Branch.objects.create(repository=repo, name=name, is_default=name == 'main', last_commit_sha='a' * 40)
+        repo.refresh_branch_state()
+        for _ in range(count):
+            repo.start_session(branch=repo.branches.get(is_default=True))
+        RepositorySnapshot.objects.create(repository=repo, stars=i)
+        repositories.append(repo)
+    progress = ImportProgress(uuid.uuid4())
+    progress.start()
+    progress.finish('Imported')
+    repository = repositories[0]
+    return {
+        'repository': repository,
+        'session': repository.sessions.filter(active=True).get(),
+        'job_id': progress.job_id,
+    }
+
+class QueryBudgetTestMixin:
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+
+    def measure(self, name, data):
+        method, args, params = CASES[name]
+        url = reverse(f'repos:{name}', args=args(data))
+        if method == 'get':
+            # Budgets are for the steady state, after caches such as the
+            # autocomplete index have been filled
+            self.client.get(url, params)
+        with QueryCounter() as counter:
+            response = getattr(self.client, method)(url, params)
+            # Async streams run on the event loop, outside the middleware's count
+            if response.streaming and not response.is_async:
+                b''.join(response)
+        self.assertLess(response.status_code, 400, f'{name}: {response.status_code}')
+        return counter.count
+
+    def assert_budgets(self, patterns):
+        small = seed(2)
+        counts = {name: self.measure(name, small) for name in CASES}
+        large = seed(12)
+        for pattern in patterns:
+            name = pattern.name
+            with self.subTest(view=name):
+                budget, _ = pattern.callback.query_budget
+                queries = self.measure(name, large)
+                self.assertEqual(queries, counts[name], f'{name} queries grow with the data')
+                self.assertLessEqual(queries, budget)
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def test_every_url_is_covered_and_declares_a_budget(self):
+        for pages in (views, async_views):
+            for pattern in build_urlpatterns(pages):
+                with self.subTest(view=pattern.name, pages=pages.__name__):
+                    self.assertIn(pattern.name, CASES)
+                    self.assertTrue(hasattr(pattern.callback, 'query_budget'))
+
+    def test_budgets_hold_whatever_the_dataset_size(self):
+        self.assert_budgets(urlpatterns)
+
+@override_settings(ROOT_URLCONF='repomgr.urls_async')
+class AsyncQueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    def test_budgets_hold_whatever_the_dataset_size(self):
+        self.assert_budgets(build_urlpatterns(async_views))
+
+def repeated_lookups(request):
+    for repo in Repository.objects.all():
+        repo.branches.count()
+    return HttpResponse()
+
+def budgeted(*budget):
+    # query_budget marks the function itself, so decorate a fresh one each time
+    return query_budget(*budget)(lambda request: repeated_lookups(request))
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            Repository.objects.create(github_id=i, name=f'repo-{i}', url=f'https://github.com/user/repo-{i}')
+        self.request = RequestFactory().get('/repos/')
+
+    def run_view(self, view):
+        middleware = QueryBudgetMiddleware(lambda request: view(request))
+        middleware.process_view(self.request, view, (), {})
+        return middleware(self.request)
+
+    def test_n_plus_one_is_detected(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '5x SELECT COUNT(*)'):
+            self.run_view(budgeted(10))
+
+    def test_declared_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '6 queries, budget is 2'):
+            self.run_view(budgeted(2, 5))
+        self.run_view(budgeted(6, 5))
+
+    @override_settings(QUERY_BUDGET_ACTION='log')
+    def test_log_mode_only_warns(self):
+        with self.assertLogs('repomgr.query_budget', logging.WARNING) as logs:
+            response = self.run_view(repeated_lookups)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('GET /repos/', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_ACTION='')
+    def test_disabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryBudgetMiddleware(repeated_lookups)
+
+    def test_query_shape_ignores_in_list_length(self):
+        self.assertEqual(query_shape('SELECT 1 WHERE id IN (%s, %s)'), query_shape('SELECT 1 WHERE id IN (%s)'))
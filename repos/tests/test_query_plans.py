@@ -0,0 +1,105 @@
+import json
+import unittest
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.test import TestCase
+from django.utils import timezone
+from repos.models import Repository, Branch, WindsurfSession
+
+SEED_REPOSITORIES = 20000
+
+
+def _scans(plan):
+    """Yield (node type, relation, index) for every node of an EXPLAIN plan"""
+    yield plan['Node Type'], plan.get('Relation Name'), plan.get('Index Name')
+    for child in plan.get('Plans', []):
+        yield from _scans(child)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are only checked on PostgreSQL')
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the list, search, branch and session queries against a seeded
+    dataset and fail if any of them falls back to a sequential scan.
+
+    Sequential scans are disabled for the EXPLAIN so the check does not
+    depend on table size: the planner only picks a seq scan if no index can
+    serve the query at all.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        Repository.objects.bulk_create(
+            Repository(
+                github_id=i,
+                name=f'Repo-{i:05d}',
+                full_name=f'org-{i % 50}/repo-{i:05d}',
+                description=f'Repository number {i}',
+                url=f'https://github.com/org-{i % 50}/repo-{i:05d}',
+                private=i % 3 == 0,
+                organization=f'org-{i % 50}',
+                language=('Python', 'Go', 'Rust')[i % 3],
+                created_at=now,
+            )
+            for i in range(1, SEED_REPOSITORIES + 1)
+        )
+        cls.repo = Repository.objects.get(github_id=1)
+        Branch.objects.bulk_create(
+            Branch(repository_id=pk, name=name, is_default=name == 'main', last_commit_sha='a' * 40)
+            for pk in Repository.objects.values_list('pk', flat=True)[:5000]
+            for name in ('main', 'develop')
+        )
+        WindsurfSession.objects.bulk_create(
+            WindsurfSession(repository_id=pk, active=False)
+            for pk in Repository.objects.values_list('pk', flat=True)[:5000]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE repos_repository, repos_branch, repos_windsurfsession')
+
+    def assertUsesIndex(self, queryset, table, index=None):
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        scans = [scan for scan in _scans(plan) if scan[1] == table]
+        self.assertTrue(scans, f'{table} not scanned in plan: {plan}')
+        for node_type, _, index_name in scans:
+            self.assertNotEqual(node_type, 'Seq Scan', f'Sequential scan on {table}: {plan}')
+            if index is not None and index_name is not None:
+                self.assertEqual(index_name, index)
+        if index is not None:
+            # Bitmap index scans name the index but not the table
+            used = {index_name for _, _, index_name in _scans(plan)}
+            self.assertIn(index, used, f'{index} not used: {plan}')
+
+    def test_private_filter_sorted_by_updated(self):
+        queryset = Repository.objects.filter(private=True).order_by('-updated_at')[:50]
+        self.assertUsesIndex(queryset, 'repos_repository', 'repos_repo_private_updated_idx')
+
+    def test_sort_by_name(self):
+        queryset = Repository.objects.order_by(Lower('name'))[:50]
+        self.assertUsesIndex(queryset, 'repos_repository', 'repos_repo_lower_name_idx')
+
+    def test_text_search(self):
+        queryset = Repository.objects.filter(
+            Q(name__icontains='0042') | Q(description__icontains='0042') | Q(organization__icontains='0042')
+        )
+        self.assertUsesIndex(queryset, 'repos_repository')
+
+    def test_default_branch_lookup(self):
+        queryset = Branch.objects.filter(repository=self.repo, is_default=True)
+        self.assertUsesIndex(queryset, 'repos_branch', 'repos_branch_default_idx')
+
+    def test_detail_branch_ordering(self):
+        queryset = self.repo.branches.order_by('-is_default', 'name')
+        self.assertUsesIndex(queryset, 'repos_branch', 'repos_branch_default_idx')
+
+    def test_active_session_lookup(self):
+        queryset = WindsurfSession.objects.filter(repository=self.repo, active=True)
+        self.assertUsesIndex(queryset, 'repos_windsurfsession', 'repos_one_active_session_per_repository')
+
+    def test_session_history(self):
+        queryset = self.repo.sessions.all()
+        self.assertUsesIndex(queryset, 'repos_windsurfsession', 'repos_session_history_idx')
@@ -0,0 +1,121 @@
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.db import router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import reverse
+from unittest.mock import patch
+from repomgr import replicas
+from repomgr.replicas import STICKY_COOKIE, use_replica, write_position
+from repos.models import Repository
+from repos.versioning import bump_data_version
+
+@use_replica
+def read_alias_view(request):
+    return HttpResponse(router.db_for_read(Repository))
+
+@use_replica
+def streaming_view(request):
+    return StreamingHttpResponse(router.db_for_read(Repository) for _ in range(2))
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'], REPLICA_MAX_LAG=5)
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        replicas._lag_checks.clear()
+        replicas._replayed.clear()
+        replicas._replayed.update(replica1=100, replica2=100)
+        patcher = patch('repomgr.replicas.write_position', return_value=100)
+        self.write_position = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_alias(self, request):
+        return read_alias_view(request).content.decode()
+
+    @patch('repomgr.replicas.replica_lag', return_value=0.1)
+    def test_reads_go_to_replica(self, mock_lag):
+        self.assertIn(self.read_alias(self.factory.get('/')), ('replica1', 'replica2'))
+        # Outside decorated views everything reads from the primary
+        self.assertEqual(router.db_for_read(Repository), 'default')
+
+    @patch('repomgr.replicas.replica_lag', return_value=0.1)
+    def test_other_apps_and_writes_use_primary(self, mock_lag):
+        @use_replica
+        def view(request):
+            return HttpResponse(f'{router.db_for_read(Session)}/{router.db_for_write(Repository)}')
+        self.assertEqual(view(self.factory.get('/')).content.decode(), 'default/default')
+
+    @patch('repomgr.replicas.replica_lag', side_effect=lambda alias: {'replica1': 30.0, 'replica2': 0.5}[alias])
+    def test_lagging_replica_is_skipped(self, mock_lag):
+        for _ in range(5):
+            self.assertEqual(self.read_alias(self.factory.get('/')), 'replica2')
+
+    @patch('repomgr.replicas.replica_lag', return_value=None)
+    def test_falls_back_to_primary(self, mock_lag):
+        self.assertEqual(self.read_alias(self.factory.get('/')), 'default')
+
+    @patch('repomgr.replicas.replica_lag', return_value=0.1)
+    def test_sticky_cookie_and_unsafe_methods_use_primary(self, mock_lag):
+        request = self.factory.get('/')
+        request.COOKIES[STICKY_COOKIE] = '1'
+        self.assertEqual(self.read_alias(request), 'default')
+        self.assertEqual(self.read_alias(self.factory.post('/')), 'default')
+
+    @patch('repomgr.replicas.replica_lag', return_value=0.1)
+    def test_replica_behind_the_last_change_is_skipped(self, mock_lag):
+        self.write_position.return_value = 0x200
+        with patch('repomgr.replicas.connections') as connections:
+            cursor = connections.__getitem__.return_value.cursor.return_value.__enter__.return_value
+            cursor.fetchone.side_effect = [('0/180',), ('0/200',)]
+            self.assertEqual(self.read_alias(self.factory.get('/')), 'replica2')
+            cursor.fetchone.side_effect = [('0/1F0',)]
+            self.assertEqual(self.read_alias(self.factory.get('/')), 'replica2')
+            # Replicas that caught up aren't asked again
+            self.assertEqual(connections.__getitem__.call_count, 3)
+
+    @patch('repomgr.replicas.replica_lag', return_value=0.1)
+    def test_primary_when_no_replica_has_the_last_change(self, mock_lag):
+        self.write_position.return_value = None
+        self.assertEqual(self.read_alias(self.factory.get('/')), 'default')
+        with patch('repomgr.replicas.replica_has_replayed', return_value=False):
+            self.write_position.return_value = 0x200
+            self.assertEqual(self.read_alias(self.factory.get('/')), 'default')
+
+    @patch('repomgr.replicas.replica_lag', return_value=0.1)
+    def test_streaming_response_reads_from_replica(self, mock_lag):
+        response = streaming_view(self.factory.get('/'))
+        aliases = {chunk.decode() for chunk in response.streaming_content}
+        self.assertEqual(len(aliases), 1)
+        self.assertIn(aliases.pop(), ('replica1', 'replica2'))
+
+    def test_write_position_is_read_once_per_version(self):
+        with patch('repomgr.replicas.connections') as connections:
+            cursor = connections.__getitem__.return_value.cursor.return_value.__enter__.return_value
+            cursor.fetchone.side_effect = [('1/A0',), ('1/B0',)]
+            bump_data_version()
+            self.assertEqual(write_position(), 0x1000000A0)
+            self.assertEqual(write_position(), 0x1000000A0)
+            bump_data_version()
+            self.assertEqual(write_position(), 0x1000000B0)
+        self.assertEqual(connections.__getitem__.call_count, 2)
+
+    def test_lag_check_is_cached(self):
+        with patch('repomgr.replicas.connections') as connections:
+            connections.__getitem__.return_value.cursor.return_value.__enter__.return_value.fetchone.return_value = (2.5,)
+            self.assertEqual(replicas.replica_lag('replica1'), 2.5)
+            self.assertEqual(replicas.replica_lag('replica1'), 2.5)
+        self.assertEqual(connections.__getitem__.call_count, 1)
+
+    @patch('repos.views.git.Repo', side_effect=Exception('no checkout'))
+    @patch('repomgr.replicas.replica_lag', return_value=None)
+    def test_mutation_sets_sticky_cookie(self, mock_lag, mock_repo):
+        User.objects.create_user(username='testuser', password='testpass123')
+        client = Client()
+        client.login(username='testuser', password='testpass123')
+        repo = Repository.objects.create(github_id=1, name='test-repo', full_name='user/test-repo', url='https://github.com/user/test-repo')
+
+        response = client.get(reverse('repos:repository_detail', args=[repo.pk]))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+        response = client.post(reverse('repos:start_session', args=[repo.pk]))
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 15)
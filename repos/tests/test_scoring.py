@@ -0,0 +1,76 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+from repos.models import Repository
+from repos.scoring import compute_scores, load_features, score_repositories
+
+class ScoringTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.active = self.create('active', pushed_days_ago=1, branch_count=8, last_session_days_ago=2)
+        self.abandoned = self.create('abandoned', pushed_days_ago=900)
+        self.huge_fork = self.create('huge-fork', pushed_days_ago=1, branch_count=8, size=50_000_000, fork=True)
+        self.never_pushed = self.create('never-pushed', pushed_days_ago=None)
+
+    def create(self, name, pushed_days_ago, branch_count=0, last_session_days_ago=None, size=100, fork=False):
+        return Repository.objects.create(
+            github_id=Repository.objects.count() + 1,
+            name=name,
+            full_name=f'user/{name}',
+            url=f'https://github.com/user/{name}',
+            pushed_at=self.now - timedelta(days=pushed_days_ago) if pushed_days_ago is not None else None,
+            branch_count=branch_count,
+            last_session_at=self.now - timedelta(days=last_session_days_ago) if last_session_days_ago is not None else None,
+            size=size,
+            fork=fork,
+        )
+
+    def scores(self):
+        return {repo.name: (repo.health_score, repo.staleness_score) for repo in Repository.objects.all()}
+
+    def test_score_ordering(self):
+        # One read and one bulk update, however many repositories there are
+        with self.assertNumQueries(2):
+            self.assertEqual(score_repositories(now=self.now), 4)
+        scores = self.scores()
+
+        self.assertGreater(scores['active'][0], scores['huge-fork'][0])
+        self.assertGreater(scores['huge-fork'][0], scores['abandoned'][0])
+        self.assertLess(scores['active'][1], 0.01)
+        self.assertGreater(scores['abandoned'][1], 0.95)
+        # Falls back to updated_at, which is now
+        self.assertLess(scores['never-pushed'][1], 0.01)
+        for health, staleness in scores.values():
+            self.assertTrue(0 <= health <= 100)
+            self.assertTrue(0 <= staleness <= 1)
+
+    def test_config_overrides(self):
+        features = load_features(Repository.objects.filter(pk=self.huge_fork.pk))
+        default_health, _ = compute_scores(features, now=self.now)
+        lenient_health, _ = compute_scores(features, now=self.now, config={'fork_factor': 1.0, 'size_penalty': 0})
+        self.assertGreater(lenient_health[0], default_health[0])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('score_repos', stdout=out)
+        self.assertIn('Scored 4 repositories', out.getvalue())
+        self.assertFalse(Repository.objects.filter(scored_at__isnull=True).exists())
+
+    def test_list_sort_and_filter(self):
+        score_repositories(now=self.now)
+        User.objects.create_user(username='testuser', password='testpass123')
+        client = Client()
+        client.login(username='testuser', password='testpass123')
+
+        response = client.get(reverse('repos:repository_list'), {'sort': '-health_score'})
+        self.assertEqual(response.context['repositories'][0].name, 'active')
+
+        response = client.get(reverse('repos:repository_list'), {'health': 'stale'})
+        self.assertEqual([repo.name for repo in response.context['repositories']], ['abandoned'])
+
+        response = client.get(reverse('repos:repository_list'), {'health': 'healthy'})
+        self.assertNotIn('abandoned', [repo.name for repo in response.context['repositories']])
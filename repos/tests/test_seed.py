@@ -0,0 +1,32 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from repos.models import Repository, Branch, WindsurfSession
+from repos.versioning import get_data_version
+
+class SeedReposCommandTests(TestCase):
+    def seed(self, **options):
+        call_command('seed_repos', stdout=StringIO(), **options)
+
+    def test_seeds_consistent_dataset(self):
+        version = get_data_version()
+        self.seed(repositories=5, branches=15, sessions=10)
+
+        self.assertEqual(Repository.objects.count(), 5)
+        self.assertEqual(Branch.objects.count(), 15)
+        self.assertEqual(WindsurfSession.objects.filter(active=False).count(), 10)
+        self.assertGreater(get_data_version(), version)
+        for repo in Repository.objects.all():
+            self.assertEqual(repo.branch_count, repo.branches.count())
+            self.assertEqual(repo.default_branch_sha, repo.branches.get(is_default=True).last_commit_sha)
+            self.assertEqual(repo.session_count, repo.sessions.count())
+
+    def test_repeated_runs_add_rows_and_clear_starts_over(self):
+        self.seed(repositories=3, branches=3, sessions=0)
+        self.seed(repositories=2, branches=2, sessions=0)
+        self.assertEqual(Repository.objects.count(), 5)
+        self.assertEqual(sorted(Repository.objects.values_list('github_id', flat=True)), [1, 2, 3, 4, 5])
+
+        self.seed(repositories=1, branches=1, sessions=0, clear=True)
+        self.assertEqual(Repository.objects.count(), 1)
+        self.assertEqual(Branch.objects.count(), 1)
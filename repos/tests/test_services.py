@@ -49,7 +49,7 @@ class TestGitHubService(TestCase):
         Branch.objects.all().delete()
 
     @patch('repos.services.Github')
-    @patch('repos.services.requests.Session')
+    @patch('repos.transport.requests.Session')
     def test_init_success(self, mock_session, mock_github):
         # Test successful initialization
         mock_user = MagicMock()
@@ -73,7 +73,7 @@ class TestGitHubService(TestCase):
             GitHubService()
 
     @patch('repos.services.Github')
-    @patch('repos.services.requests.Session')
+    @patch('repos.transport.requests.Session')
     def test_get_all_pages(self, mock_session, mock_github):
         # Test pagination handling
         mock_response1 = MagicMock()
@@ -128,7 +128,7 @@ class TestGitHubService(TestCase):
         self.assertEqual(calls[2][0][0], 'https://api.github.com/user/repos?page=2')
 
     @patch('repos.services.Github')
-    @patch('repos.services.requests.Session')
+    @patch('repos.transport.requests.Session')
     def test_rate_limit_handling(self, mock_session, mock_github):
         # Test rate limit handling
         # Mock GitHub client initialization
@@ -169,7 +169,7 @@ class TestGitHubService(TestCase):
         self.assertFalse(mock_response.json.called)  # Verify json() was not called
 
     @patch('repos.services.Github')
-    @patch('repos.services.requests.Session')
+    @patch('repos.transport.requests.Session')
     def test_sync_repositories(self, mock_session, mock_github):
         # Test repository synchronization
         # Mock API responses
@@ -217,7 +217,7 @@ class TestGitHubService(TestCase):
         self.assertEqual(new_repo.language, 'Python')
 
     @patch('repos.services.Github')
-    @patch('repos.services.requests.Session')
+    @patch('repos.transport.requests.Session')
     def test_sync_branches(self, mock_session, mock_github):
         # Test branch synchronization
         # Mock GitHub client initialization
@@ -270,3 +270,16 @@ class TestGitHubService(TestCase):
         self.assertEqual(develop_branch.last_commit_sha, 'def456')
         self.assertEqual(develop_branch.last_commit_message, 'Development commit')
         self.assertFalse(develop_branch.is_default)
+
+        # Branch summary is maintained on the repository row
+        self.repo1.refresh_from_db()
+        self.assertEqual(self.repo1.branch_count, 2)
+        self.assertEqual(self.repo1.default_branch_sha, 'abc123')
+        self.assertIsNotNone(self.repo1.branch_freshness_at)
+
+        # Branches gone from GitHub are removed and the summary follows
+        mock_repo.get_branches.return_value = [mock_branch1]
+        service._sync_branches(self.repo1, mock_repo)
+        self.repo1.refresh_from_db()
+        self.assertEqual(self.repo1.branch_count, 1)
+        self.assertFalse(branches.filter(name='develop').exists())
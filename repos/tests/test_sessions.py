@@ -0,0 +1,92 @@
+from django.test import TestCase, Client
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from django.contrib.auth.models import User
+from unittest.mock import patch
+from repos.models import Repository, Branch, WindsurfSession
+
+class SessionStateTests(TestCase):
+    def setUp(self):
+        self.repo = Repository.objects.create(
+            github_id=1,
+            name='test-repo',
+            full_name='user/test-repo',
+            url='https://github.com/user/test-repo'
+        )
+        self.branch = Branch.objects.create(repository=self.repo, name='main', is_default=True, last_commit_sha='abc123')
+
+    def test_start_session_updates_counters(self):
+        self.assertFalse(self.repo.has_sessions)
+        first = self.repo.start_session(branch=self.branch)
+        second = self.repo.start_session(branch=self.branch)
+
+        self.repo.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual(self.repo.session_count, 2)
+        self.assertEqual(self.repo.active_session, second)
+        self.assertEqual(self.repo.last_session_at, second.start_time)
+        self.assertTrue(self.repo.has_sessions)
+        self.assertFalse(first.active)
+        self.assertIsNotNone(first.end_time)
+
+    def test_end_session_clears_active_session(self):
+        session = self.repo.start_session()
+        self.repo.refresh_from_db()
+        updated_at = self.repo.updated_at
+        session.end_session()
+
+        self.repo.refresh_from_db()
+        self.assertIsNone(self.repo.active_session)
+        self.assertEqual(self.repo.session_count, 1)
+        self.assertEqual(self.repo.last_session_at, session.end_time)
+        self.assertEqual(self.repo.updated_at, updated_at)
+
+    def test_ending_old_session_keeps_current_one(self):
+        old = self.repo.start_session()
+        current = self.repo.start_session()
+        old.end_session()
+
+        self.repo.refresh_from_db()
+        self.assertEqual(self.repo.active_session, current)
+
+    def test_one_active_session_per_repository(self):
+        self.repo.start_session()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            WindsurfSession.objects.create(repository=self.repo)
+
+class SessionQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        for i in range(5):
+            repo = Repository.objects.create(
+                github_id=i + 1,
+                name=f'repo-{i}',
+                full_name=f'user/repo-{i}',
+                url=f'https://github.com/user/repo-{i}'
+            )
+            branch = Branch.objects.create(repository=repo, name='main', is_default=True, last_commit_sha='abc123')
+            repo.start_session(branch=branch)
+        self.repo = repo
+
+    def test_list_query_count_independent_of_sessions(self):
+        self.client.get(reverse('repos:repository_list'))
+        # session, user, two counts, the page itself and the session save;
+        # active sessions come from the join, not one query per card
+        with self.assertNumQueries(8):
+            response = self.client.get(reverse('repos:repository_list'))
+        self.assertContains(response, 'Session active on main', count=5)
+
+    def test_detail_shows_active_session(self):
+        response = self.client.get(reverse('repos:repository_detail', args=[self.repo.pk]))
+        self.assertContains(response, 'End Session')
+        self.assertContains(response, reverse('repos:end_session', args=[self.repo.pk, self.repo.active_session.pk]))
+
+    @patch('repos.views.git.Repo', side_effect=Exception('no checkout'))
+    def test_start_session_view(self, mock_repo):
+        response = self.client.get(reverse('repos:start_session', args=[self.repo.pk]))
+        self.assertRedirects(response, reverse('repos:repository_detail', args=[self.repo.pk]))
+        self.repo.refresh_from_db()
+        self.assertEqual(self.repo.session_count, 2)
+        self.assertEqual(WindsurfSession.objects.filter(repository=self.repo, active=True).count(), 1)
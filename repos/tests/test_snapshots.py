@@ -0,0 +1,97 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch, MagicMock
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from repos.models import Repository, RepositorySnapshot
+from repos.services import GitHubService
+
+def listing_entry(github_id, name, stars):
+    return {
+        'id': github_id,
+        'name': name,
+        'full_name': f'user/{name}',
+        'html_url': f'https://github.com/user/{name}',
+        'private': False,
+        'fork': False,
+        'created_at': '2024-01-01T00:00:00Z',
+        'updated_at': '2024-01-01T00:00:00Z',
+        'pushed_at': None,
+        'size': 100,
+        'language': 'Python',
+        'default_branch': 'main',
+        'owner': {'login': 'user', 'type': 'User'},
+        'description': '',
+        'stargazers_count': stars,
+        'forks_count': 1,
+        'open_issues_count': 2,
+        'watchers_count': stars,
+    }
+
+class RepositorySnapshotTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.repos = [
+            Repository.objects.create(github_id=i, name=f'repo-{i}', full_name=f'user/repo-{i}', url=f'https://github.com/user/repo-{i}')
+            for i in range(1, 4)
+        ]
+
+    def snapshot(self, repo, days_ago, stars):
+        return RepositorySnapshot(repository=repo, captured_on=self.today - timedelta(days=days_ago), stars=stars)
+
+    def test_record_replaces_same_day(self):
+        RepositorySnapshot.record([self.snapshot(self.repos[0], 0, 5)])
+        RepositorySnapshot.record([self.snapshot(self.repos[0], 0, 8)])
+        self.assertEqual(RepositorySnapshot.objects.get().stars, 8)
+
+    def test_fastest_growing(self):
+        RepositorySnapshot.record([
+            self.snapshot(self.repos[0], 20, 10), self.snapshot(self.repos[0], 0, 15),
+            self.snapshot(self.repos[1], 25, 10), self.snapshot(self.repos[1], 1, 50),
+            # Outside the window
+            self.snapshot(self.repos[2], 60, 0), self.snapshot(self.repos[2], 45, 500),
+        ])
+        trending = list(Repository.fastest_growing(metric='stars', days=30))
+        self.assertEqual([(repo.name, repo.growth) for repo in trending], [('repo-2', 40), ('repo-1', 5)])
+
+        with self.assertRaises(ValueError):
+            Repository.fastest_growing(metric='name')
+
+    def test_downsample(self):
+        repo = self.repos[0]
+        RepositorySnapshot.record([self.snapshot(repo, days_ago, days_ago) for days_ago in range(0, 200)] + [self.snapshot(repo, 800, 0)])
+
+        deleted = RepositorySnapshot.downsample(daily_days=90, keep_days=730)
+
+        remaining = RepositorySnapshot.objects.filter(repository=repo)
+        self.assertEqual(deleted, 201 - remaining.count())
+        self.assertEqual(remaining.filter(captured_on__gte=self.today - timedelta(days=90)).count(), 91)
+        old = remaining.filter(captured_on__lt=self.today - timedelta(days=90))
+        weeks = {(day.isocalendar()[0], day.isocalendar()[1]) for day in old.values_list('captured_on', flat=True)}
+        self.assertEqual(old.count(), len(weeks))
+        self.assertFalse(remaining.filter(captured_on__lt=self.today - timedelta(days=730)).exists())
+
+    def test_prune_command(self):
+        RepositorySnapshot.record([self.snapshot(self.repos[0], 800, 0)])
+        out = StringIO()
+        call_command('prune_snapshots', stdout=out)
+        self.assertIn('Deleted 1 snapshots', out.getvalue())
+
+    @patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+    @patch('repos.services.Github')
+    @patch('repos.transport.requests.Session')
+    def test_sync_records_snapshots_without_extra_calls(self, mock_session, mock_github):
+        listing = MagicMock(status_code=200, headers={'X-RateLimit-Remaining': '4999'})
+        listing.json.side_effect = [[listing_entry(10, 'alpha', 7), listing_entry(11, 'beta', 3)], [], [], []]
+        mock_session.return_value.get.return_value = listing
+        mock_github.return_value.get_repo.return_value.get_branches.return_value = []
+
+        service = GitHubService()
+        requests_before = mock_session.return_value.get.call_count
+        service.sync_repositories()
+
+        snapshots = RepositorySnapshot.objects.order_by('repository__name')
+        self.assertEqual([(s.repository.name, s.stars, s.open_issues) for s in snapshots], [('alpha', 7, 2), ('beta', 3, 2)])
+        # Only the listing pages were requested
+        self.assertLessEqual(mock_session.return_value.get.call_count - requests_before, 4)
@@ -0,0 +1,25 @@
+import sys
+from django.test import SimpleTestCase
+from benchmarks.startup import COMMANDS, measure
+from repos import lazy
+
+class StartupImportTests(SimpleTestCase):
+    """
+    Short-lived commands must not import heavy dependencies up front. The
+    time budgets are checked by ``python -m benchmarks.startup --check``.
+    """
+
+    def test_commands_import_no_heavy_modules(self):
+        for name in COMMANDS:
+            with self.subTest(command=name):
+                self.assertEqual(measure(name)['heavy'], [], f'{name} imports heavy modules eagerly')
+
+class LazyImportTests(SimpleTestCase):
+    def test_lazy_attribute_resolves_on_call(self):
+        dumps = lazy.lazy_attribute('json', 'dumps')
+        self.assertEqual(dumps({'a': 1}), '{"a": 1}')
+        self.assertIs(dumps.resolve(), sys.modules['json'].dumps)
+
+    def test_lazy_import_of_missing_module(self):
+        with self.assertRaises(ModuleNotFoundError):
+            lazy.lazy_import('repos_no_such_module')
@@ -0,0 +1,123 @@
+from unittest.mock import patch
+import requests
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from benchmarks.fake_github import FakeGitHub, serve
+from repos.models import SyncRun
+from repos.services import GitHubService
+from repos.telemetry import SyncTelemetry, endpoint
+
+def response(url, status=200, content=b'[]', method='GET', **headers):
+    result = requests.Response()
+    result.status_code = status
+    result._content = content
+    result.headers.update(headers)
+    result.request = requests.Request(method, url).prepare()
+    return result
+
+class SyncTelemetryTests(TestCase):
+    @override_settings(GITHUB_API_URL='https://github.example.com/api/v3')
+    def test_endpoints_group_calls(self):
+        base = 'https://github.example.com/api/v3'
+        self.assertEqual(endpoint('GET', f'{base}/user/repos?page=2'), 'GET /user/repos')
+        self.assertEqual(endpoint('GET', f'{base}/repos/octo/hello/branches'), 'GET /repos/{owner}/{repo}/branches')
+        self.assertEqual(endpoint('GET', f'{base}/repos/octo/hello/commits/abc123'), 'GET /repos/{owner}/{repo}/commits/{ref}')
+        self.assertEqual(endpoint('DELETE', f'{base}/repos/octo/hello'), 'DELETE /repos/{owner}/{repo}')
+
+    def test_observe_counts_calls_bytes_and_rate_limit(self):
+        telemetry = SyncTelemetry()
+        telemetry.observe(response('https://api.github.com/user/repos', content=b'[1, 2]', **{
+            'X-RateLimit-Used': '10', 'X-RateLimit-Reset': '1000'}))
+        telemetry.observe(response('https://api.github.com/user/repos?page=2', **{
+            'Content-Length': '40', 'X-RateLimit-Used': '12', 'X-RateLimit-Reset': '1000'}))
+        telemetry.observe(response('https://api.github.com/user/repos', status=304, content=b'', **{
+            'X-RateLimit-Used': '12', 'X-RateLimit-Reset': '1000'}))
+        # The limit reset between calls
+        telemetry.observe(response('https://api.github.com/user/starred', **{
+            'X-RateLimit-Used': '1', 'X-RateLimit-Reset': '4600'}))
+
+        self.assertEqual(telemetry.api_calls, {'GET /user/repos': 3, 'GET /user/starred': 1})
+        self.assertEqual(telemetry.bytes_received, len(b'[1, 2]') + 40 + len(b'[]'))
+        self.assertEqual(telemetry.not_modified, 1)
+        self.assertEqual(telemetry.rate_limit_used, 3 + 1)
+
+    def test_stages_accumulate(self):
+        ticks = iter([0, 2, 10, 13])
+        telemetry = SyncTelemetry(clock=lambda: next(ticks))
+        with telemetry.stage('branches'):
+            pass
+        with telemetry.stage('branches'):
+            pass
+        self.assertEqual(telemetry.stages, {'branches': 5})
+
+    def test_errors_are_capped(self):
+        telemetry = SyncTelemetry()
+        for number in range(SyncTelemetry.MAX_ERRORS + 5):
+            telemetry.error(f'error {number}')
+        self.assertEqual(telemetry.error_count, SyncTelemetry.MAX_ERRORS + 5)
+        self.assertEqual(len(telemetry.errors), SyncTelemetry.MAX_ERRORS)
+
+@override_settings(GITHUB_MIN_REQUEST_INTERVAL=0)
+@patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+class SyncRunTests(TestCase):
+    def test_sync_records_a_run(self):
+        fake = FakeGitHub(repositories=3, branches=4)
+        with serve(fake) as base_url, override_settings(GITHUB_API_URL=base_url):
+            service = GitHubService()
+            fake.reset()
+            service.sync_repositories(trigger='command')
+            stats = fake.stats()
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, SyncRun.SUCCEEDED)
+        self.assertEqual(run.trigger, 'command')
+        self.assertEqual(run.repositories, 3)
+        # Calls made by PyGithub are counted as well as the service's own
+        self.assertEqual(run.api_calls, stats['total'])
+        self.assertEqual(run.api_calls_by_endpoint['GET /repos/{owner}/{repo}/branches'], 3)
+        self.assertEqual(run.rate_limit_used, stats['total'])
+        self.assertGreater(run.bytes_received, 0)
+        self.assertEqual((run.rows_inserted, run.rows_updated, run.rows_deleted), (3 + 12, 3, 0))
+        self.assertEqual(set(run.stage_seconds), {'listing', 'repositories', 'branches', 'snapshots'})
+        self.assertGreater(run.duration, 0)
+
+        with serve(FakeGitHub(repositories=3, branches=2)) as base_url, override_settings(GITHUB_API_URL=base_url):
+            GitHubService().sync_repositories()
+        run = SyncRun.objects.latest('started_at')
+        self.assertEqual((run.rows_inserted, run.rows_updated, run.rows_deleted), (0, 3 + 6 + 3, 6))
+
+    def test_failed_sync_records_the_error(self):
+        with serve(FakeGitHub(repositories=1, branches=1)) as base_url, override_settings(GITHUB_API_URL=base_url):
+            service = GitHubService()
+            with patch.object(service, '_get_all_pages', side_effect=RuntimeError('listing failed')):
+                with self.assertRaises(RuntimeError):
+                    service.sync_repositories()
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, SyncRun.FAILED)
+        self.assertEqual(run.errors, ['listing failed'])
+        self.assertIsNotNone(run.finished_at)
+
+class SyncRunAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def test_dashboard(self):
+        response = self.client.get(reverse('admin:repos_syncrun_dashboard'))
+        self.assertContains(response, 'No successful syncs recorded yet.')
+
+        telemetry = SyncTelemetry()
+        telemetry.stages.update(listing=1.5, branches=3.0)
+        for calls in (100, 100, 100, 150):
+            telemetry.api_calls['GET /user/repos'] = calls
+            SyncRun.objects.create(trigger='command').finish(telemetry, SyncRun.SUCCEEDED, repositories=10)
+
+        response = self.client.get(reverse('admin:repos_syncrun_dashboard'))
+        self.assertContains(response, '<polyline', count=3)
+        self.assertContains(response, 'Latest 150, highest 150')
+        self.assertContains(response, '50.0%')
+        self.assertContains(response, '<th>Branches (s)</th>')
+
+        response = self.client.get(reverse('admin:repos_syncrun_changelist'))
+        self.assertContains(response, reverse('admin:repos_syncrun_dashboard'))
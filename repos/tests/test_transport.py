@@ -0,0 +1,181 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import requests
+from django.test import SimpleTestCase, TestCase, override_settings
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError
+from benchmarks.fake_github import FakeGitHub, serve
+from repos import transport
+from repos.services import GitHubService
+
+class TransportTestCase(SimpleTestCase):
+    def setUp(self):
+        # The adapter is built from the settings in force when first used
+        transport.adapter.cache_clear()
+        self.addCleanup(transport.adapter.cache_clear)
+        transport._limiters.clear()
+        self.addCleanup(transport._limiters.clear)
+
+@override_settings(GITHUB_RETRY_BACKOFF=0.01)
+class TransportTests(TransportTestCase):
+    def test_server_errors_are_retried(self):
+        fake = FakeGitHub(repositories=1, server_errors=2)
+        with serve(fake) as base_url:
+            response = transport.session().get(f'{base_url}/user')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(fake.stats()['by_endpoint'], {'server_error': 2, 'user': 1})
+
+    @override_settings(GITHUB_RETRIES=2)
+    def test_last_server_error_is_returned(self):
+        fake = FakeGitHub(repositories=1, server_errors=10)
+        with serve(fake) as base_url:
+            response = transport.session().get(f'{base_url}/user')
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(fake.stats()['total'], 3)
+
+    def test_posts_are_not_retried(self):
+        fake = FakeGitHub(repositories=1, server_errors=1)
+        with serve(fake) as base_url:
+            response = transport.session().post(f'{base_url}/user/repos', json={'name': 'web'})
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(fake.stats()['total'], 1)
+
+    @override_settings(GITHUB_READ_TIMEOUT=1, GITHUB_RETRIES=0)
+    def test_hung_responses_time_out(self):
+        with serve(FakeGitHub(repositories=1, latency=3)) as base_url:
+            started = time.monotonic()
+            with self.assertRaises(requests.ConnectionError):
+                transport.session().get(f'{base_url}/user')
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_short_secondary_rate_limits_are_retried(self):
+        retry = transport.retry()
+        self.assertTrue(retry.is_retry('GET', 403, has_retry_after=True))
+        self.assertFalse(retry.is_retry('GET', 403, has_retry_after=False))
+        self.assertFalse(retry.is_retry('POST', 403, has_retry_after=True))
+
+        retry.increment('GET', '/user', response=HTTPResponse(status=429, headers={'Retry-After': '2'}))
+        # Longer waits are left to the caller
+        with self.assertRaises(MaxRetryError):
+            retry.increment('GET', '/user', response=HTTPResponse(status=403, headers={'Retry-After': '60'}))
+
+    @override_settings(GITHUB_POOL_SIZE=4)
+    def test_pool_grows_with_the_workers(self):
+        adapter = transport.adapter()
+        transport.ensure_pool_size(2)
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], 4)
+        transport.ensure_pool_size(16)
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], 16)
+
+    def test_sessions_share_the_adapter_and_ask_for_gzip(self):
+        first, second = transport.session(), transport.session({'Authorization': 'token secret'})
+        self.assertIs(first.get_adapter('https://api.github.com/user'), second.get_adapter('https://api.github.com/user'))
+        self.assertIn('gzip', second.headers['Accept-Encoding'])
+        self.assertEqual(second.headers['Authorization'], 'token secret')
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class AdaptiveLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.limiter = transport.AdaptiveLimiter(2, 4, clock=self.clock)
+        self.changes = []
+        self.limiter.on_change = self.changes.append
+
+    def succeed(self, times, latency=0.1):
+        for _ in range(times):
+            self.limiter.succeeded(latency)
+
+    def test_grows_by_one_per_round_up_to_the_maximum(self):
+        self.succeed(3)
+        self.assertEqual(int(self.limiter.limit), 3)
+        self.succeed(3)
+        self.assertEqual(int(self.limiter.limit), 4)
+        self.succeed(100)
+        self.assertEqual(self.limiter.limit, 4)
+        self.assertEqual(self.changes, [3, 4])
+
+    def test_slow_responses_hold_the_limit(self):
+        self.succeed(1, latency=0.1)
+        self.succeed(10, latency=0.5)
+        self.assertLess(self.limiter.limit, 3)
+
+    def test_cut_once_per_round(self):
+        self.succeed(10)
+        self.assertEqual(self.limiter.limit, 4)
+        started = self.clock.now
+        self.clock.now += 1
+        self.limiter.decrease(started)
+        # Requests already in flight when the limit was cut don't cut it again
+        self.limiter.decrease(started)
+        self.assertEqual(self.limiter.limit, 2)
+        self.clock.now += 1
+        self.limiter.decrease(self.clock.now)
+        self.limiter.decrease(self.clock.now)
+        self.assertEqual(self.limiter.limit, 1)
+        self.assertEqual(self.changes[-2:], [2, 1])
+
+    def test_callers_beyond_the_limit_wait(self):
+        entered = threading.Event()
+
+        def third():
+            with self.limiter.slot():
+                entered.set()
+
+        with self.limiter.slot(), self.limiter.slot():
+            thread = threading.Thread(target=third)
+            thread.start()
+            self.assertFalse(entered.wait(0.1))
+        self.assertTrue(entered.wait(5))
+        thread.join()
+
+@override_settings(GITHUB_RETRY_BACKOFF=0.01, GITHUB_CONCURRENCY_INITIAL=4, GITHUB_CONCURRENCY_MAX=16)
+class AdaptiveConcurrencyTests(TransportTestCase):
+    def request_all(self, fake, count=200, workers=16):
+        with serve(fake) as base_url:
+            session = transport.session({'Authorization': 'token fake-token'})
+            with ThreadPoolExecutor(workers) as executor:
+                statuses = list(executor.map(lambda _: session.get(f'{base_url}/user').status_code, range(count)))
+        self.assertEqual(set(statuses), {200})
+        return transport.limiter('token fake-token')
+
+    def test_grows_while_github_keeps_up(self):
+        limiter = self.request_all(FakeGitHub(repositories=1, latency=0.005))
+        self.assertGreater(limiter.limit, 8)
+
+    @override_settings(GITHUB_RETRIES=10, GITHUB_CONCURRENCY_INITIAL=16)
+    def test_backs_off_on_secondary_rate_limits(self):
+        fake = FakeGitHub(repositories=1, latency=0.01, max_concurrent=3, secondary_retry_after=0)
+        limiter = self.request_all(fake)
+        # Settles around what GitHub allows instead of the 16 workers
+        self.assertLessEqual(limiter.limit, 6)
+        self.assertLess(fake.stats()['by_endpoint']['secondary_rate_limit'], 100)
+
+    @override_settings(GITHUB_RETRIES=0)
+    def test_server_errors_cut_the_limit(self):
+        with serve(FakeGitHub(repositories=1, server_errors=1)) as base_url:
+            transport.session().get(f'{base_url}/user')
+        self.assertEqual(transport.limiter(None).limit, 2)
+
+@override_settings(GITHUB_MIN_REQUEST_INTERVAL=0)
+@patch.dict('os.environ', {'GITHUB_ACCESS_TOKEN': 'fake-token'})
+class SharedConnectionTests(TransportTestCase, TestCase):
+    def test_pygithub_has_the_persist_flag(self):
+        # install_pygithub() turns connection reuse back on through it
+        from github.Requester import Requester
+        self.assertTrue(hasattr(Requester, '_Requester__persist'))
+
+    def test_pygithub_and_the_service_reuse_one_connection(self):
+        fake = FakeGitHub(repositories=3, branches=2)
+        with serve(fake) as base_url, override_settings(GITHUB_API_URL=base_url):
+            GitHubService().sync_repositories()
+        stats = fake.stats()
+        self.assertGreater(stats['by_endpoint']['branches'], 0)
+        self.assertEqual(stats['connections'], 1)
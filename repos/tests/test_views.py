@@ -2,7 +2,7 @@ from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
 from unittest.mock import patch, MagicMock
-from repos.models import Repository
+from repos.models import Repository, Branch
 from repos.forms import RepositoryImportForm
 
 class TestViews(TestCase):
@@ -106,3 +106,18 @@ class TestViews(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'test-repo')
         self.assertNotContains(response, 'private-repo')
+
+    def test_repository_sort_by_branch_count(self):
+        busy = Repository.objects.create(
+            github_id=3,
+            name='busy-repo',
+            full_name='user/busy-repo',
+            url='https://github.com/user/busy-repo'
+        )
+        for name in ('main', 'develop', 'feature'):
+            Branch.objects.create(repository=busy, name=name, is_default=name == 'main', last_commit_sha='f00dfeed' * 5)
+        busy.refresh_branch_state()
+
+        response = self.client.get(reverse('repos:repository_list'), {'sort': '-branch_count'})
+        self.assertEqual([repo.name for repo in response.context['repositories']], ['busy-repo', 'test-repo'])
+        self.assertContains(response, 'main@<code>f00dfee</code>', html=False)
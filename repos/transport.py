@@ -0,0 +1,282 @@
+"""
+The HTTP transport under every synchronous GitHub call.
+
+One ``GitHubAdapter`` per process holds the connection pool. The service's
+sessions (``session()``) and PyGithub's connections (``install_pygithub()``)
+share it, so they reuse the same keep-alive connections. The adapter
+
+- applies ``GITHUB_CONNECT_TIMEOUT`` and ``GITHUB_READ_TIMEOUT`` to requests
+  that don't set their own, so a hung socket fails the call instead of
+  stalling the sync;
+- retries connection errors, and 5xx responses to idempotent requests, up
+  to ``GITHUB_RETRIES`` times with exponential backoff
+  (``GITHUB_RETRY_BACKOFF``) plus as much random jitter;
+- retries secondary rate limits (403 or 429 with a ``Retry-After`` of at most
+  ``GITHUB_RETRY_AFTER_MAX`` seconds) once the wait is over. Longer waits
+  are returned to the caller, e.g. ``repos.services.RateLimitGate``;
+- keeps up to ``GITHUB_POOL_SIZE`` connections per host, raised with
+  ``ensure_pool_size()`` by callers running more workers;
+- limits the requests in flight per token with an ``AdaptiveLimiter``, so
+  that parallel callers converge on the most concurrency GitHub sustains.
+
+Responses come gzip-compressed; requests asks for that by default.
+
+This module imports requests and urllib3; import it with
+``repos.lazy.lazy_import``.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+from .lazy import lazy_import
+from .telemetry import record_response
+
+metrics = lazy_import('repomgr.metrics')
+
+SERVER_ERRORS = (500, 502, 503, 504)
+
+# The limiter slot of the request being sent on this thread, for retries to report to
+_current = threading.local()
+
+
+def secondary_rate_limited(status, headers):
+    """GitHub's secondary (abuse) limits answer 429, or 403 with a Retry-After"""
+    return status == 429 or (status == 403 and 'Retry-After' in headers)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on the requests one token has in flight.
+
+    Every quick success adds ``1 / limit``, so the limit grows by one per
+    round of requests; successes slower than ``latency_factor`` times the
+    fastest recent response don't grow it. A secondary rate limit, server
+    error or connection error multiplies it by ``backoff``, once per round:
+    requests sent before the last cut don't cut it again. Callers beyond
+    the limit wait for a slot.
+    """
+    # How fast the latency baseline follows responses slower than it
+    BASELINE_DRIFT = 0.01
+
+    def __init__(self, initial, maximum, backoff=0.5, latency_factor=2.0, clock=time.monotonic):
+        self.limit = float(min(initial, maximum))
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_factor = latency_factor
+        self.clock = clock
+        self.in_flight = 0
+        self.baseline = None
+        self.on_change = None
+        self._cut_at = float('-inf')
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        slot = Slot(self, self.clock())
+        try:
+            yield slot
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def decrease(self, started):
+        with self._condition:
+            if started <= self._cut_at:
+                return
+            self.limit = max(1.0, self.limit * self.backoff)
+            self._cut_at = self.clock()
+        self._changed()
+
+    def succeeded(self, latency):
+        with self._condition:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * self.BASELINE_DRIFT
+            if latency > self.baseline * self.latency_factor or self.limit >= self.maximum:
+                return
+            before = int(self.limit)
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            if int(self.limit) == before:
+                return
+            self._condition.notify_all()
+        self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(int(self.limit))
+
+
+class Slot:
+    """One request's place in its token's limiter"""
+
+    def __init__(self, limiter, started):
+        self.limiter = limiter
+        self.started = started
+        self.congested = False
+
+    def congestion(self):
+        """Report a rate limit or failure, including ones retried before the final response"""
+        self.congested = True
+        self.limiter.decrease(self.started)
+
+    def finished(self, response):
+        if secondary_rate_limited(response.status_code, response.headers) or response.status_code in SERVER_ERRORS:
+            self.congestion()
+        elif not self.congested:
+            self.limiter.succeeded(self.limiter.clock() - self.started)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(authorization):
+    """The limiter of the token in an Authorization header"""
+    with _limiters_lock:
+        result = _limiters.get(authorization)
+        if result is None:
+            result = _limiters[authorization] = AdaptiveLimiter(
+                settings.GITHUB_CONCURRENCY_INITIAL, settings.GITHUB_CONCURRENCY_MAX,
+                backoff=settings.GITHUB_CONCURRENCY_BACKOFF,
+                latency_factor=settings.GITHUB_CONCURRENCY_LATENCY_FACTOR,
+            )
+            if settings.METRICS_ENABLED:
+                result.on_change = functools.partial(metrics.set_github_concurrency, authorization)
+                result.on_change(int(result.limit))
+        return result
+
+
+class GitHubRetry(Retry):
+    """urllib3 retries, plus GitHub's secondary rate limits when the wait is short"""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 403 and has_retry_after and self._is_method_retryable(method):
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        slot = getattr(_current, 'slot', None)
+        if slot is not None and (
+            error is not None or response is not None and (
+                secondary_rate_limited(response.status, response.headers) or response.status in SERVER_ERRORS
+            )
+        ):
+            slot.congestion()
+        if response is not None and response.status in (403, 429):
+            retry_after = self.get_retry_after(response)
+            if retry_after is None or retry_after > settings.GITHUB_RETRY_AFTER_MAX:
+                # With raise_on_status off the response goes back to the caller
+                raise MaxRetryError(_pool, url)
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+def retry():
+    return GitHubRetry(
+        total=settings.GITHUB_RETRIES,
+        status_forcelist=SERVER_ERRORS,
+        backoff_factor=settings.GITHUB_RETRY_BACKOFF,
+        backoff_jitter=settings.GITHUB_RETRY_BACKOFF,
+        # The last response is returned; callers check its status
+        raise_on_status=False,
+    )
+
+
+class GitHubAdapter(HTTPAdapter):
+    def __init__(self, **kwargs):
+        self._resize_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = (settings.GITHUB_CONNECT_TIMEOUT, settings.GITHUB_READ_TIMEOUT)
+        with limiter(request.headers.get('Authorization')).slot() as slot:
+            _current.slot = slot
+            try:
+                response = super().send(request, timeout=timeout, **kwargs)
+            except requests.ConnectionError:
+                slot.congestion()
+                raise
+            finally:
+                _current.slot = None
+            slot.finished(response)
+        return response
+
+    def close(self):
+        # Sessions come and go (PyGithub closes its own); the pool stays
+        pass
+
+    def ensure_pool_size(self, size):
+        """Keep up to ``size`` connections per host, one per concurrent worker"""
+        with self._resize_lock:
+            if size > self._pool_maxsize:
+                self.init_poolmanager(self._pool_connections, size, block=self._pool_block)
+
+
+@functools.cache
+def adapter():
+    """The process's adapter; tests changing the settings above clear this cache"""
+    return GitHubAdapter(pool_maxsize=settings.GITHUB_POOL_SIZE, max_retries=retry())
+
+
+def ensure_pool_size(size):
+    adapter().ensure_pool_size(size)
+
+
+def _no_netrc(request):
+    # With no auth set, requests would take credentials from ~/.netrc
+    return request
+
+
+def session(headers=None):
+    """A requests session on the shared adapter, reporting to ``record_response``"""
+    result = requests.Session()
+    result.mount('https://', adapter())
+    result.mount('http://', adapter())
+    result.auth = _no_netrc
+    result.headers.update(headers or {})
+    result.hooks['response'].append(record_response)
+    return result
+
+
+@functools.cache
+def install_pygithub():
+    """Make PyGithub's connections use the shared adapter and pass their responses to ``record_response``"""
+    # Run the package first in case it was imported lazily; importing a
+    # submodule of an unexecuted lazy package loads a second copy of it
+    from github import Github  # noqa: F401
+    from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+
+    class HTTPConnection(HTTPRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.adapter = adapter()
+            self.session.mount('http://', self.adapter)
+            self.session.hooks['response'].append(record_response)
+
+    class HTTPSConnection(HTTPSRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.adapter = adapter()
+            self.session.mount('https://', self.adapter)
+            self.session.hooks['response'].append(record_response)
+
+    # Private, so requirements.txt pins the PyGithub versions that have it
+    if not hasattr(Requester, '_Requester__persist'):
+        raise RuntimeError("PyGithub's Requester has no __persist flag; check the version pinned in requirements.txt")
+    Requester.injectConnectionClasses(HTTPConnection, HTTPSConnection)
+    # Injecting also turns off connection reuse, which only PyGithub's own
+    # replay tests want; without it every call opens a new connection
+    Requester._Requester__persist = True
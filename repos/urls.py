@@ -1,15 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
 
 app_name = 'repos'
 
-urlpatterns = [
-    path('', views.repository_list, name='repository_list'),
-    path('import/', views.repository_import, name='repository_import'),
-    path('create/', views.repository_create, name='repository_create'),
-    path('<int:pk>/', views.repository_detail, name='repository_detail'),
-    path('<int:pk>/delete/', views.repository_delete, name='repository_delete'),
-    path('<int:pk>/session/start/', views.start_session, name='start_session'),
-    path('<int:pk>/session/<int:session_id>/end/', views.end_session, name='end_session'),
-    path('<int:pk>/sessions/', views.session_list, name='session_list'),
-]
+
+def build_urlpatterns(pages):
+    return [
+        path('', pages.repository_list, name='repository_list'),
+        path('autocomplete/', pages.repository_autocomplete, name='repository_autocomplete'),
+        path('import/', pages.repository_import, name='repository_import'),
+        path('import/progress/<uuid:job_id>/', pages.repository_import_progress, name='repository_import_progress'),
+        path('create/', pages.repository_create, name='repository_create'),
+        path('<int:pk>/', pages.repository_detail, name='repository_detail'),
+        path('<int:pk>/delete/', pages.repository_delete, name='repository_delete'),
+        path('<int:pk>/session/start/', pages.start_session, name='start_session'),
+        path('<int:pk>/session/<int:session_id>/end/', pages.end_session, name='end_session'),
+        path('<int:pk>/sessions/', pages.session_list, name='session_list'),
+        path('api/repositories/', api.repository_export, name='api_repository_export'),
+        path('api/repositories/<int:pk>/branches/', api.branch_export, name='api_branch_export'),
+    ]
+
+
+urlpatterns = build_urlpatterns(async_views if settings.REPOS_ASYNC_VIEWS else views)
@@ -0,0 +1,57 @@
+import time
+
+from django.core.cache import cache
+
+DATA_VERSION_KEY = 'repos:data-version'
+CHANGES_KEY = 'repos:data-changes:{version}'
+CHANGES_TIMEOUT = 60 * 60
+# Past this many versions a reader is better off starting over
+MAX_TRACKED_CHANGES = 1000
+
+
+def _initial_version():
+    # Seed from the clock so a cold cache never hands out a version
+    # number a long-running process has already seen.
+    return int(time.time() * 1000)
+
+
+def get_data_version():
+    """Return the current version of the repository/branch/session data"""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version(repositories=None):
+    """
+    Mark the repository data as changed and return the new version.
+
+    ``repositories`` are the ids of the repositories whose rows changed; it is
+    kept with the new version so that readers can re-read just those rows.
+    Leave it as None when the changed rows aren't known.
+    """
+    try:
+        version = cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        version = _initial_version()
+        cache.set(DATA_VERSION_KEY, version, timeout=None)
+    if repositories is not None:
+        cache.set(CHANGES_KEY.format(version=version), frozenset(repositories), CHANGES_TIMEOUT)
+    return version
+
+
+def changed_repositories(since, version):
+    """
+    Ids of the repositories changed between data version ``since`` and
+    ``version``, or None when a version in between didn't record them.
+    """
+    if not since < version <= since + MAX_TRACKED_CHANGES:
+        return None
+    keys = [CHANGES_KEY.format(version=v) for v in range(since + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys):
+        return None
+    return set().union(*changes.values())
+
@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
@@ -10,68 +11,109 @@ from .forms import (
     RepositorySearchForm,
     WindsurfSessionForm
 )
-from .services import GitHubService
-from github import GithubException
+from .services import GitHubService, get_repository_details
+from .autocomplete import repository_index
+from .conditional import (
+    conditional_view,
+    repository_detail_etag,
+    repository_detail_last_modified,
+    repository_list_etag,
+)
+from .progress import ImportProgress, FINISHED, FAILED
+from .sorting import apply_sort
+from repomgr.query_budget import query_budget
+from repomgr.replicas import use_replica
+import json
 import logging
+import os
+import time
+import uuid
 from django.utils import timezone
-import git
-from django.db.models import Q, Prefetch
+from .lazy import lazy_import
+from django.conf import settings
+from django.db.models import Q
 
 logger = logging.getLogger(__name__)
 
+git = lazy_import('git')
+github = lazy_import('github')
+
+def new_search_status():
+    return {
+        'query': '',
+        'private': '',
+        'organization': '',
+        'health': '',
+        'total_repositories': 0,
+        'filtered_repositories': 0,
+        'last_search_time': None
+    }
+
+def list_queryset():
+    return Repository.objects.select_related('active_session__branch')
+
+def apply_search(repositories, form, search_status):
+    """Narrow the list queryset by the search form and record the filters used"""
+    if not form.is_valid():
+        return repositories
+
+    # Text-based search
+    query = form.cleaned_data.get('query', '')
+    search_status['query'] = query
+    if query:
+        repositories = repositories.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(organization__icontains=query)
+        )
+
+    # Private status filter
+    private_filter = form.cleaned_data.get('private', '')
+    search_status['private'] = private_filter
+    if private_filter == 'true':
+        repositories = repositories.filter(private=True)
+    elif private_filter == 'false':
+        repositories = repositories.filter(private=False)
+
+    # Organization filter
+    organization = form.cleaned_data.get('organization', '')
+    search_status['organization'] = organization
+    if organization:
+        repositories = repositories.filter(organization__icontains=organization)
+
+    # Score filters, see repos.scoring
+    health = form.cleaned_data.get('health', '')
+    search_status['health'] = health
+    scoring = settings.REPOSITORY_SCORING
+    if health == 'healthy':
+        repositories = repositories.filter(health_score__gte=scoring['healthy_threshold'])
+    elif health == 'at_risk':
+        repositories = repositories.filter(health_score__lt=scoring['at_risk_threshold'])
+    elif health == 'stale':
+        repositories = repositories.filter(staleness_score__gte=scoring['stale_threshold'])
+
+    return repositories
+
+@query_budget(9)
 @login_required
+@use_replica
+@conditional_view(etag_func=repository_list_etag)
 def repository_list(request):
     # Initialize session search status if not exists
     if 'search_status' not in request.session:
-        request.session['search_status'] = {
-            'query': '',
-            'private': '',
-            'organization': '',
-            'total_repositories': 0,
-            'filtered_repositories': 0,
-            'last_search_time': None
-        }
+        request.session['search_status'] = new_search_status()
 
     form = RepositorySearchForm(request.GET)
     
     # Start with an optimized queryset
-    repositories = Repository.objects.prefetch_related(
-        Prefetch(
-            'sessions',
-            queryset=WindsurfSession.objects.filter(active=True).select_related('branch'),
-            to_attr='_prefetched_active_sessions'
-        )
-    ).all()
+    repositories = list_queryset()
 
     # Update search status
     search_status = request.session['search_status']
     search_status['last_search_time'] = timezone.now().isoformat()
     search_status['total_repositories'] = repositories.count()
 
-    if form.is_valid():
-        # Text-based search
-        query = form.cleaned_data.get('query', '')
-        search_status['query'] = query
-        if query:
-            repositories = repositories.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(organization__icontains=query)
-            )
-
-        # Private status filter
-        private_filter = form.cleaned_data.get('private', '')
-        search_status['private'] = private_filter
-        if private_filter == 'true':
-            repositories = repositories.filter(private=True)
-        elif private_filter == 'false':
-            repositories = repositories.filter(private=False)
-
-        # Organization filter
-        organization = form.cleaned_data.get('organization', '')
-        search_status['organization'] = organization
-        if organization:
-            repositories = repositories.filter(organization__icontains=organization)
+    repositories = apply_search(repositories, form, search_status)
 
     # Update filtered repositories count
     search_status['filtered_repositories'] = repositories.count()
@@ -79,25 +121,63 @@ def repository_list(request):
 
     # Apply sorting
     sort = request.GET.get('sort', '-updated_at')
-    if sort in ['name', '-name', 'updated_at', '-updated_at', 'language', '-language']:
-        repositories = repositories.order_by(sort)
+    repositories = apply_sort(repositories, sort)
 
     return render(request, 'repos/repository_list.html', {
         'repositories': repositories,
         'search_form': form,
         'current_sort': sort,
-        'search_status': search_status
+        'search_status': search_status,
+        'scoring': settings.REPOSITORY_SCORING,
     })
 
+@query_budget(5)
+@login_required
+def repository_autocomplete(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 50))
+    except ValueError:
+        limit = 10
+
+    results = [
+        {
+            'id': record.pk,
+            'name': record.name,
+            'full_name': record.full_name,
+            'url': reverse('repos:repository_detail', args=[record.pk]),
+        }
+        for record in repository_index.search(query, limit)
+    ]
+    return JsonResponse({'query': query, 'results': results})
+
+@query_budget(6)
 @login_required
+@use_replica
+@conditional_view(etag_func=repository_detail_etag, last_modified_func=repository_detail_last_modified)
 def repository_detail(request, pk):
-    repository = get_object_or_404(Repository, pk=pk)
+    repository = get_object_or_404(Repository.objects.select_related('active_session__branch'), pk=pk)
     branches = repository.branches.all().order_by('-is_default', 'name')
     return render(request, 'repos/repository_detail.html', {
         'repository': repository,
-        'branches': branches
+        'branches': branches,
+        'details': github_details(repository),
     })
 
+def can_fetch_details(repository):
+    return bool(repository.full_name and os.environ.get('GITHUB_ACCESS_TOKEN'))
+
+def github_details(repository):
+    """Stars, forks etc. of ``repository``, or None if GitHub can't be asked"""
+    if not can_fetch_details(repository):
+        return None
+    try:
+        return get_repository_details(repository)
+    except Exception as e:
+        logger.warning(f"Could not get details of {repository.full_name}: {str(e)}")
+        return None
+
+@query_budget(2)
 @login_required
 def repository_import(request):
     logger.info(f"Import request method: {request.method}")
@@ -106,6 +186,22 @@ def repository_import(request):
         logger.info(f"Form data: {request.POST}")
         if form.is_valid():
             logger.info("Form is valid")
+            progress = None
+            if form.cleaned_data.get('progress_id'):
+                progress = ImportProgress(form.cleaned_data['progress_id'])
+                if not progress.start():
+                    # A reload re-posted an import that is already running or
+                    # done; show its progress instead of starting it again.
+                    state = progress.status() or {}
+                    if state.get('status') == 'running':
+                        messages.info(request, 'This import is still running.')
+                        return render(request, 'repos/repository_import.html', {
+                            'form': form,
+                            'progress_url': reverse('repos:repository_import_progress', args=[progress.job_id]),
+                            'import_running': True,
+                        })
+                    messages.info(request, state.get('message') or 'This import has already finished.')
+                    return redirect('repos:repository_list')
             try:
                 service = GitHubService()
                 logger.info("GitHubService initialized")
@@ -120,7 +216,9 @@ def repository_import(request):
                 
                 repos = service.sync_repositories(
                     username=username,
-                    affiliation=affiliation
+                    affiliation=affiliation,
+                    progress=progress,
+                    trigger='web',
                 )
                 logger.info(f"Initial repos fetched: {len(repos)}")
                 
@@ -135,24 +233,96 @@ def repository_import(request):
                 
                 logger.info(f"After filtering: {len(repos)} repos")
                 
-                messages.success(
-                    request,
+                summary = (
                     f'Import of {len(repos)} repositories completed successfully! ' +
                     f'({sum(1 for r in repos if r.private)} private, ' +
                     f'{sum(1 for r in repos if r.organization)} from organizations)'
                 )
+                if progress:
+                    progress.finish(summary)
+                messages.success(request, summary)
                 return redirect('repos:repository_list')
             except Exception as e:
                 logger.error(f"Error during import: {str(e)}", exc_info=True)
+                if progress:
+                    progress.fail(f'Error importing repositories: {str(e)}')
                 messages.error(request, f'Error importing repositories: {str(e)}')
         else:
             logger.error(f"Form validation errors: {form.errors}")
     else:
-        form = RepositoryImportForm()
+        form = RepositoryImportForm(initial={'progress_id': uuid.uuid4()})
         logger.info("Displaying empty import form")
     
-    return render(request, 'repos/repository_import.html', {'form': form})
+    progress_id = form['progress_id'].value()
+    return render(request, 'repos/repository_import.html', {
+        'form': form,
+        'progress_url': reverse('repos:repository_import_progress', args=[progress_id]) if progress_id else None,
+    })
+
+PROGRESS_POLL_INTERVAL = 0.5
+PROGRESS_HEARTBEAT_INTERVAL = 15
+PROGRESS_START_TIMEOUT = 60
+
+
+def _sse(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def _last_event_id(request):
+    try:
+        return int(request.headers.get('Last-Event-ID') or 0)
+    except ValueError:
+        return 0
+
+
+@query_budget(2)
+@login_required
+def repository_import_progress(request, job_id):
+    """
+    Stream the progress of an import as Server-Sent Events.
+
+    The stream holds a worker thread until the import ends; under ASGI,
+    repos.async_views serves it from the event loop instead. Reconnecting
+    browsers resume from their ``Last-Event-ID``.
+    """
+    progress = ImportProgress(job_id)
+    last_id = _last_event_id(request)
 
+    def stream():
+        nonlocal last_id
+        yield 'retry: 2000\n\n'
+        waited = 0.0
+        since_output = 0.0
+        while True:
+            events = progress.events(after=last_id)
+            for event in events:
+                last_id = event['id']
+                yield _sse('progress', event, event_id=last_id)
+            state = progress.status()
+            if state is None and waited >= PROGRESS_START_TIMEOUT:
+                yield _sse(FAILED, {'message': 'Import not found.'})
+                return
+            if state and state['status'] in (FINISHED, FAILED) and not events:
+                yield _sse(state['status'], state)
+                return
+
+            if events:
+                since_output = 0.0
+            elif since_output >= PROGRESS_HEARTBEAT_INTERVAL:
+                since_output = 0.0
+                yield ': keep-alive\n\n'
+            time.sleep(PROGRESS_POLL_INTERVAL)
+            waited += PROGRESS_POLL_INTERVAL
+            since_output += PROGRESS_POLL_INTERVAL
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@query_budget(20)
 @login_required
 def repository_create(request):
     if request.method == 'POST':
@@ -168,13 +338,14 @@ def repository_create(request):
                 )
                 messages.success(request, f'Successfully created repository {repo.name}')
                 return redirect('repos:repository_detail', pk=repo.pk)
-            except GithubException as e:
+            except github.GithubException as e:
                 messages.error(request, f'Error creating repository: {str(e)}')
     else:
         form = RepositoryCreateForm()
     
     return render(request, 'repos/repository_create.html', {'form': form})
 
+@query_budget(10)
 @login_required
 def repository_delete(request, pk):
     repository = get_object_or_404(Repository, pk=pk)
@@ -184,24 +355,18 @@ def repository_delete(request, pk):
             service.delete_repository(repository)
             messages.success(request, f'Successfully deleted repository {repository.name}')
             return redirect('repos:repository_list')
-        except GithubException as e:
+        except github.GithubException as e:
             messages.error(request, f'Error deleting repository: {str(e)}')
     
     return render(request, 'repos/repository_delete.html', {'repository': repository})
 
+@query_budget(10)
 @login_required
 def start_session(request, pk):
     repository = get_object_or_404(Repository, pk=pk)
     
-    # End any active sessions for this repository
-    WindsurfSession.objects.filter(repository=repository, active=True).update(
-        active=False,
-        end_time=timezone.now()
-    )
-    
-    # Create new session
-    session = WindsurfSession.objects.create(
-        repository=repository,
+    # Ends any active session and updates the counters on the repository
+    session = repository.start_session(
         branch=repository.branches.filter(is_default=True).first()
     )
     
@@ -220,6 +385,7 @@ def start_session(request, pk):
     messages.success(request, f'Started new Windsurf session for {repository.name}')
     return redirect('repos:repository_detail', pk=pk)
 
+@query_budget(8)
 @login_required
 def end_session(request, pk, session_id):
     repository = get_object_or_404(Repository, pk=pk)
@@ -241,10 +407,11 @@ def end_session(request, pk, session_id):
         'session': session
     })
 
+@query_budget(4)
 @login_required
 def session_list(request, pk):
     repository = get_object_or_404(Repository, pk=pk)
-    sessions = repository.sessions.all()
+    sessions = repository.sessions.select_related('branch')
     return render(request, 'repos/session_list.html', {
         'repository': repository,
         'sessions': sessions
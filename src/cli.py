@@ -1,14 +1,145 @@
 import click
-from rich.console import Console
-from rich.table import Table
+import csv
+import json
 import os
+import sys
+from functools import lru_cache
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize console for rich output
-console = Console()
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+OUTPUT_FORMATS = ["table", "json", "ndjson", "csv"]
+REPO_FIELDS = ["name", "full_name", "description", "language", "stars", "private", "updated_at"]
+
+# Same orderings as the web list (repos.sorting.SORT_FIELDS); GitHub can only
+# sort by name and update time.
+SORT_CHOICES = [
+    "name", "-name", "updated_at", "-updated_at", "language", "-language",
+    "branch_count", "-branch_count", "health_score", "-health_score",
+    "staleness_score", "-staleness_score",
+]
+LIVE_SORTS = {"name": "full_name", "updated_at": "updated"}
+
+
+@lru_cache(maxsize=None)
+def get_console():
+    """Console for rich output, created on first use to keep --help fast"""
+    from rich.console import Console
+
+    return Console()
+
+
+def setup_django():
+    """Configure repomgr's Django settings so the CLI can read its database"""
+    import django
+
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "repomgr.settings")
+    django.setup()
+
+
+def local_rows(username=None, sort=None, limit=None, **filters):
+    """
+    Stream repositories from repomgr's database, filtered and sorted by the
+    database. Stars come from the latest daily snapshot.
+    """
+    setup_django()
+    from django.db.models import OuterRef, Subquery
+    from repos.models import Repository, RepositorySnapshot
+    from repos.sorting import apply_sort
+
+    queryset = Repository.search(
+        query=filters.get("query"),
+        private=filters.get("private"),
+        organization=filters.get("organization"),
+        language=filters.get("language"),
+    )
+    if username:
+        queryset = queryset.filter(full_name__istartswith=f"{username}/")
+    latest = RepositorySnapshot.objects.filter(repository=OuterRef("pk")).order_by("-captured_on")
+    queryset = queryset.annotate(stars=Subquery(latest.values("stars")[:1]))
+    queryset = apply_sort(queryset, sort or "name")
+    if limit:
+        queryset = queryset[:limit]
+    return queryset.values(*REPO_FIELDS).iterator(chunk_size=2000)
+
+
+def github_row(repo):
+    """A REPO_FIELDS row from a PyGithub repository"""
+    return {
+        "name": repo.name,
+        "full_name": repo.full_name,
+        "description": repo.description,
+        "language": repo.language,
+        "stars": repo.stargazers_count,
+        "private": repo.private,
+        "updated_at": repo.updated_at,
+    }
+
+
+def filter_rows(rows, query=None, language=None, organization=None, private=None):
+    """Apply local_rows' filters to rows that GitHub can't filter for us"""
+    query = query.lower() if query else None
+    for row in rows:
+        owner = row["full_name"].split("/", 1)[0]
+        if query and not any(query in (value or "").lower() for value in (row["name"], row["description"], owner)):
+            continue
+        if language and language.lower() not in (row["language"] or "").lower():
+            continue
+        if organization and organization.lower() not in owner.lower():
+            continue
+        if private is not None and row["private"] != private:
+            continue
+        yield row
+
+
+def limit_rows(rows, limit):
+    for count, row in enumerate(rows):
+        if limit and count >= limit:
+            return
+        yield row
+
+
+def _json_default(value):
+    return value.isoformat()
+
+
+def write_rows(rows, output_format, title=None, out=None):
+    """Write rows to ``out`` (stdout) as they arrive, without collecting them first"""
+    out = out or sys.stdout
+
+    if output_format == "ndjson":
+        for row in rows:
+            out.write(json.dumps(row, default=_json_default) + "\n")
+    elif output_format == "json":
+        separator = "["
+        for row in rows:
+            out.write(separator + json.dumps(row, default=_json_default))
+            separator = ",\n"
+        out.write("[]\n" if separator == "[" else "]\n")
+    elif output_format == "csv":
+        writer = csv.DictWriter(out, fieldnames=REPO_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        # rich tables need every row up front, so the table is plain text
+        line = "{:<30.30} {:<50.50} {:>7} {:<15.15}\n"
+        if title:
+            out.write(f"{title}\n")
+        out.write(line.format("Name", "Description", "Stars", "Language"))
+        for row in rows:
+            out.write(line.format(
+                row["name"],
+                row["description"] or "No description",
+                "-" if row["stars"] is None else str(row["stars"]),
+                row["language"] or "Unknown",
+            ))
+    out.flush()
 
 
 class RepoManager:
@@ -21,47 +152,43 @@ class RepoManager:
         self.github_token = github_token or os.getenv("GITHUB_TOKEN")
 
         if not self.github_token:
-            console.print(
+            get_console().print(
                 "[bold red]Error:[/] GitHub token not found. Set GITHUB_TOKEN environment variable."
             )
             raise ValueError("GitHub token is required")
 
-    def list_repos(self, username=None):
+    def list_repos(self, username=None, output_format="table", sort=None, limit=None, **filters):
         """
-        List repositories for a given user
+        List repositories for a given user straight from GitHub
 
         :param username: GitHub username (defaults to token owner)
+        :param output_format: One of OUTPUT_FORMATS
+        :param sort: One of the sorts GitHub supports, see LIVE_SORTS
+        :param limit: Stop after this many repositories
+        :param filters: query, language, organization and private, applied while streaming
         """
         from github import Github
 
         try:
-            g = Github(self.github_token)
+            # 100 per page instead of 30 means a third of the requests
+            g = Github(self.github_token, per_page=100)
 
             # Use token owner if no username provided
             if not username:
                 username = g.get_user().login
 
-            # Create a table for repository display
-            table = Table(title=f"Repositories for {username}")
-            table.add_column("Name", style="cyan")
-            table.add_column("Description", style="magenta")
-            table.add_column("Stars", style="green")
-            table.add_column("Language", style="yellow")
-
-            # Fetch and display repositories
-            user = g.get_user(username)
-            for repo in user.get_repos():
-                table.add_row(
-                    repo.name,
-                    repo.description or "No description",
-                    str(repo.stargazers_count),
-                    repo.language or "Unknown",
-                )
-
-            console.print(table)
+            options = {}
+            if sort:
+                options = {
+                    "sort": LIVE_SORTS[sort.lstrip("-")],
+                    "direction": "desc" if sort.startswith("-") else "asc",
+                }
+            repos = g.get_user(username).get_repos(**options)
+            rows = filter_rows((github_row(repo) for repo in repos), **filters)
+            write_rows(limit_rows(rows, limit), output_format, title=f"Repositories for {username}")
 
         except Exception as e:
-            console.print(f"[bold red]Error:[/] {e}")
+            get_console().print(f"[bold red]Error:[/] {e}")
 
     def create_repo(self, name, description=None, private=False):
         """
@@ -79,11 +206,11 @@ class RepoManager:
 
             repo = user.create_repo(name, description=description, private=private)
 
-            console.print(f"[bold green]Repository '{name}' created successfully![/]")
-            console.print(f"URL: {repo.html_url}")
+            get_console().print(f"[bold green]Repository '{name}' created successfully![/]")
+            get_console().print(f"URL: {repo.html_url}")
 
         except Exception as e:
-            console.print(f"[bold red]Error creating repository:[/] {e}")
+            get_console().print(f"[bold red]Error creating repository:[/] {e}")
 
 
 @click.group()
@@ -94,10 +221,32 @@ def cli():
 
 @cli.command()
 @click.option("--username", help="GitHub username to list repositories for")
-def list_repos(username):
-    """List repositories for a user"""
+@click.option("--live", is_flag=True, help="Query GitHub instead of the synced database")
+@click.option(
+    "--format", "output_format", type=click.Choice(OUTPUT_FORMATS), default="table", show_default=True
+)
+@click.option("--query", "-q", help="Match name, description or organization")
+@click.option("--language", help="Filter by language")
+@click.option("--organization", help="Filter by organization")
+@click.option("--private/--public", default=None, help="Only private or only public repositories")
+@click.option("--sort", type=click.Choice(SORT_CHOICES), help="Sort field, prefix with - to reverse")
+@click.option("--limit", type=click.IntRange(min=1), help="Maximum number of repositories")
+def list_repos(username, live, output_format, query, language, organization, private, sort, limit):
+    """List repositories, from the synced database unless --live is given"""
+    filters = {"query": query, "language": language, "organization": organization, "private": private}
+    if not live:
+        try:
+            rows = local_rows(username=username, sort=sort, limit=limit, **filters)
+            write_rows(rows, output_format, title="Synced repositories")
+        except Exception as e:
+            get_console().print(f"[bold red]Error reading the repomgr database:[/] {e}")
+            sys.exit(1)
+        return
+
+    if sort and sort.lstrip("-") not in LIVE_SORTS:
+        raise click.UsageError(f"--live can only sort by {', '.join(LIVE_SORTS)}")
     manager = RepoManager()
-    manager.list_repos(username)
+    manager.list_repos(username, output_format=output_format, sort=sort, limit=limit, **filters)
 
 
 @cli.command()
@@ -112,5 +261,49 @@ def create_repo(name, description, private):
     manager.create_repo(name, description, private)
 
 
+@cli.command()
+@click.option(
+    "--from", "manifest", required=True, type=click.Path(exists=True, dir_okay=False),
+    help="YAML manifest of repositories to create",
+)
+@click.option(
+    "--concurrency", type=click.IntRange(1, 20), default=16, show_default=True,
+    help="Most repositories created at once; fewer while GitHub pushes back",
+)
+@click.option("--dry-run", is_flag=True, help="Only report what would be created")
+def create_repos(manifest, concurrency, dry_run):
+    """Create many repositories from a manifest, skipping existing ones"""
+    setup_django()
+    from repos.manifest import load_manifest
+    from repos.services import GitHubService
+
+    try:
+        organization, specs = load_manifest(manifest)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--from")
+
+    # The web app's service reads GITHUB_ACCESS_TOKEN
+    if os.getenv("GITHUB_TOKEN"):
+        os.environ.setdefault("GITHUB_ACCESS_TOKEN", os.environ["GITHUB_TOKEN"])
+    try:
+        service = GitHubService()
+        results = service.create_repositories(
+            specs, organization=organization, max_workers=concurrency, dry_run=dry_run
+        )
+    except Exception as e:
+        get_console().print(f"[bold red]Error creating repositories:[/] {e}")
+        sys.exit(1)
+
+    styles = {"created": "green", "exists": "yellow", "would_create": "cyan", "failed": "red"}
+    for result in results:
+        detail = result["error"] or result["url"] or ""
+        get_console().print(f"[{styles[result['status']]}]{result['status']:>12}[/]  {result['name']}  {detail}")
+
+    counts = {status: sum(result["status"] == status for result in results) for status in styles}
+    get_console().print(", ".join(f"{count} {status.replace('_', ' ')}" for status, count in counts.items() if count))
+    if counts["failed"]:
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     cli()